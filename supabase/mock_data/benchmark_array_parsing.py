@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# Compare the character loop fix_csv_issues.py used to split PostgreSQL array
+# literals with pg_copy.parse_array, on the array columns of a students file.
+#
+# Generates a seeded students.csv with --rows students (default 1M), or reads
+# --input, and times both parsers on preferred_colleges, interests and
+# pain_points in chunks of rows, so only parsing is measured. parse_array is
+# first checked against literals with known results and ones Postgres rejects.
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pg_copy
+
+GENERATOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'generate_uuids.py')
+ARRAY_COLUMNS = ['preferred_colleges', 'interests', 'pain_points']
+CHUNK_ROWS = 100_000
+PARSED = {
+    '{}': [],
+    '{MIT,"UC Berkeley",NULL,{1,2}}': ['MIT', 'UC Berkeley', None, ['1', '2']],
+    '{ "a\\"b" , c d }': ['a"b', 'c d'],
+    '{{1,2},{3,4}}': [['1', '2'], ['3', '4']],
+}
+MALFORMED = ['{,}', '{a,}', '{,a}', '{a,,b}', '{a', '{a}{b}', 'MIT']
+
+def legacy_split(value):
+    """The loop fix_students_csv ran once per array column."""
+    items = value.strip('{}')
+    items_list = []
+    current = ""
+    in_quotes = False
+    for char in items:
+        if char == '"' and (not current or current[-1] != '\\'):
+            in_quotes = not in_quotes
+        elif char == ',' and not in_quotes:
+            if current.strip():
+                items_list.append(current.strip().strip('"'))
+            current = ""
+            continue
+        current += char
+    if current.strip():
+        items_list.append(current.strip().strip('"'))
+    return items_list
+
+def check_parser():
+    """Raise AssertionError if parse_array gets a known literal wrong."""
+    for literal, expected in PARSED.items():
+        assert pg_copy.parse_array(literal) == expected, f'{literal!r} parsed to {pg_copy.parse_array(literal)!r}'
+    for literal in MALFORMED:
+        try:
+            parsed = pg_copy.parse_array(literal)
+        except ValueError:
+            continue
+        raise AssertionError(f'malformed {literal!r} parsed to {parsed!r}')
+
+def read_chunks(path):
+    with open(path, newline='') as f:
+        chunk = []
+        for row in csv.DictReader(f):
+            chunk.extend(row[column] for column in ARRAY_COLUMNS if row[column])
+            if len(chunk) >= CHUNK_ROWS * len(ARRAY_COLUMNS):
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+def time_parser(parse, values):
+    start = time.perf_counter()
+    for value in values:
+        parse(value)
+    return time.perf_counter() - start
+
+def run(path):
+    seconds = {'legacy': 0.0, 'parse_array': 0.0}
+    values = 0
+    for chunk in read_chunks(path):
+        values += len(chunk)
+        seconds['legacy'] += time_parser(legacy_split, chunk)
+        seconds['parse_array'] += time_parser(pg_copy.parse_array, chunk)
+    return [{'parser': parser, 'values': values, 'seconds': s, 'values_per_sec': values / s if s else 0}
+            for parser, s in seconds.items()]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark PostgreSQL array literal parsing on students.csv.')
+    parser.add_argument('--input', help='existing students.csv (default: generate one)')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='students to generate')
+    parser.add_argument('--json', metavar='PATH', help='also write the results as JSON')
+    args = parser.parse_args()
+
+    check_parser()
+    print(f"✓ parse_array handles {len(PARSED) + len(MALFORMED)} known literals")
+    with tempfile.TemporaryDirectory() as workdir:
+        path = args.input
+        if path is None:
+            print(f"Generating {args.rows} students...")
+            subprocess.run([sys.executable, GENERATOR, '--seed', '1', '--rows', f'students={args.rows}'],
+                           cwd=workdir, check=True, stdout=subprocess.DEVNULL)
+            path = os.path.join(workdir, 'students.csv')
+        results = run(path)
+
+    print(f"{'parser':<12} {'values':>10} {'seconds':>9} {'values/sec':>12}")
+    for r in results:
+        print(f"{r['parser']:<12} {r['values']:>10} {r['seconds']:>9.2f} {r['values_per_sec']:>12.0f}")
+    legacy, fast = results
+    print(f"parse_array is {legacy['seconds'] / max(fast['seconds'], 1e-9):.1f}x as fast")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
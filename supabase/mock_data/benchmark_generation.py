@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# Throughput of every update_*_csv step of generate_uuids.py and of the
+# fix_csv_issues.py repair of every RULES table, at several --scale factors.
+#
+# Each step runs in a fresh process, so its peak RSS is its own: the process
+# builds the entity IDs and any tables the step reads (untimed), then times
+# the step alone, counting the rows of every table it writes. Results go to
+# a JSON file meant to be committed, and --compare flags steps that got
+# slower than a previous results file:
+#
+#   python benchmark_generation.py --scales 1,100 --compare benchmark_generation.json
+import argparse
+import csv
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+# update step -> (steps whose output it reads, tables it writes). A step's
+# rows are those of all its tables
+UPDATE_STEPS = {
+    'update_users_csv': ([], ['users']),
+    'update_consultants_csv': ([], ['consultants']),
+    'update_students_csv': ([], ['students']),
+    'update_services_csv': ([], ['services']),
+    'update_bookings_csv': (['update_services_csv'], ['bookings']),
+    'update_user_interactions_csv': ([], ['user_interactions']),
+    'update_consultant_views_csv': ([], ['consultant_views']),
+    'update_group_participants_csv': (['update_services_csv', 'update_bookings_csv'], ['group_session_participants']),
+    'update_waitlist_csv': (['update_services_csv'], ['consultant_waitlist']),
+    'update_conversations_csv': (['update_services_csv', 'update_bookings_csv'], ['conversations', 'messages']),
+    'update_booking_requests_csv': (['update_services_csv', 'update_bookings_csv'],
+                                    ['booking_requests', 'booking_text_inputs', 'booking_doc_links',
+                                     'booking_file_uploads', 'booking_request_messages']),
+}
+# Steps that only run with --interactions sessions
+SESSION_STEPS = {'update_consultant_views_csv'}
+# RULES table -> update step that writes it
+REPAIR_SOURCES = {
+    'users': 'update_users_csv',
+    'students': 'update_students_csv',
+    'consultant_waitlist': 'update_waitlist_csv',
+    'services': 'update_services_csv',
+    'user_interactions': 'update_user_interactions_csv',
+    'group_session_participants': 'update_group_participants_csv',
+}
+DEFAULT_SCALES = '1,100,10000'
+RESULTS_PATH = 'benchmark_generation.json'
+# Steps faster than this (most of the 1x runs) are all noise, so --compare skips them
+MIN_COMPARE_SECONDS = 0.05
+
+def all_steps():
+    return list(UPDATE_STEPS) + [f'repair:{table}' for table in REPAIR_SOURCES]
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 1024
+
+def count_rows(path):
+    with open(path, newline='') as f:
+        return sum(1 for _ in csv.reader(f)) - 1
+
+def run_step(step, scale, seed):
+    """Set up and time one step in this process, in the current directory."""
+    import generate_uuids as gen
+    import fix_csv_issues
+
+    gen.configure_row_counts(scale)
+    gen.configure_seed(seed)
+    if step in SESSION_STEPS:
+        gen.interaction_model = 'sessions'
+    start = time.perf_counter()
+    gen.build_entity_uuids()
+    if step.startswith('repair:'):
+        table = step.removeprefix('repair:')
+        tables = [table]
+        source = REPAIR_SOURCES[table]
+        setup = UPDATE_STEPS[source][0] + [source]
+        timed = lambda: fix_csv_issues.repair_csv(f'{table}.csv', table)
+    else:
+        setup, tables = UPDATE_STEPS[step]
+        timed = getattr(gen, step)
+    for name in setup:
+        getattr(gen, name)()
+    setup_seconds = time.perf_counter() - start
+    setup_rss = peak_rss_mb()
+
+    start = time.perf_counter()
+    timed()
+    seconds = time.perf_counter() - start
+    table_rows = {table: count_rows(f'{table}.csv') for table in tables}
+    rows = sum(table_rows.values())
+    return {
+        'step': step,
+        'scale': scale,
+        'rows': rows,
+        'tables': table_rows,
+        'seconds': seconds,
+        'rows_per_sec': rows / seconds if seconds else 0,
+        'peak_rss_mb': peak_rss_mb(),
+        'setup_rss_mb': setup_rss,
+        'setup_seconds': setup_seconds,
+    }
+
+def benchmark(step, scale, seed, directory):
+    """run_step in a child process, so every step starts from a fresh heap."""
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--run-step', step,
+                           '--scales', str(scale), '--seed', str(seed)],
+                          cwd=directory, check=True, capture_output=True, text=True)
+    return json.loads(proc.stdout.splitlines()[-1])
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+def print_report(results):
+    print(f"{'step':<40} {'scale':>6} {'rows':>10} {'seconds':>9} {'rows/sec':>10} {'peak RSS':>9}")
+    for r in results:
+        print(f"{r['step']:<40} {r['scale']:>6} {r['rows']:>10} {r['seconds']:>9.2f} "
+              f"{r['rows_per_sec']:>10.0f} {r['peak_rss_mb']:>7.0f}MB")
+
+def compare(results, baseline, tolerance):
+    """Steps whose rows/sec fell more than tolerance below the baseline's."""
+    before = {(r['step'], r['scale']): r for r in baseline['results']}
+    regressions = []
+    for r in results:
+        old = before.get((r['step'], r['scale']))
+        if not old or min(old['seconds'], r['seconds']) < MIN_COMPARE_SECONDS:
+            continue
+        ratio = r['rows_per_sec'] / old['rows_per_sec']
+        mark = '✗' if ratio < 1 - tolerance else '✓'
+        print(f"{mark} {r['step']} at {r['scale']}x: {ratio:.2f}x the baseline rows/sec, "
+              f"peak RSS {r['peak_rss_mb']:.0f}MB (was {old['peak_rss_mb']:.0f}MB)")
+        if ratio < 1 - tolerance:
+            regressions.append(r)
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the generation and repair steps at several scales.')
+    parser.add_argument('--scales', default=DEFAULT_SCALES, help='comma separated generate_uuids.py --scale factors')
+    parser.add_argument('--steps', help=f'comma separated steps (default all: {", ".join(all_steps())})')
+    parser.add_argument('--seed', type=int, default=1, help='generate_uuids.py --seed')
+    parser.add_argument('--json', metavar='PATH', default=RESULTS_PATH, help=f'results file (default {RESULTS_PATH})')
+    parser.add_argument('--compare', metavar='PATH', help='earlier results file to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='fraction of rows/sec a step may lose against --compare before it fails')
+    parser.add_argument('--run-step', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    scales = [int(scale) for scale in args.scales.split(',')]
+    if args.run_step:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        result = run_step(args.run_step, scales[0], args.seed)
+        print(json.dumps(result))
+        sys.exit()
+
+    steps = args.steps.split(',') if args.steps else all_steps()
+    unknown = [step for step in steps if step not in all_steps()]
+    if unknown:
+        parser.error(f'unknown steps {", ".join(unknown)}')
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = []
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as workdir:
+            for step in steps:
+                print(f"{step} at {scale}x...")
+                results.append(benchmark(step, scale, args.seed, workdir))
+
+    print()
+    print_report(results)
+    with open(args.json, 'w') as f:
+        json.dump({**environment(), 'seed': args.seed, 'results': results}, f, indent=2)
+    print(f"\nResults written to {args.json}")
+    if baseline and compare(results, baseline, args.tolerance):
+        sys.exit(1)
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# Check that every foreign key in the generated files points at a row that
+# exists, before a load fails half way through.
+#
+# The foreign keys are the REFERENCES clauses of the migrations (schema.py).
+# Tables are read once each, parents before children (load_mock_data.py's
+# order): each pass indexes the keys other tables reference and checks the
+# table's own foreign keys against the indexes built so far. Indexes are
+# sorted NumPy arrays of 16-byte UUIDs (a set without NumPy); one that would
+# not fit in --memory-mb becomes a Bloom filter, which never flags a valid
+# row but may miss a few violations.
+import argparse
+import csv
+import hashlib
+import json
+import math
+import os
+import struct
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import load_mock_data
+import pg_arrow
+import pg_copy
+import schema
+from uuid_map import format_uuid
+
+BATCH_ROWS = 100_000
+SAMPLE_BYTES = 2**20
+# Approximate bytes per key of each exact index
+EXACT_KEY_BYTES = 16 if np else 90
+
+def uuid_key(value):
+    """16-byte key of a UUID as read from a file, None for NULL, or the
+    value itself when it is not a UUID (which can never match)."""
+    if value is None or value == '' or value == '\\N':
+        return None
+    if isinstance(value, bytes):
+        return value
+    try:
+        key = bytes.fromhex(value.replace('-', ''))
+    except ValueError:
+        return value
+    return key if len(key) == 16 else value
+
+def csv_rows(path):
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        yield from reader
+
+def text_rows(path):
+    with open(path, newline='') as f:
+        for line in f:
+            yield line.rstrip('\n').split('\t')
+
+def binary_rows(path):
+    """Fields of a COPY binary stream as raw bytes (UUIDs are their 16 bytes)."""
+    with open(path, 'rb') as f:
+        header = f.read(len(pg_copy.BINARY_SIGNATURE) + 8)
+        if not header.startswith(pg_copy.BINARY_SIGNATURE):
+            raise ValueError(f'{path} is not a COPY binary file')
+        f.read(struct.unpack('>i', header[-4:])[0])
+        while True:
+            count, = struct.unpack('>h', f.read(2))
+            if count == -1:
+                return
+            fields = []
+            for _ in range(count):
+                length, = struct.unpack('>i', f.read(4))
+                fields.append(None if length == -1 else f.read(length))
+            yield fields
+
+ROW_READERS = {'csv': csv_rows, 'text': text_rows, 'binary': binary_rows}
+
+def file_columns(table, files):
+    """Columns in the order they appear in the files."""
+    if files['format'] in ('text', 'binary'):
+        return pg_copy.copy_columns(table, files['columns'])
+    return files['columns']
+
+def read_rows(table, files, columns):
+    """Values of columns of every row of table's files, as they are stored:
+    text from CSV and COPY text, raw bytes from COPY binary and Python values
+    from Parquet and Arrow (where UUIDs are 16 bytes)."""
+    columns = list(columns)
+    if files['format'] in pg_arrow.EXTENSIONS:
+        # Only the needed columns are read
+        for path in files['paths']:
+            yield from pg_arrow.iter_rows(path, files['format'], columns)
+        return
+    positions = [file_columns(table, files).index(column) for column in columns]
+    for path in files['paths']:
+        for row in ROW_READERS[files['format']](path):
+            yield tuple(row[i] for i in positions)
+
+def read_batches(table, files, columns):
+    """Lists of {column: key} for BATCH_ROWS rows at a time, with row numbers."""
+    columns = sorted(columns)
+    batch = []
+    for number, row in enumerate(read_rows(table, files, columns), 1):
+        batch.append((number, {column: uuid_key(value) for column, value in zip(columns, row)}))
+        if len(batch) == BATCH_ROWS:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def estimate_rows(files):
+    """Rows of a table, guessed from the size of its files and of its first rows."""
+    size = sum(os.path.getsize(path) for path in files['paths'])
+    with open(files['paths'][0], 'rb') as f:
+        sample = f.read(SAMPLE_BYTES)
+    rows = sample.count(b'\n') if files['format'] in ('csv', 'text') else 0
+    return size * rows // len(sample) if rows else size // 64
+
+class ExactIndex:
+    """Every key, sorted in one NumPy array of 16-byte strings, or a set."""
+
+    exact = True
+
+    def __init__(self):
+        self.data = bytearray() if np else set()
+
+    def add(self, key):
+        if np:
+            self.data += key
+        else:
+            self.data.add(key)
+
+    def freeze(self):
+        if np:
+            self.data = np.sort(np.frombuffer(bytes(self.data), dtype='S16'))
+
+    def contains(self, keys):
+        if not np:
+            return [key in self.data for key in keys]
+        if len(self.data) == 0:
+            return [False] * len(keys)
+        wanted = np.array(keys, dtype='S16')
+        found = self.data[np.minimum(np.searchsorted(self.data, wanted), len(self.data) - 1)] == wanted
+        return found.tolist()
+
+class BloomFilter:
+    """Approximate membership in memory_bytes: no false negatives, false
+    positives at about false_positive_rate."""
+
+    exact = False
+
+    def __init__(self, expected, memory_bytes):
+        self.bits = bytearray(max(memory_bytes, 1))
+        self.size = len(self.bits) * 8
+        self.hashes = min(max(1, round(self.size / max(expected, 1) * math.log(2))), 12)
+        self.false_positive_rate = (1 - math.exp(-self.hashes * expected / self.size)) ** self.hashes
+
+    def positions(self, key):
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for pos in self.positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def freeze(self):
+        pass
+
+    def contains(self, keys):
+        return [all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self.positions(key)) for key in keys]
+
+def new_index(files, memory_bytes):
+    expected = estimate_rows(files)
+    if expected * EXACT_KEY_BYTES <= memory_bytes:
+        return ExactIndex()
+    return BloomFilter(expected, memory_bytes)
+
+def foreign_keys(parsed, table, tables):
+    """(column, referenced table, referenced column) of table's foreign keys."""
+    return [(column, info['references']['table'], info['references']['column'])
+            for column, info in parsed['tables'][table].items()
+            if info['references'] and info['references']['table'] in tables]
+
+def check(found, parsed, memory_bytes, max_examples):
+    """One result per foreign key, reading each table once (twice if it references itself)."""
+    order = [table for level in load_mock_data.load_plan(parsed, list(found)) for table in level]
+    referenced = {(ref_table, ref_column) for table in order
+                  for _, ref_table, ref_column in foreign_keys(parsed, table, found)}
+    indexes, results = {}, []
+    for table in order:
+        files = found[table]
+        building = {column: new_index(files, memory_bytes) for t, column in referenced if t == table}
+        fks = foreign_keys(parsed, table, found)
+        passes = [[fk for fk in fks if fk[1] != table], [fk for fk in fks if fk[1] == table]]
+        for checking in passes:
+            if not checking and not building:
+                continue
+            counts = {fk: {'table': table, 'column': fk[0], 'references': f'{fk[1]}.{fk[2]}',
+                           'checked': 0, 'violations': 0, 'examples': []} for fk in checking}
+            columns = set(building) | {fk[0] for fk in checking}
+            for batch in read_batches(table, files, columns):
+                for column, index in building.items():
+                    for _, keys in batch:
+                        if isinstance(keys[column], bytes):
+                            index.add(keys[column])
+                for fk in checking:
+                    column, ref_table, ref_column = fk
+                    rows = [(number, keys[column]) for number, keys in batch if keys[column] is not None]
+                    index = indexes[(ref_table, ref_column)]
+                    valid = [key if isinstance(key, bytes) else b'' for _, key in rows]
+                    present = index.contains(valid)
+                    counts[fk]['checked'] += len(rows)
+                    for (number, key), ok in zip(rows, present):
+                        if not ok:
+                            counts[fk]['violations'] += 1
+                            if len(counts[fk]['examples']) < max_examples:
+                                value = format_uuid(key) if isinstance(key, bytes) else key
+                                counts[fk]['examples'].append({'row': number, 'value': value})
+            for column, index in building.items():
+                index.freeze()
+                indexes[(table, column)] = index
+            building = {}
+            for fk, result in counts.items():
+                index = indexes[(fk[1], fk[2])]
+                result['exact'] = index.exact
+                if not index.exact:
+                    result['false_positive_rate'] = index.false_positive_rate
+                results.append(result)
+    return results
+
+def unchecked_references(parsed, found):
+    """Foreign keys into tables that have no files, such as auth.users."""
+    return sorted({f"{table}.{column} -> {info['references']['table']}"
+                   for table in found for column, info in parsed['tables'][table].items()
+                   if info['references'] and info['references']['table'] not in found})
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check the foreign keys of the generated files against their parents.')
+    parser.add_argument('--dir', default='.', help='directory holding the generated files')
+    parser.add_argument('--memory-mb', type=float, default=1024,
+                        help='memory per key index; larger tables get a Bloom filter of this size')
+    parser.add_argument('--examples', type=int, default=5, help='violating rows listed per foreign key')
+    parser.add_argument('--json', metavar='PATH', help='also write the results as JSON')
+    args = parser.parse_args()
+
+    parsed = schema.parse_migrations()
+    found = {table: files for table in parsed['tables']
+             if (files := load_mock_data.table_files(args.dir, table))}
+    if not found:
+        parser.error(f'no generated files in {args.dir}')
+    results = check(found, parsed, int(args.memory_mb * 2**20), args.examples)
+
+    for r in results:
+        mark = '✓' if r['violations'] == 0 else '✗'
+        approx = '' if r['exact'] else f" (Bloom filter, ~{r['false_positive_rate']:.1e} of violations missed)"
+        print(f"{mark} {r['table']}.{r['column']} -> {r['references']}: "
+              f"{r['checked']} rows, {r['violations']} violations{approx}")
+        for example in r['examples']:
+            print(f"    row {example['row']}: {example['value']}")
+    for reference in unchecked_references(parsed, found):
+        print(f"- {reference}: not checked, no file for the referenced table")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if any(r['violations'] for r in results):
+        sys.exit(1)
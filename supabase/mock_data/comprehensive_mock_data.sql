@@ -2,28 +2,10 @@
 -- This script populates all tables with realistic, cross-referenced data
 -- Simulating several weeks of marketplace operation
 
--- Clear existing data (in correct order due to foreign key constraints)
-TRUNCATE TABLE collection_guides CASCADE;
-TRUNCATE TABLE guide_collections CASCADE;
-TRUNCATE TABLE guide_service_links CASCADE;
-TRUNCATE TABLE guide_relations CASCADE;
-TRUNCATE TABLE guide_resources CASCADE;
-TRUNCATE TABLE guide_comments CASCADE;
-TRUNCATE TABLE guide_interactions CASCADE;
-TRUNCATE TABLE guide_sections CASCADE;
-TRUNCATE TABLE student_guides CASCADE;
-TRUNCATE TABLE group_session_participants CASCADE;
-TRUNCATE TABLE consultant_waitlist CASCADE;
-TRUNCATE TABLE user_interactions CASCADE;
-TRUNCATE TABLE discount_usage CASCADE;
-TRUNCATE TABLE discount_codes CASCADE;
-TRUNCATE TABLE bookings CASCADE;
-TRUNCATE TABLE services CASCADE;
-TRUNCATE TABLE verification_queue CASCADE;
-TRUNCATE TABLE consultants CASCADE;
-TRUNCATE TABLE students CASCADE;
-TRUNCATE TABLE user_theme_preferences CASCADE;
-TRUNCATE TABLE users CASCADE;
+-- Clear existing data. CASCADE also empties every table that references
+-- these, directly or through another table, so only the roots are listed:
+-- user_theme_preferences references auth.users rather than users
+TRUNCATE TABLE users, user_theme_preferences CASCADE;
 
 -- Create Users (mix of students and consultants)
 -- Note: In production, these would come from Supabase Auth
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+# Row validators compiled from the constraints of the migrations: enum types,
+# NOT NULL and CHECK constraints (see schema.py).
+#
+# A validator is built once per table and set of columns, and checking a row
+# is then a set lookup per enum column and a few closures per CHECK, so the
+# generators can validate every row they write and fail on the first one
+# Postgres would reject, instead of leaving it to a repair pass.
+#
+# CHECK expressions are compiled from the SQL subset the migrations use:
+# comparisons, AND/OR/NOT, IN, LIKE, BETWEEN, IS [NOT] NULL and
+# array_length/length. Any other constraint is left out and listed in
+# RowValidator.unsupported. NULL follows SQL: a CHECK only fails when it is
+# false, not when it is unknown.
+#
+#   python constraints.py user_interactions.csv bookings.csv
+import csv
+import json
+import operator
+import os
+import re
+import sys
+
+import pg_copy
+import schema
+
+TOKEN = re.compile(r"\s*(?:('(?:[^']|'')*')|(\d+(?:\.\d+)?)|(<=|>=|<>|!=|::|[=<>(),])|(\w+))")
+PART_SUFFIX = re.compile(r'\.part-\d+$')
+NUMERIC_TYPES = {'integer', 'bigint', 'smallint', 'numeric', 'real', 'double precision'}
+
+class Unsupported(Exception):
+    """A CHECK expression outside the subset compile_check understands."""
+
+def is_null(value):
+    return value is None or value == ''
+
+def column_reader(column, pg_type):
+    """Function from a row to the column's value in the Python type
+    expressions compare: float for numbers, a list for arrays, else str."""
+    name, is_array = pg_copy.base_type(pg_type)
+    if is_array:
+        def read(row):
+            value = row[column]
+            if is_null(value) or isinstance(value, list):
+                return None if is_null(value) else value
+            return json.loads(value) if value.startswith('[') else pg_copy.parse_array(value)
+    elif name in NUMERIC_TYPES:
+        def read(row):
+            value = row[column]
+            return None if is_null(value) else float(value)
+    elif name == 'boolean':
+        def read(row):
+            value = row[column]
+            return None if is_null(value) else value is True or str(value).lower() in ('true', 't')
+    else:
+        def read(row):
+            value = row[column]
+            return None if is_null(value) else str(value)
+    return read
+
+def tokenize(expression):
+    tokens, pos = [], 0
+    expression = expression.strip()
+    while pos < len(expression):
+        match = TOKEN.match(expression, pos)
+        if not match:
+            raise Unsupported(f'cannot read {expression[pos:]!r}')
+        pos = match.end()
+        string, number, symbol, word = match.groups()
+        if string is not None:
+            tokens.append(('literal', string[1:-1].replace("''", "'")))
+        elif number is not None:
+            tokens.append(('literal', float(number)))
+        elif symbol == '::':
+            # Casts such as 'x'::text do not change what is compared
+            match = TOKEN.match(expression, pos)
+            pos = match.end() if match else pos
+        elif symbol is not None:
+            tokens.append(('symbol', symbol))
+        else:
+            tokens.append(('word', word))
+    return tokens
+
+def sql_and(a, b):
+    if a is False or b is False:
+        return False
+    return None if a is None or b is None else True
+
+def sql_or(a, b):
+    if a is True or b is True:
+        return True
+    return None if a is None or b is None else False
+
+COMPARISONS = {'=': operator.eq, '!=': operator.ne, '<>': operator.ne, '<': operator.lt, '<=': operator.le,
+               '>': operator.gt, '>=': operator.ge}
+
+def compare(op, a, b):
+    if a is None or b is None:
+        return None
+    if isinstance(a, float) != isinstance(b, float):
+        a, b = (float(a), b) if isinstance(b, float) else (a, float(b))
+    return op(a, b)
+
+def like_regex(pattern):
+    return re.compile(''.join('.*' if c == '%' else '.' if c == '_' else re.escape(c) for c in pattern), re.DOTALL)
+
+def array_length(value, dimension=1.0):
+    """array_length(value, 1): NULL for NULL and empty arrays, like Postgres."""
+    if value is None or dimension != 1 or not value:
+        return None
+    return float(len(value))
+
+FUNCTIONS = {
+    'array_length': array_length,
+    'length': lambda value: None if value is None else float(len(value)),
+    'char_length': lambda value: None if value is None else float(len(value)),
+    'lower': lambda value: None if value is None else value.lower(),
+    'upper': lambda value: None if value is None else value.upper(),
+}
+
+class CheckCompiler:
+    """Recursive descent over the tokens of one CHECK expression, returning
+    closures from a row to True, False or None (unknown)."""
+
+    def __init__(self, expression, readers):
+        self.tokens = tokenize(expression)
+        self.pos = 0
+        self.readers = readers
+        self.columns = set()
+
+    def peek(self, kind=None, value=None):
+        if self.pos >= len(self.tokens):
+            return None
+        token = self.tokens[self.pos]
+        if kind and token[0] != kind:
+            return None
+        if value and (token[1].upper() if token[0] == 'word' else token[1]) != value:
+            return None
+        return token
+
+    def take(self, kind=None, value=None):
+        token = self.peek(kind, value)
+        if token is None:
+            found = self.tokens[self.pos][1] if self.pos < len(self.tokens) else 'the end'
+            raise Unsupported(f'expected {value or kind}, found {found}')
+        self.pos += 1
+        return token
+
+    def compile(self):
+        predicate = self.disjunction()
+        if self.pos != len(self.tokens):
+            raise Unsupported(f'unexpected {self.tokens[self.pos][1]}')
+        return predicate
+
+    def disjunction(self):
+        left = self.conjunction()
+        while self.peek('word', 'OR'):
+            self.take()
+            right = self.conjunction()
+            left = lambda row, a=left, b=right: sql_or(a(row), b(row))
+        return left
+
+    def conjunction(self):
+        left = self.negation()
+        while self.peek('word', 'AND'):
+            self.take()
+            right = self.negation()
+            left = lambda row, a=left, b=right: sql_and(a(row), b(row))
+        return left
+
+    def negation(self):
+        if self.peek('word', 'NOT'):
+            self.take()
+            inner = self.negation()
+            return lambda row: None if (value := inner(row)) is None else not value
+        return self.predicate()
+
+    def predicate(self):
+        left = self.operand()
+        negate = bool(self.peek('word', 'NOT'))
+        if negate:
+            self.take()
+        if self.peek('word', 'IS'):
+            self.take()
+            is_not = bool(self.peek('word', 'NOT'))
+            if is_not:
+                self.take()
+            self.take('word', 'NULL')
+            return lambda row: (left(row) is None) != is_not
+        if self.peek('word', 'IN'):
+            return self.in_list(left, negate)
+        if self.peek('word', 'LIKE'):
+            self.take()
+            pattern = like_regex(self.take('literal')[1])
+            test = lambda row: None if (value := left(row)) is None else bool(pattern.fullmatch(value))
+        elif self.peek('word', 'BETWEEN'):
+            self.take()
+            low = self.operand()
+            self.take('word', 'AND')
+            high = self.operand()
+            test = lambda row: sql_and(compare(operator.ge, value := left(row), low(row)),
+                                       compare(operator.le, value, high(row)))
+        elif not negate and self.peek('symbol') and self.peek()[1] in COMPARISONS:
+            op = COMPARISONS[self.take()[1]]
+            literal = self.peek('literal')
+            right = self.operand()
+            if literal and isinstance(literal[1], float):
+                # column op number, by far the most common form
+                number = literal[1]
+                return lambda row: None if (value := left(row)) is None else op(value, number)
+            return lambda row: compare(op, left(row), right(row))
+        elif not negate:
+            return left
+        else:
+            raise Unsupported('NOT must be followed by IN, LIKE or BETWEEN here')
+        if negate:
+            return lambda row: None if (value := test(row)) is None else not value
+        return test
+
+    def in_list(self, left, negate):
+        self.take()
+        self.take('symbol', '(')
+        items = [self.operand()]
+        while self.peek('symbol', ','):
+            self.take()
+            items.append(self.operand())
+        self.take('symbol', ')')
+        values = [item(None) for item in items]
+        # x IN (NULL, ...) is unknown rather than false when nothing matches
+        labels, has_null = frozenset(value for value in values if value is not None), None in values
+        def test(row):
+            value = left(row)
+            if value is None:
+                return None
+            if value in labels:
+                return not negate
+            return None if has_null else negate
+        return test
+
+    def operand(self):
+        token = self.take()
+        kind, value = token
+        if kind == 'literal':
+            return lambda row, value=value: value
+        if kind == 'symbol' and value == '(':
+            inner = self.disjunction()
+            self.take('symbol', ')')
+            return inner
+        if kind == 'word' and value.upper() == 'NULL':
+            return lambda row: None
+        if kind == 'word' and value.upper() in ('TRUE', 'FALSE'):
+            return lambda row, value=value.upper() == 'TRUE': value
+        if kind == 'word' and self.peek('symbol', '('):
+            function = FUNCTIONS.get(value.lower())
+            if function is None:
+                raise Unsupported(f'function {value}')
+            self.take()
+            args = [self.operand()]
+            while self.peek('symbol', ','):
+                self.take()
+                args.append(self.operand())
+            self.take('symbol', ')')
+            return lambda row: function(*(arg(row) for arg in args))
+        if kind == 'word' and value in self.readers:
+            self.columns.add(value)
+            return self.readers[value]
+        raise Unsupported(f'unknown name {value}')
+
+def compile_check(expression, readers):
+    """(predicate, columns used) of a CHECK expression over columns readers."""
+    compiler = CheckCompiler(expression, readers)
+    return compiler.compile(), compiler.columns
+
+class RowValidator:
+    """The constraints of table that rows with the given columns can break.
+
+    Columns missing from fieldnames get their defaults from Postgres, so
+    constraints on them are skipped.
+    """
+
+    def __init__(self, table, fieldnames):
+        parsed = schema.migrations_schema()
+        columns = parsed['tables'][table]
+        fieldnames = [name for name in fieldnames if name in columns and not columns[name]['generated']]
+        self.table = table
+        self.not_null = [name for name in fieldnames if columns[name]['not_null']]
+        self.enums = []
+        for name in fieldnames:
+            enum, is_array = pg_copy.base_type(columns[name]['type'])
+            if enum in parsed['enums']:
+                self.enums.append((name, frozenset(parsed['enums'][enum]), is_array))
+        readers = {name: column_reader(name, columns[name]['type']) for name in fieldnames}
+        all_readers = {name: None for name in columns}
+        self.checks, self.unsupported = [], []
+        for check in parsed['checks'][table]:
+            try:
+                predicate, used = compile_check(check['expression'], dict(all_readers, **readers))
+            except Unsupported as e:
+                self.unsupported.append(f"{check['name']}: {e}")
+                continue
+            if used <= set(readers):
+                self.checks.append((check['name'], predicate))
+
+    def violations(self, row):
+        """Messages for each constraint row breaks, empty if it is valid."""
+        problems = [f'{name} is NULL' for name in self.not_null if is_null(row[name])]
+        for name, labels, is_array in self.enums:
+            problems += [f'{name} {item!r} is not one of {sorted(labels)}'
+                         for item in enum_items(row[name], is_array) if item is not None and item not in labels]
+        for name, predicate in self.checks:
+            try:
+                failed = predicate(row) is False
+            except (ValueError, TypeError) as e:
+                problems.append(f'{name}: {e}')
+                continue
+            if failed:
+                problems.append(f'violates {name}')
+        return problems
+
+    def check(self, row):
+        """Raise ValueError if row breaks a constraint."""
+        try:
+            valid = (all(not is_null(row[name]) for name in self.not_null)
+                     and all(row[name] in labels or is_null(row[name]) if not is_array
+                             else all(item is None or item in labels for item in enum_items(row[name], True))
+                             for name, labels, is_array in self.enums)
+                     and all(predicate(row) is not False for _, predicate in self.checks))
+        except (ValueError, TypeError):
+            valid = False
+        problems = [] if valid else self.violations(row)
+        if problems:
+            raise ValueError(f"invalid {self.table} row {row.get('id', '')}: {'; '.join(problems)}")
+
+    def checked(self, rows):
+        """rows, checking each one as it passes."""
+        for row in rows:
+            self.check(row)
+            yield row
+
+def enum_items(value, is_array):
+    """Labels held by an enum or enum[] value, none for NULL."""
+    if is_null(value):
+        return []
+    if not is_array:
+        return [value]
+    return value if isinstance(value, list) else pg_copy.parse_array(value)
+
+_validators = {}
+
+def validator(table, fieldnames):
+    """RowValidator for table and fieldnames, compiled once per process."""
+    key = (table, tuple(fieldnames))
+    if key not in _validators:
+        _validators[key] = RowValidator(table, fieldnames)
+    return _validators[key]
+
+def enum_labels(enum):
+    """Labels of an enum type of the migrations, in declaration order."""
+    return schema.migrations_schema()['enums'][enum]
+
+if __name__ == '__main__':
+    # Check generated CSV files named after their tables, part files of
+    # sharded runs (TABLE.part-00000.csv) included
+    bad = 0
+    for path in sys.argv[1:]:
+        table = PART_SUFFIX.sub('', os.path.splitext(os.path.basename(path))[0])
+        with open(path, newline='') as f:
+            reader = csv.DictReader(f)
+            rows_validator = validator(table, reader.fieldnames)
+            for number, row in enumerate(reader, 1):
+                problems = rows_validator.violations(row)
+                if problems:
+                    bad += 1
+                    print(f"✗ {path} row {number}: {'; '.join(problems)}")
+        for problem in rows_validator.unsupported:
+            print(f"- {path}: not checked, {problem}")
+    sys.exit(1 if bad else 0)
@@ -1,185 +1,395 @@
 #!/usr/bin/env python3
+import argparse
 import csv
+import hashlib
+import io
 import json
+import mmap
+import os
+import shutil
+import tempfile
 import uuid
 import re
+from concurrent.futures import ProcessPoolExecutor
 
-# Fix students.csv JSON arrays
-def fix_students_csv():
-    print("Fixing students.csv...")
-    rows = []
-    
-    with open('students.csv', 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # Convert PostgreSQL arrays to JSON arrays
-            # Handle preferred_colleges
-            if row['preferred_colleges']:
-                colleges = row['preferred_colleges'].strip('{}')
-                # Handle quoted values with commas
-                colleges_list = []
-                current = ""
-                in_quotes = False
-                for char in colleges:
-                    if char == '"' and (not current or current[-1] != '\\'):
-                        in_quotes = not in_quotes
-                    elif char == ',' and not in_quotes:
-                        if current.strip():
-                            colleges_list.append(current.strip().strip('"'))
-                        current = ""
-                        continue
-                    current += char
-                if current.strip():
-                    colleges_list.append(current.strip().strip('"'))
-                row['preferred_colleges'] = json.dumps(colleges_list)
-            
-            # Handle interests
-            if row['interests']:
-                interests = row['interests'].strip('{}')
-                interests_list = []
-                current = ""
-                in_quotes = False
-                for char in interests:
-                    if char == '"' and (not current or current[-1] != '\\'):
-                        in_quotes = not in_quotes
-                    elif char == ',' and not in_quotes:
-                        if current.strip():
-                            interests_list.append(current.strip().strip('"'))
-                        current = ""
-                        continue
-                    current += char
-                if current.strip():
-                    interests_list.append(current.strip().strip('"'))
-                row['interests'] = json.dumps(interests_list)
-            
-            # Handle pain_points
-            if row['pain_points']:
-                pain_points = row['pain_points'].strip('{}')
-                pain_points_list = []
-                current = ""
-                in_quotes = False
-                for char in pain_points:
-                    if char == '"' and (not current or current[-1] != '\\'):
-                        in_quotes = not in_quotes
-                    elif char == ',' and not in_quotes:
-                        if current.strip():
-                            pain_points_list.append(current.strip().strip('"'))
-                        current = ""
-                        continue
-                    current += char
-                if current.strip():
-                    pain_points_list.append(current.strip().strip('"'))
-                row['pain_points'] = json.dumps(pain_points_list)
-            
-            # budget_range is already in correct format [50,150]
-            # metadata should be empty object if empty
-            if row['metadata'] == '{}':
-                row['metadata'] = '{}'
-                
-            rows.append(row)
-    
-    # Write back
-    with open('students.csv', 'w', newline='') as f:
-        fieldnames = rows[0].keys()
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
-    print("Fixed students.csv")
-
-# Fix consultant_waitlist.csv UUIDs
-def fix_consultant_waitlist_csv():
-    print("Fixing consultant_waitlist.csv...")
-    rows = []
-    
-    with open('consultant_waitlist.csv', 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # Replace placeholder UUIDs
-            if row['id'].startswith('cw'):
-                row['id'] = str(uuid.uuid4())
-            rows.append(row)
-    
-    # Write back
-    with open('consultant_waitlist.csv', 'w', newline='') as f:
-        fieldnames = rows[0].keys()
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
-    print("Fixed consultant_waitlist.csv")
-
-# Fix services.csv prices
-def fix_services_csv():
-    print("Fixing services.csv...")
-    rows = []
-    
-    with open('services.csv', 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # Ensure prices is not empty
-            if not row['prices'] or row['prices'] == '':
-                # Set a default price
-                row['prices'] = '{50}'
-            rows.append(row)
-    
-    # Write back
-    with open('services.csv', 'w', newline='') as f:
-        fieldnames = rows[0].keys()
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
-    print("Fixed services.csv")
-
-# Fix user_interactions.csv enum values
-def fix_user_interactions_csv():
-    print("Fixing user_interactions.csv...")
-    rows = []
-    
-    # Valid enum values based on schema
-    valid_interaction_types = ['view', 'bookmark', 'message', 'booking']
-    
-    with open('user_interactions.csv', 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # Replace 'search' with 'view'
-            if row['interaction_type'] == 'search':
-                row['interaction_type'] = 'view'
-            elif row['interaction_type'] not in valid_interaction_types:
-                row['interaction_type'] = 'view'  # Default to view
-            rows.append(row)
+import constraints
+import load_mock_data
+import pg_copy
+
+def temp_path(path):
+    """A new empty file next to path, so renaming it over path is atomic."""
+    fd, tmp_path = tempfile.mkstemp(prefix=f'.{os.path.basename(path)}.', suffix='.tmp',
+                                    dir=os.path.dirname(os.path.abspath(path)))
+    os.close(fd)
+    return tmp_path
+
+def replace_atomically(path, write):
+    """Call write(f) on a temp file next to path, then atomically replace
+    path with it. A failure part way leaves the original file untouched."""
+    tmp_path = temp_path(path)
+    try:
+        with open(tmp_path, 'w', newline='') as dst:
+            write(dst)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.chmod(tmp_path, os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def repair_csv(path, table):
+    """Stream path, a CSV file of table, through the table's fixes into a
+    temp file in the same directory, then atomically replace path with it.
+    Memory stays flat whatever the file size. A repaired row that still
+    breaks a constraint of the migrations raises ValueError and leaves path
+    as it was."""
+    fix_row = FIXES[table]
+    def write(dst):
+        with open(path, newline='') as src:
+            reader = csv.DictReader(src)
+            check = constraints.validator(table, reader.fieldnames).check
+            writer = csv.DictWriter(dst, fieldnames=reader.fieldnames)
+            writer.writeheader()
+            for row in reader:
+                row = fix_row(row)
+                check(row)
+                writer.writerow(row)
+    replace_atomically(path, write)
+
+# --workers mode splits files into chunks of about this many bytes
+CHUNK_BYTES = 32 * 2**20
+SCAN_BYTES = 2**20
+
+def count_quotes(data, start, stop):
+    return sum(data[pos:min(pos + SCAN_BYTES, stop)].count(b'"') for pos in range(start, stop, SCAN_BYTES))
+
+def next_record_start(data, start, target):
+    """First offset after target where a record starts, given one starts at start.
+
+    A newline only ends a record outside quotes, that is after an even number
+    of quote characters since start (an escaped "" counts twice, so it keeps
+    the parity). Quoted fields with embedded newlines or commas stay whole.
+    """
+    if target >= len(data):
+        return len(data)
+    quotes = count_quotes(data, start, target)
+    pos = target
+    while True:
+        newline = data.find(b'\n', pos)
+        if newline == -1:
+            return len(data)
+        quotes += count_quotes(data, pos, newline)
+        pos = newline + 1
+        if quotes % 2 == 0:
+            return pos
+
+def chunk_ranges(path, chunk_bytes):
+    """(header_end, [(start, stop), ...]): byte ranges of about chunk_bytes
+    that together cover every record after the header."""
+    if os.path.getsize(path) == 0:
+        return 0, []
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        header_end = next_record_start(data, 0, 0)
+        ranges, start = [], header_end
+        while start < len(data):
+            stop = next_record_start(data, start, start + chunk_bytes)
+            ranges.append((start, stop))
+            start = stop
+    return header_end, ranges
+
+def repair_chunk(table, path, start, stop, fieldnames, part_path):
+    """Repair the records in bytes [start, stop) of path into part_path, without a header."""
+    fix_row = FIXES[table]
+    check = constraints.validator(table, fieldnames).check
+    with open(path, 'rb') as f:
+        f.seek(start)
+        text = f.read(stop - start).decode()
+    with open(part_path, 'w', newline='') as dst:
+        writer = csv.DictWriter(dst, fieldnames=fieldnames)
+        for row in csv.DictReader(io.StringIO(text, newline=''), fieldnames=fieldnames):
+            row = fix_row(row)
+            check(row)
+            writer.writerow(row)
+
+def repair_parallel(paths, workers, chunk_bytes=CHUNK_BYTES, manifest=None):
+    """Repair the (table, path) files of paths with a pool of worker processes.
+
+    Each file is split into chunks on record boundaries (see chunk_ranges),
+    the chunks of all files are repaired concurrently, and each file's
+    repaired chunks are concatenated in order and atomically replace it.
+    A chunk whose input hash the manifest maps to a repaired chunk still in
+    CHUNK_CACHE is copied from there instead. Returns {path: (input digest,
+    {input chunk digest: repaired chunk digest})} for record_output.
+    """
+    jobs, inputs = [], {}
+    try:
+        for table, path in paths:
+            header_end, ranges = chunk_ranges(path, chunk_bytes)
+            with open(path, newline='') as f:
+                fieldnames = next(csv.reader(f), None)
+            if fieldnames is None:
+                continue
+            known = repaired_chunks(manifest, path, chunk_bytes)
+            whole = hashlib.blake2b(digest_size=16)
+            range_digest(path, 0, header_end, whole)
+            digests = [range_digest(path, start, stop, whole) for start, stop in ranges]
+            inputs[path] = whole.hexdigest()
+            outputs = [known[digest] if digest in known and os.path.exists(cached_chunk(known[digest])) else None
+                       for digest in digests]
+            parts = [None if output else temp_path(path) for output in outputs]
+            jobs.append((table, path, fieldnames, ranges, digests, outputs, parts))
+        
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(repair_chunk, table, path, start, stop, fieldnames, part)
+                       for table, path, fieldnames, ranges, digests, outputs, parts in jobs
+                       for (start, stop), part in zip(ranges, parts) if part]
+            for future in futures:
+                future.result()
+        
+        recorded = {}
+        for table, path, fieldnames, ranges, digests, outputs, parts in jobs:
+            def write(dst):
+                csv.writer(dst).writerow(fieldnames)
+                for output, part in zip(outputs, parts):
+                    with open(part or cached_chunk(output), newline='') as src:
+                        shutil.copyfileobj(src, dst, SCAN_BYTES)
+            replace_atomically(path, write)
+            reused = parts.count(None)
+            print(f"Fixed {path} ({len(ranges)} chunks{f', {reused} repaired before' if reused else ''})")
+            # Keep the newly repaired chunks for the next run of the same input
+            for n, part in enumerate(parts):
+                if part:
+                    outputs[n] = file_digest(part)
+                    os.makedirs(CHUNK_CACHE, exist_ok=True)
+                    shutil.move(part, cached_chunk(outputs[n]))
+            recorded[path] = inputs[path], dict(zip(digests, outputs))
+        return recorded
+    finally:
+        for table, path, fieldnames, ranges, digests, outputs, parts in jobs:
+            for part in parts:
+                if part and os.path.exists(part):
+                    os.remove(part)
+
+# fix_csv_manifest.json records, under the rule set version, the content hash
+# of every file before and after its repair, and in --workers mode the hash of
+# each input chunk with the hash of its repaired chunk, kept in CHUNK_CACHE.
+# Re-runs skip files that are still their repaired output, and --workers
+# reuses the repaired chunks of inputs it has seen before. Bump RULES_VERSION
+# whenever RULES, a transform or the manifest layout changes.
+RULES_VERSION = 3
+MANIFEST_PATH = 'fix_csv_manifest.json'
+CHUNK_CACHE = 'fix_csv_chunks'
+
+def new_manifest():
+    return {'rules_version': RULES_VERSION, 'files': {}}
+
+def load_manifest():
+    """The manifest of earlier runs, or an empty one if it is missing or was
+    written under another rule set version."""
+    try:
+        with open(MANIFEST_PATH) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return new_manifest()
+    return manifest if manifest.get('rules_version') == RULES_VERSION else new_manifest()
+
+def save_manifest(manifest):
+    replace_atomically(MANIFEST_PATH, lambda f: json.dump(manifest, f, indent=2))
+
+def range_digest(path, start, stop, whole=None):
+    """BLAKE2 hex digest of bytes [start, stop) of path, also fed to whole."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while start < stop:
+            data = f.read(min(SCAN_BYTES, stop - start))
+            digest.update(data)
+            if whole:
+                whole.update(data)
+            start += len(data)
+    return digest.hexdigest()
+
+def file_digest(path):
+    return range_digest(path, 0, os.path.getsize(path))
+
+def record_output(manifest, path, input_digest, chunk_bytes=None, chunks=None):
+    """Record a freshly repaired file with the hash of its input, and the
+    {input chunk: repaired chunk} hashes of a --workers repair."""
+    manifest['files'][path] = {
+        'input': input_digest,
+        'size': os.path.getsize(path),
+        'digest': file_digest(path),
+        'chunk_bytes': chunk_bytes,
+        'chunks': chunks or {},
+    }
+
+def is_repaired(manifest, path):
+    """Whether path is byte for byte the output recorded for it."""
+    entry = manifest['files'].get(path)
+    return bool(entry) and entry['size'] == os.path.getsize(path) and entry['digest'] == file_digest(path)
+
+def is_repair_of(manifest, path, input_digest):
+    """Whether path is the recorded repair of an input hashing to input_digest.
+    generate_uuids.py keeps such a file when it generates that input again."""
+    entry = manifest['files'].get(path)
+    return bool(entry) and entry['input'] == input_digest and is_repaired(manifest, path)
+
+def repaired_chunks(manifest, path, chunk_bytes):
+    """{input chunk digest: repaired chunk digest} recorded for path."""
+    entry = (manifest or new_manifest())['files'].get(path)
+    return entry['chunks'] if entry and entry['chunk_bytes'] == chunk_bytes else {}
+
+def cached_chunk(digest):
+    return os.path.join(CHUNK_CACHE, f'{digest}.csv')
+
+def prune_chunk_cache(manifest):
+    """Remove cached chunks that no file of the manifest maps to any more."""
+    if not os.path.isdir(CHUNK_CACHE):
+        return
+    used = {f'{digest}.csv' for entry in manifest['files'].values() for digest in entry['chunks'].values()}
+    for name in os.listdir(CHUNK_CACHE):
+        if name not in used:
+            os.remove(os.path.join(CHUNK_CACHE, name))
+
+# Column transforms: each factory returns a function from a CSV value to the
+# repaired value, so a rule is just a list of them
+
+def json_array(element=str):
+    """PostgreSQL array literal -> JSON array, converting each element with
+    element. Values that are not array literals, such as arrays converted by
+    an earlier run, are left alone."""
+    def convert(items):
+        return [convert(item) if isinstance(item, list) else None if item is None else element(item)
+                for item in items]
+    def transform(value):
+        if not value.startswith('{'):
+            return value
+        return json.dumps(convert(pg_copy.parse_array(value)))
+    return transform
+
+def json_number(text):
+    return int(text) if text.lstrip('-').isdigit() else float(text)
+
+def placeholder_uuid(prefix):
+    """Replace placeholder IDs starting with prefix by a random UUID."""
+    def transform(value):
+        return str(uuid.uuid4()) if value.startswith(prefix) else value
+    return transform
+
+def enum_value(labels, default):
+    """Coerce values outside labels to default."""
+    labels = frozenset(labels)
+    def transform(value):
+        return value if value in labels else default
+    return transform
+
+def default_value(default):
+    """Fill empty values with default."""
+    def transform(value):
+        return value or default
+    return transform
+
+# table -> column -> transforms applied in order. Every file of a table,
+# single or part of a sharded run, is read once however many rules it has.
+RULES = {
+    'users': {
+        'auth_provider': [json_array()],
+    },
+    'students': {
+        # Convert PostgreSQL arrays to JSON arrays, budget_range is already
+        # in correct format [50,150]
+        'preferred_colleges': [json_array()],
+        'interests': [json_array()],
+        'pain_points': [json_array()],
+    },
+    'consultant_waitlist': {
+        'id': [placeholder_uuid('cw')],
+    },
+    'services': {
+        'prices': [default_value('{50}'), json_array(json_number)],
+        'price_descriptions': [json_array()],
+    },
+    'user_interactions': {
+        # Labels of the interaction_type enum in the migrations
+        'interaction_type': [enum_value(constraints.enum_labels('interaction_type'), default='viewed')],
+    },
+    'group_session_participants': {
+        'id': [placeholder_uuid('gsp')],
+    },
+}
+
+def compile_rules(rules):
+    """{table: row function} applying all the column rules of each table."""
+    compiled = {}
+    for table, columns in rules.items():
+        steps = [(column, tuple(transforms)) for column, transforms in columns.items()]
+        def fix_row(row, steps=steps):
+            for column, transforms in steps:
+                value = row[column]
+                for transform in transforms:
+                    value = transform(value)
+                row[column] = value
+            return row
+        compiled[table] = fix_row
+    return compiled
+
+FIXES = compile_rules(RULES)
+
+def missing_columns(table, files):
+    """Rule columns that the files of table lack."""
+    return [column for column in RULES[table] if column not in files['columns']]
+
+def table_paths(directory='.'):
+    """(table, path) of every CSV file the rules apply to, following the
+    part manifests of sharded runs. Tables without CSV files are reported
+    and skipped: COPY and Arrow output has real arrays, nothing to repair."""
+    paths = []
+    for table in RULES:
+        files = load_mock_data.table_files(directory, table)
+        if files is None:
+            print(f"- {table}: no files, skipped")
+        elif files['format'] != 'csv':
+            print(f"- {table}: written as {files['format']}, nothing to repair")
+        elif missing := missing_columns(table, files):
+            raise ValueError(f'{table} has no column {", ".join(missing)}')
+        else:
+            paths += [(table, os.path.normpath(path)) for path in files['paths']]
+    return paths
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Convert the generated CSV files for import.')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='repair files in chunks with this many processes')
+    parser.add_argument('--chunk-bytes', type=int, default=CHUNK_BYTES,
+                        help='approximate chunk size in --workers mode')
+    parser.add_argument('--force', action='store_true',
+                        help=f'repair every file, ignoring {MANIFEST_PATH}')
+    args = parser.parse_args()
     
-    # Write back
-    with open('user_interactions.csv', 'w', newline='') as f:
-        fieldnames = rows[0].keys()
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
-    print("Fixed user_interactions.csv")
-
-# Fix group_session_participants.csv UUIDs
-def fix_group_session_participants_csv():
-    print("Fixing group_session_participants.csv...")
-    rows = []
+    try:
+        found = table_paths()
+    except ValueError as e:
+        parser.error(str(e))
     
-    with open('group_session_participants.csv', 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # Replace placeholder UUIDs
-            if row['id'].startswith('gsp'):
-                row['id'] = str(uuid.uuid4())
-            rows.append(row)
+    manifest = new_manifest() if args.force else load_manifest()
+    paths = []
+    for table, path in found:
+        if is_repaired(manifest, path):
+            print(f"✓ {path} unchanged since the last run, skipped")
+        else:
+            paths.append((table, path))
     
-    # Write back
-    with open('group_session_participants.csv', 'w', newline='') as f:
-        fieldnames = rows[0].keys()
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
-    print("Fixed group_session_participants.csv")
-
-if __name__ == '__main__':
-    fix_students_csv()
-    fix_consultant_waitlist_csv()
-    fix_services_csv()
-    fix_user_interactions_csv()
-    fix_group_session_participants_csv()
-    print("\nAll CSV files fixed!")
\ No newline at end of file
+    if args.workers > 1:
+        for path, (input_digest, chunks) in repair_parallel(paths, args.workers, args.chunk_bytes, manifest).items():
+            record_output(manifest, path, input_digest, args.chunk_bytes, chunks)
+    else:
+        for table, path in paths:
+            print(f"Fixing {path}...")
+            input_digest = file_digest(path)
+            repair_csv(path, table)
+            record_output(manifest, path, input_digest)
+            print(f"Fixed {path}")
+    save_manifest(manifest)
+    prune_chunk_cache(manifest)
+    print("\nAll CSV files fixed!")
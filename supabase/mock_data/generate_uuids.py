@@ -1,28 +1,58 @@
 #!/usr/bin/env python3
+import argparse
 import csv
+import glob
+import hashlib
+import itertools
+import math
+import os
+import queue
+import struct
 import uuid
-from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 import random
 import json
 
-# Generate UUIDs for all entities
-consultant_uuids = {
-    'c1111111-1111-1111-1111-111111111111': str(uuid.uuid4()),  # Sarah Chen
-    'c1111111-1111-1111-1111-111111111112': str(uuid.uuid4()),  # James Wilson
-    'c1111111-1111-1111-1111-111111111113': str(uuid.uuid4()),  # Priya Sharma
-    'c2222222-2222-2222-2222-222222222221': str(uuid.uuid4()),  # Michael Johnson
-    'c2222222-2222-2222-2222-222222222222': str(uuid.uuid4()),  # Lisa Wang
-    'c3333333-3333-3333-3333-333333333331': str(uuid.uuid4()),  # Emily Patel
-    'c3333333-3333-3333-3333-333333333332': str(uuid.uuid4()),  # Alex Rodriguez
-    'c4444444-4444-4444-4444-444444444441': str(uuid.uuid4()),  # David Kim
-    'c4444444-4444-4444-4444-444444444442': str(uuid.uuid4()),  # Sophie Martinez
-    'c5555555-5555-5555-5555-555555555551': str(uuid.uuid4()),  # Ryan Thomas
-    'c5555555-5555-5555-5555-555555555552': str(uuid.uuid4()),  # Nina Patel
-    'c6666666-6666-6666-6666-666666666661': str(uuid.uuid4()),  # Marcus Lee
-    'c6666666-6666-6666-6666-666666666662': str(uuid.uuid4()),  # Jessica Brown
-    'c7777777-7777-7777-7777-777777777771': str(uuid.uuid4()),  # Kevin Zhou
-    'c8888888-8888-8888-8888-888888888881': str(uuid.uuid4()),  # Amanda Davis
-}
+import check_foreign_keys
+import constraints
+import fix_csv_issues
+import interaction_sessions
+import load_mock_data
+import pg_arrow
+import pg_copy
+import popularity
+from entity_registry import UUID_BYTES, EntityIds, GroupedIds
+from uuid_map import MappingWriter, format_uuid
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Legacy placeholder IDs of the hand-curated consultants
+consultant_old_ids = [
+    'c1111111-1111-1111-1111-111111111111',  # Sarah Chen
+    'c1111111-1111-1111-1111-111111111112',  # James Wilson
+    'c1111111-1111-1111-1111-111111111113',  # Priya Sharma
+    'c2222222-2222-2222-2222-222222222221',  # Michael Johnson
+    'c2222222-2222-2222-2222-222222222222',  # Lisa Wang
+    'c3333333-3333-3333-3333-333333333331',  # Emily Patel
+    'c3333333-3333-3333-3333-333333333332',  # Alex Rodriguez
+    'c4444444-4444-4444-4444-444444444441',  # David Kim
+    'c4444444-4444-4444-4444-444444444442',  # Sophie Martinez
+    'c5555555-5555-5555-5555-555555555551',  # Ryan Thomas
+    'c5555555-5555-5555-5555-555555555552',  # Nina Patel
+    'c6666666-6666-6666-6666-666666666661',  # Marcus Lee
+    'c6666666-6666-6666-6666-666666666662',  # Jessica Brown
+    'c7777777-7777-7777-7777-777777777771',  # Kevin Zhou
+    'c8888888-8888-8888-8888-888888888881',  # Amanda Davis
+]
+consultant_index = {old_id: i for i, old_id in enumerate(consultant_old_ids)}
+# Their current_college, in the same order
+consultant_colleges = (['Harvard University'] * 3 + ['Stanford University'] * 2 + ['MIT'] * 2
+                       + ['Yale University'] * 2 + ['Princeton University'] * 2 + ['Columbia University'] * 2
+                       + ['University of Pennsylvania', 'Brown University'])
 
 # Build student UUID patterns
 student_patterns = [
@@ -38,32 +68,376 @@ student_patterns = [
     's9999999-9999-9999-9999-99999999999'
 ]
 
-student_uuids = {}
-for i in range(50):
-    pattern_idx = i // 5  # 5 students per pattern
-    last_digit = i % 5
-    old_id = student_patterns[pattern_idx] + str(last_digit)
-    student_uuids[old_id] = str(uuid.uuid4())
+# Row counts of the hand-curated dataset. --scale multiplies all of them and
+# --rows TABLE=N overrides a single table (see configure_row_counts).
+BASE_ROW_COUNTS = {
+    'consultants': len(consultant_old_ids),
+    'students': 50,
+    'bookings': 50,
+    'group_sessions': 3,
+    'user_interactions': 100,
+    'waitlists': 7,
+    'conversations': 40,
+    'booking_requests': 60,
+}
+row_counts = dict(BASE_ROW_COUNTS)
 
-# Generate service UUIDs
-service_uuids = {}
-service_map = {}  # Maps consultant_id to list of service uuids
+def configure_row_counts(scale=1, overrides=None):
+    for table, base in BASE_ROW_COUNTS.items():
+        row_counts[table] = base * scale
+    for table, count in (overrides or {}).items():
+        if table not in BASE_ROW_COUNTS:
+            raise ValueError(f'Unknown table {table!r}, expected one of {", ".join(BASE_ROW_COUNTS)}')
+        row_counts[table] = count
+    # Scaled rows are copies of the hand-curated entities, so those must exist
+    for table in ('consultants', 'students'):
+        if row_counts[table] < BASE_ROW_COUNTS[table]:
+            raise ValueError(f'{table} needs at least {BASE_ROW_COUNTS[table]} rows')
+    # A conversation is one student-consultant pair (see conversation_pairs)
+    pairs = row_counts['students'] * row_counts['consultants']
+    if row_counts['conversations'] > pairs:
+        raise ValueError(f"conversations can have at most {pairs} rows, one per student and consultant "
+                         f"({row_counts['students']} x {row_counts['consultants']})")
 
-# Generate booking UUIDs  
-booking_uuids = {}
+def scaled_old_id(old_id, block):
+    """Legacy ID of a template entity copied into the given scale block."""
+    return f'{old_id}#{block}' if block else old_id
 
-# Generate interaction UUIDs
-interaction_uuids = {}
+def consultant_old_id(i):
+    block, template = divmod(i, len(consultant_old_ids))
+    return scaled_old_id(consultant_old_ids[template], block)
 
-# Generate waitlist UUIDs
-waitlist_uuids = {}
+def student_old_id(i):
+    # 5 students per pattern, 50 per block
+    block, template = divmod(i, 50)
+    return scaled_old_id(student_patterns[template // 5] + str(template % 5), block)
 
-# Generate group session UUIDs
-group_session_uuids = {}
+student_index = {student_old_id(i): i for i in range(50)}
 
-def update_users_csv():
-    users = []
+def base_ordinal(i, table):
+    """Position of row i on the base dataset's timeline.
+
+    Scaled tables keep the same date range and status mix as the hand-curated
+    data, they just pack more rows into it.
+    """
+    return i * BASE_ROW_COUNTS[table] / row_counts[table]
+
+def in_consultant_block(old_id, block):
+    """Whether the template consultant old_id exists in the given scale block."""
+    return block * len(consultant_old_ids) + consultant_index[old_id] < row_counts['consultants']
+
+def block_ordinal(count, template, block, per_block):
+    """Ordinal of the template-th entity of a scale block, out of count.
+
+    Blocks wrap around the generated entities and fall back to the base block
+    when the last block is only partially generated.
+    """
+    ordinal = block % -(-count // per_block) * per_block + template
+    return ordinal if ordinal < count else template
+
+def scaled_email(email, block):
+    local, domain = email.split('@')
+    return f'{local}{block}@{domain}' if block else email
+
+def block_count(table, per_block):
+    return -(-row_counts[table] // per_block)
+
+# Generated IDs by ordinal (see entity_registry). Consultant i has legacy ID
+# consultant_old_id(i), student i has student_old_id(i).
+consultant_ids = EntityIds()
+student_ids = EntityIds()
+
+def build_entity_uuids():
+    consultant_ids.clear()
+    for i in range(row_counts['consultants']):
+        consultant_ids.append(new_uuid('consultants', i, user_created_at('consultants', i)))
+
+    student_ids.clear()
+    for i in range(row_counts['students']):
+        student_ids.append(new_uuid('students', i, user_created_at('students', i)))
+
+# Service IDs grouped by consultant ordinal
+consultant_services = GroupedIds()
+
+# Group session booking IDs by group ordinal, participants reference them
+group_booking_ids = EntityIds()
+
+# Popularity model (see popularity.py) of the consultants and students that
+# bookings and interactions pick, and weight multipliers of consultants by
+# college. Uniform without boosts keeps the round robin of the curated data.
+popularity_models = {'consultants': ('uniform', None), 'students': ('uniform', None)}
+college_boosts = {}
+
+def configure_popularity(models=None, boosts=None):
+    for table, model in (models or {}).items():
+        if table not in popularity_models:
+            raise ValueError(f'Unknown popularity table {table!r}, expected one of {", ".join(popularity_models)}')
+        popularity_models[table] = popularity.parse_model(model)
+    for college, boost in (boosts or {}).items():
+        if college not in consultant_colleges:
+            raise ValueError(f'Unknown college {college!r}, expected one of {", ".join(sorted(set(consultant_colleges)))}')
+        if boost < 0:
+            raise ValueError(f'{college} boost must not be negative')
+        college_boosts[college] = boost
+
+def popularity_weights(table, bookable=False):
+    """Weights of table's entities by ordinal, or None when they are picked
+    round robin. bookable leaves out consultants without services.
+
+    The weights come from the run seed alone, so every shard draws the same
+    hot consultants and whale students.
+    """
+    model = popularity_models[table]
+    if model[0] == 'uniform' and not (table == 'consultants' and college_boosts):
+        return None
+    ids = consultant_ids if table == 'consultants' else student_ids
+    weights = popularity.model_weights(model, len(ids), random.Random(f'{run_seed}:popularity:{table}'))
+    if table == 'consultants':
+        for consultant in range(len(weights)):
+            weights[consultant] *= college_boosts.get(consultant_colleges[consultant % len(consultant_old_ids)], 1)
+            if bookable and not consultant_services.first(consultant):
+                weights[consultant] = 0
+    return weights
+
+def popularity_sampler(table, bookable=False):
+    """AliasSampler of popularity_weights, or None for round robin."""
+    weights = popularity_weights(table, bookable)
+    return popularity.AliasSampler(weights) if weights else None
+
+# Base seed of the per-table and per-shard RNG streams (see shard_rng).
+# --seed pins it and also makes IDs and timestamps reproducible.
+run_seed = random.SystemRandom().getrandbits(64)
+seeded = False
+
+# All dates are relative to this one instant, so timestamps don't drift between
+# rows and tables. --reference-time sets it, --seed pins it to a fixed default.
+reference_time = datetime.now().replace(microsecond=0)
+SEEDED_REFERENCE_TIME = datetime(2025, 7, 15, 12, 0)
+
+def configure_reference_time(value):
+    """Set reference_time from an ISO 8601 string, converting offsets to UTC."""
+    global reference_time
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    reference_time = parsed
+
+def configure_seed(seed):
+    if not 0 <= seed < 2**64:
+        raise ValueError('seed must be between 0 and 2**64 - 1')
+    global run_seed, seeded, reference_time
+    run_seed = seed
+    seeded = True
+    reference_time = SEEDED_REFERENCE_TIME
+
+# --id-scheme: random 'uuid4' keys, or 'uuid7' keys ordered by the row's created_at
+id_scheme = 'uuid4'
+UNIX_EPOCH = datetime(1970, 1, 1)
+
+def new_uuid(table, key, created_at=None):
+    """UUID for the row of table identified by key (its ordinal or legacy key).
+
+    created_at is the row's datetime, or its Unix milliseconds when the caller
+    works with timestamp offsets (see format_timestamps).
+
+    Seeded runs derive it from a keyed BLAKE2 hash of (table, key) instead of
+    reading os.urandom, so any row's ID can be recomputed without generating
+    the rows before it. With the uuid7 scheme the top 48 bits are created_at in
+    Unix milliseconds, so rows inserted in time order append to the PK index.
+    """
+    if seeded:
+        digest = hashlib.blake2b(f'{table}:{key}'.encode(), digest_size=16,
+                                 key=run_seed.to_bytes(8, 'big')).digest()
+    if id_scheme == 'uuid7' and created_at is not None:
+        if isinstance(created_at, datetime):
+            created_at = (created_at - UNIX_EPOCH) // timedelta(milliseconds=1)
+        unix_ms = created_at
+        rand = int.from_bytes(digest[:10] if seeded else os.urandom(10), 'big')
+        # 48 bit timestamp, version 7, 12 random bits, RFC 4122 variant, 62 random bits
+        value = (unix_ms << 80) | (0x7 << 76) | ((rand >> 62) & 0xfff) << 64 | (0b10 << 62) | (rand & ((1 << 62) - 1))
+        return str(uuid.UUID(int=value))
+    if not seeded:
+        return str(uuid.uuid4())
+    return str(uuid.UUID(bytes=digest, version=4))
+
+def user_created_at(table, i):
+    """created_at of the i-th consultant or student in users.csv."""
+    return reference_time - timedelta(days=50-base_ordinal(i, table))
+
+# Row generators that emit many timestamps work in batches of this many rows:
+# each timestamp column is computed as integer microsecond offsets from
+# reference_time and formatted in one call per batch.
+TIMESTAMP_BATCH = 10_000
+# Below this many timestamps a datetime64 array costs more than it saves
+NUMPY_MIN_TIMESTAMPS = 10
+HOUR_US = 3_600_000_000
+DAY_US = 24 * HOUR_US
+
+def offset_us(days=0, hours=0):
+    """Offset from reference_time in whole microseconds, rounded like timedelta."""
+    return round(days * DAY_US + hours * HOUR_US)
+
+def reference_unix_ms(offset):
+    """Unix milliseconds of reference_time + offset, for new_uuid."""
+    return ((reference_time - UNIX_EPOCH) // timedelta(microseconds=1) + offset) // 1000
+
+def format_timestamps(offsets):
+    """ISO 8601 strings of reference_time + each offset, '' where it is None.
+
+    Same text as datetime.isoformat() + 'Z'. With NumPy the offsets are added
+    and formatted as one datetime64 array, otherwise (or for a handful) one
+    datetime at a time.
+    """
+    present = [offset for offset in offsets if offset is not None]
+    if not present:
+        return [''] * len(offsets)
+    if np is not None and len(present) >= NUMPY_MIN_TIMESTAMPS:
+        text = iter(timestamp_column(np.array(present, dtype=np.int64)))
+    else:
+        text = ((reference_time + timedelta(microseconds=offset)).isoformat() + 'Z' for offset in present)
+    if len(present) == len(offsets):
+        return list(text)
+    return [next(text) if offset is not None else '' for offset in offsets]
+
+def timestamp_column(offsets):
+    """format_timestamps for an int64 NumPy array of offsets, as an object array."""
+    stamps = np.datetime64(reference_time, 'us') + offsets
+    text = np.empty(len(stamps), dtype=object)
+    # isoformat() leaves out the fraction of whole seconds
+    whole = stamps.astype('datetime64[s]') == stamps
+    text[whole] = np.datetime_as_string(stamps[whole], unit='s', timezone='UTC')
+    text[~whole] = np.datetime_as_string(stamps[~whole], unit='us', timezone='UTC')
+    return text
+
+HEX_DIGITS = b'0123456789abcdef'
+UUID_HEX_POSITIONS = [p for p in range(36) if p not in (8, 13, 18, 23)]
+
+def uuid_column(table, keys, created_ms=None):
+    """new_uuid for a whole column of keys, as a NumPy str array.
+
+    Seeded IDs hash the same (table, key) pairs as new_uuid, so both engines
+    give a row the same ID. Setting the version bits and hex formatting work
+    on all 16-byte IDs of the column at once.
+    """
+    count = len(keys)
+    if seeded:
+        prefix = hashlib.blake2b(f'{table}:'.encode(), digest_size=16, key=run_seed.to_bytes(8, 'big'))
+        
+        def digest(key):
+            h = prefix.copy()
+            h.update(str(key).encode())
+            return h.digest()
+        digests = b''.join(map(digest, keys))
+    else:
+        digests = os.urandom(16 * count)
+    raw = np.frombuffer(digests, dtype=np.uint8).reshape(count, 16).copy()
+    
+    if id_scheme == 'uuid7' and created_ms is not None:
+        # Same bit layout as new_uuid: the first 10 bytes are the 80 random bits
+        rand_hi = raw[:, 0].astype(np.uint64) << np.uint64(8) | raw[:, 1].astype(np.uint64)
+        rand_lo = raw[:, 2:10].copy().view('>u8').ravel().astype(np.uint64)
+        twelve = ((rand_hi << np.uint64(2)) | (rand_lo >> np.uint64(62))) & np.uint64(0xfff)
+        high = (np.asarray(created_ms, dtype=np.uint64) << np.uint64(16)) | np.uint64(0x7 << 12) | twelve
+        low = np.uint64(0b10 << 62) | (rand_lo & np.uint64((1 << 62) - 1))
+        raw = np.stack([high, low], axis=1).astype('>u8').view(np.uint8).reshape(count, 16)
+    else:
+        raw[:, 6] = (raw[:, 6] & 0x0f) | 0x40
+        raw[:, 8] = (raw[:, 8] & 0x3f) | 0x80
     
+    # One line of ASCII per ID, split into str objects in a single pass
+    digits = np.frombuffer(HEX_DIGITS, dtype=np.uint8)
+    text = np.full((count, 37), ord('-'), dtype=np.uint8)
+    text[:, UUID_HEX_POSITIONS[0::2]] = digits[raw >> 4]
+    text[:, UUID_HEX_POSITIONS[1::2]] = digits[raw & 0x0f]
+    text[:, 36] = ord('\n')
+    return np.array(text.tobytes().decode('ascii').split('\n')[:-1], dtype=object)
+
+def batches(start, stop, size=TIMESTAMP_BATCH):
+    for batch_start in range(start, stop, size):
+        yield range(batch_start, min(batch_start + size, stop))
+
+def write_csv(path, fieldnames, rows):
+    """Write rows to path as they are produced.
+
+    rows is usually one of the generate_*_rows generators, so a table is never
+    held in memory and peak usage stays flat no matter how many rows it has.
+    Returns the number of rows written.
+    """
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        count = 0
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+# --format: 'csv' files for the dashboard importer, COPY FROM STDIN streams
+# in Postgres' 'text' or 'binary' format (see pg_copy.py), or typed 'parquet'
+# and 'arrow' files for analysis (see pg_arrow.py)
+output_format = 'csv'
+OUTPUT_EXTENSIONS = {'csv': 'csv', 'text': 'copy', 'binary': 'bin', **pg_arrow.EXTENSIONS}
+
+def table_path(table):
+    return f'{table}.{OUTPUT_EXTENSIONS[output_format]}'
+
+def output_columns(table, fieldnames):
+    """Columns written for table: COPY streams leave out generated columns."""
+    return pg_copy.copy_columns(table, fieldnames) if output_format in ('text', 'binary') else fieldnames
+
+def is_unchanged(path, tmp_path):
+    """Whether path already holds what was written to tmp_path: the same
+    bytes, or the repair fix_csv_issues.py made of the same bytes."""
+    if not os.path.exists(path):
+        return False
+    digest = fix_csv_issues.file_digest(tmp_path)
+    if os.path.getsize(path) == os.path.getsize(tmp_path) and fix_csv_issues.file_digest(path) == digest:
+        return True
+    return fix_csv_issues.is_repair_of(fix_csv_issues.load_manifest(), os.path.normpath(path), digest)
+
+def write_output(path, write):
+    """Call write(tmp_path) on a temp file next to path, then rename it over
+    path. An unchanged path is kept as it is, so a repeated seeded run leaves
+    its files, repaired ones included, for fix_csv_issues.py to skip.
+    Returns what write returned."""
+    tmp_path = fix_csv_issues.temp_path(path)
+    try:
+        result = write(tmp_path)
+        if is_unchanged(path, tmp_path):
+            os.remove(tmp_path)
+        else:
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return result
+
+def write_rows(table, path, fieldnames, rows):
+    """Write rows of table to path in the selected --format.
+
+    Array columns hold Python lists, which CSV files get as Postgres array
+    literals. Every row is checked against the constraints of the migrations
+    first, so a row Postgres would reject stops the run. The file is only
+    replaced if it changed (see write_output). Returns the number of rows
+    written.
+    """
+    rows = constraints.validator(table, fieldnames).checked(rows)
+    if output_format in pg_arrow.EXTENSIONS:
+        return write_output(path, lambda tmp_path: pg_arrow.write_arrow(tmp_path, table, fieldnames, rows,
+                                                                        output_format))
+    if output_format != 'csv':
+        return write_output(path, lambda tmp_path: pg_copy.write_copy(tmp_path, table, fieldnames, rows,
+                                                                      binary=output_format == 'binary'))
+    types = pg_copy.column_types(table)
+    arrays = [name for name in fieldnames if types[name].endswith('[]')]
+    if arrays:
+        rows = (dict(row, **{name: pg_copy.array_literal(row[name]) for name in arrays if isinstance(row[name], list)})
+                for row in rows)
+    return write_output(path, lambda tmp_path: write_csv(tmp_path, fieldnames, rows))
+
+def generate_users_rows(rng=random):
     # Add consultants
     consultants_data = [
         ('c1111111-1111-1111-1111-111111111111', 'sarah.chen@harvard.edu'),
@@ -83,22 +457,24 @@ def update_users_csv():
         ('c8888888-8888-8888-8888-888888888881', 'amanda.davis@brown.edu'),
     ]
     
-    for i, (old_id, email) in enumerate(consultants_data):
-        new_id = consultant_uuids[old_id]
-        created = datetime.now() - timedelta(days=50-i)
-        last_login = datetime.now() - timedelta(hours=random.randint(1, 48))
-        users.append({
+    for i in range(row_counts['consultants']):
+        block, template = divmod(i, len(consultants_data))
+        old_id, email = consultants_data[template]
+        new_id = consultant_ids[i]
+        created = user_created_at('consultants', i)
+        last_login = reference_time - timedelta(hours=rng.randint(1, 48))
+        yield {
             'id': new_id,
-            'email': email,
+            'email': scaled_email(email, block),
             'phone': '',
             'user_type': 'consultant',
             'profile_image_url': '',
-            'auth_provider': '{email}',
+            'auth_provider': ['email'],
             'is_active': 'true',
             'last_login': last_login.isoformat() + 'Z',
             'created_at': created.isoformat() + 'Z',
             'updated_at': created.isoformat() + 'Z'
-        })
+        }
     
     # Add students
     student_emails = [
@@ -121,35 +497,30 @@ def update_users_csv():
         'felix.morgan@gmail.com', 'claire.bell@gmail.com'
     ]
     
-    for i, email in enumerate(student_emails):
-        old_id = f's{str(i//10)*7}-{str(i//10)*4}-{str(i//10)*4}-{str(i//10)*4}-{str(i//10)*12}{i%10}'
-        new_id = student_uuids[old_id]
-        created = datetime.now() - timedelta(days=50-i)
-        last_login = datetime.now() - timedelta(hours=random.randint(1, 120))
-        users.append({
+    for i in range(row_counts['students']):
+        block, template = divmod(i, len(student_emails))
+        new_id = student_ids[i]
+        created = user_created_at('students', i)
+        last_login = reference_time - timedelta(hours=rng.randint(1, 120))
+        yield {
             'id': new_id,
-            'email': email,
+            'email': scaled_email(student_emails[template], block),
             'phone': '',
             'user_type': 'student',
             'profile_image_url': '',
-            'auth_provider': '{email}',
+            'auth_provider': ['email'],
             'is_active': 'true',
             'last_login': last_login.isoformat() + 'Z',
             'created_at': created.isoformat() + 'Z',
             'updated_at': created.isoformat() + 'Z'
-        })
-    
-    # Write CSV
-    with open('users.csv', 'w', newline='') as f:
-        fieldnames = ['id', 'email', 'phone', 'user_type', 'profile_image_url', 
-                     'auth_provider', 'is_active', 'last_login', 'created_at', 'updated_at']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(users)
+        }
 
-def update_consultants_csv():
-    consultants = []
-    
+def update_users_csv():
+    fieldnames = ['id', 'email', 'phone', 'user_type', 'profile_image_url', 
+                  'auth_provider', 'is_active', 'last_login', 'created_at', 'updated_at']
+    write_table('users', fieldnames, generate_users_rows(shard_rng('users', 0)))
+
+def generate_consultants_rows(rng=random):
     consultant_data = [
         {
             'old_id': 'c1111111-1111-1111-1111-111111111111',
@@ -384,11 +755,14 @@ def update_consultants_csv():
         }
     ]
     
-    for i, data in enumerate(consultant_data):
-        new_id = consultant_uuids[data['old_id']]
-        created = datetime.now() - timedelta(days=50-i)
+    # A partial last block keeps the consultants whose ordinals were generated
+    blocks = ((block, data) for block in range(block_count('consultants', len(consultant_data)))
+              for data in consultant_data if in_consultant_block(data['old_id'], block))
+    for i, (block, data) in enumerate(blocks):
+        new_id = consultant_ids[block * len(consultant_old_ids) + consultant_index[data['old_id']]]
+        created = reference_time - timedelta(days=50-base_ordinal(i, 'consultants'))
         verified = created + timedelta(days=1)
-        last_active = datetime.now() - timedelta(hours=random.randint(1, 48))
+        last_active = reference_time - timedelta(hours=rng.randint(1, 48))
         
         consultant = {
             'id': new_id,
@@ -403,7 +777,7 @@ def update_consultants_csv():
             'verified_at': verified.isoformat() + 'Z',
             'verified_by': '',
             'verification_method': 'edu_email',
-            'edu_email': data['name'].lower().replace(' ', '.') + '@' + data['current_college'].lower().replace(' ', '').replace('university', '') + '.edu',
+            'edu_email': scaled_email(data['name'].lower().replace(' ', '.') + '@' + data['current_college'].lower().replace(' ', '').replace('university', '') + '.edu', block),
             'auto_verified': 'true',
             'is_available': 'false' if data.get('vacation_mode') else 'true',
             'vacation_mode': 'true' if data.get('vacation_mode') else 'false',
@@ -424,24 +798,19 @@ def update_consultants_csv():
             'created_at': created.isoformat() + 'Z',
             'updated_at': created.isoformat() + 'Z'
         }
-        consultants.append(consultant)
-    
-    # Write CSV
-    with open('consultants.csv', 'w', newline='') as f:
-        fieldnames = ['id', 'name', 'bio', 'long_bio', 'current_college', 'colleges_attended', 
-                     'major', 'graduation_year', 'verification_status', 'verified_at', 'verified_by',
-                     'verification_method', 'edu_email', 'auto_verified', 'is_available', 
-                     'vacation_mode', 'vacation_message', 'services_preview', 'supports_rush_delivery',
-                     'rush_multipliers', 'rating', 'total_reviews', 'total_bookings', 'total_earnings',
-                     'response_time_hours', 'timezone', 'calendly_url', 'profile_views', 'last_active',
-                     'metadata', 'created_at', 'updated_at']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(consultants)
+        yield consultant
 
-def update_students_csv():
-    students = []
-    
+def update_consultants_csv():
+    fieldnames = ['id', 'name', 'bio', 'long_bio', 'current_college', 'colleges_attended', 
+                  'major', 'graduation_year', 'verification_status', 'verified_at', 'verified_by',
+                  'verification_method', 'edu_email', 'auto_verified', 'is_available', 
+                  'vacation_mode', 'vacation_message', 'services_preview', 'supports_rush_delivery',
+                  'rush_multipliers', 'rating', 'total_reviews', 'total_bookings', 'total_earnings',
+                  'response_time_hours', 'timezone', 'calendly_url', 'profile_views', 'last_active',
+                  'metadata', 'created_at', 'updated_at']
+    write_table('consultants', fieldnames, generate_consultants_rows(shard_rng('consultants', 0)))
+
+def generate_students_rows(rng=random):
     # First 10 students with detailed profiles
     detailed_students = [
         {
@@ -451,9 +820,9 @@ def update_students_csv():
             'school_type': 'high-school',
             'grade_level': 'senior',
             'target_application_year': 2025,
-            'preferred_colleges': '{MIT,Stanford,"Carnegie Mellon","UC Berkeley"}',
-            'interests': '{"Computer Science","AI/ML",Robotics}',
-            'pain_points': '{"Technical interview prep","Research experience"}',
+            'preferred_colleges': ['MIT', 'Stanford', 'Carnegie Mellon', 'UC Berkeley'],
+            'interests': ['Computer Science', 'AI/ML', 'Robotics'],
+            'pain_points': ['Technical interview prep', 'Research experience'],
             'budget_range': '[50,150]',
             'credit_balance': 25.60,
             'lifetime_credits_earned': 156.40
@@ -465,9 +834,9 @@ def update_students_csv():
             'school_type': 'high-school',
             'grade_level': 'senior',
             'target_application_year': 2025,
-            'preferred_colleges': '{Harvard,"Johns Hopkins",Stanford,Yale}',
-            'interests': '{Medicine,Biology,"Public Health"}',
-            'pain_points': '{"MCAT prep","Research opportunities"}',
+            'preferred_colleges': ['Harvard', 'Johns Hopkins', 'Stanford', 'Yale'],
+            'interests': ['Medicine', 'Biology', 'Public Health'],
+            'pain_points': ['MCAT prep', 'Research opportunities'],
             'budget_range': '[75,200]',
             'credit_balance': 48.75,
             'lifetime_credits_earned': 234.80
@@ -479,9 +848,9 @@ def update_students_csv():
             'school_type': 'high-school',
             'grade_level': 'senior',
             'target_application_year': 2025,
-            'preferred_colleges': '{Wharton,Harvard,Stanford,"MIT Sloan"}',
-            'interests': '{Business,Entrepreneurship,Finance}',
-            'pain_points': '{"Business plan development","Leadership experience"}',
+            'preferred_colleges': ['Wharton', 'Harvard', 'Stanford', 'MIT Sloan'],
+            'interests': ['Business', 'Entrepreneurship', 'Finance'],
+            'pain_points': ['Business plan development', 'Leadership experience'],
             'budget_range': '[40,120]',
             'credit_balance': 15.20,
             'lifetime_credits_earned': 98.60
@@ -493,9 +862,9 @@ def update_students_csv():
             'school_type': 'high-school',
             'grade_level': 'senior',
             'target_application_year': 2025,
-            'preferred_colleges': '{Yale,Columbia,Brown,Northwestern}',
-            'interests': '{"Creative Writing",Journalism,Literature}',
-            'pain_points': '{"Portfolio development","Essay crafting"}',
+            'preferred_colleges': ['Yale', 'Columbia', 'Brown', 'Northwestern'],
+            'interests': ['Creative Writing', 'Journalism', 'Literature'],
+            'pain_points': ['Portfolio development', 'Essay crafting'],
             'budget_range': '[30,80]',
             'credit_balance': 22.40,
             'lifetime_credits_earned': 142.30
@@ -507,9 +876,9 @@ def update_students_csv():
             'school_type': 'high-school',
             'grade_level': 'senior',
             'target_application_year': 2025,
-            'preferred_colleges': '{MIT,Caltech,Stanford,"Georgia Tech"}',
-            'interests': '{"Aerospace Engineering",Robotics,Physics}',
-            'pain_points': '{"Research experience","Competition prep"}',
+            'preferred_colleges': ['MIT', 'Caltech', 'Stanford', 'Georgia Tech'],
+            'interests': ['Aerospace Engineering', 'Robotics', 'Physics'],
+            'pain_points': ['Research experience', 'Competition prep'],
             'budget_range': '[60,180]',
             'credit_balance': 38.90,
             'lifetime_credits_earned': 189.50
@@ -521,9 +890,9 @@ def update_students_csv():
             'school_type': 'high-school',
             'grade_level': 'senior',
             'target_application_year': 2025,
-            'preferred_colleges': '{Harvard,Yale,Princeton,Brown}',
-            'interests': '{History,Philosophy,"Political Science"}',
-            'pain_points': '{"Essay help","Interview prep"}',
+            'preferred_colleges': ['Harvard', 'Yale', 'Princeton', 'Brown'],
+            'interests': ['History', 'Philosophy', 'Political Science'],
+            'pain_points': ['Essay help', 'Interview prep'],
             'budget_range': '[40,100]',
             'credit_balance': 12.80,
             'lifetime_credits_earned': 78.40
@@ -535,9 +904,9 @@ def update_students_csv():
             'school_type': 'high-school',
             'grade_level': 'senior',
             'target_application_year': 2025,
-            'preferred_colleges': '{Harvard,Yale,Columbia,NYU}',
-            'interests': '{Pre-law,"Political Science",Philosophy}',
-            'pain_points': '{"LSAT prep","Debate coaching"}',
+            'preferred_colleges': ['Harvard', 'Yale', 'Columbia', 'NYU'],
+            'interests': ['Pre-law', 'Political Science', 'Philosophy'],
+            'pain_points': ['LSAT prep', 'Debate coaching'],
             'budget_range': '[50,150]',
             'credit_balance': 8.60,
             'lifetime_credits_earned': 52.30
@@ -549,9 +918,9 @@ def update_students_csv():
             'school_type': 'high-school',
             'grade_level': 'senior',
             'target_application_year': 2025,
-            'preferred_colleges': '{RISD,Parsons,Yale,"Cooper Union"}',
-            'interests': '{"Fine Arts",Design,Architecture}',
-            'pain_points': '{"Portfolio review","Creative supplements"}',
+            'preferred_colleges': ['RISD', 'Parsons', 'Yale', 'Cooper Union'],
+            'interests': ['Fine Arts', 'Design', 'Architecture'],
+            'pain_points': ['Portfolio review', 'Creative supplements'],
             'budget_range': '[35,90]',
             'credit_balance': 6.40,
             'lifetime_credits_earned': 38.20
@@ -563,9 +932,9 @@ def update_students_csv():
             'school_type': 'high-school',
             'grade_level': 'junior',
             'target_application_year': 2026,
-            'preferred_colleges': '{Stanford,"UC Berkeley",UCLA}',
-            'interests': '{"Computer Science","Data Science"}',
-            'pain_points': '{"Early planning","Course selection"}',
+            'preferred_colleges': ['Stanford', 'UC Berkeley', 'UCLA'],
+            'interests': ['Computer Science', 'Data Science'],
+            'pain_points': ['Early planning', 'Course selection'],
             'budget_range': '[30,80]',
             'credit_balance': 3.20,
             'lifetime_credits_earned': 12.40
@@ -577,43 +946,15 @@ def update_students_csv():
             'school_type': 'college',
             'grade_level': 'transfer',
             'target_application_year': 2025,
-            'preferred_colleges': '{"UC Berkeley",UCLA,USC,Stanford}',
-            'interests': '{Psychology,Neuroscience}',
-            'pain_points': '{"Transfer essays","GPA improvement"}',
+            'preferred_colleges': ['UC Berkeley', 'UCLA', 'USC', 'Stanford'],
+            'interests': ['Psychology', 'Neuroscience'],
+            'pain_points': ['Transfer essays', 'GPA improvement'],
             'budget_range': '[40,100]',
             'credit_balance': 2.80,
             'lifetime_credits_earned': 8.90
         }
     ]
     
-    # First add detailed students
-    for i, data in enumerate(detailed_students):
-        old_id = f's{str(i//10)*7}-{str(i//10)*4}-{str(i//10)*4}-{str(i//10)*4}-{str(i//10)*12}{i%10}'
-        new_id = student_uuids[old_id]
-        created = datetime.now() - timedelta(days=50-i)
-        
-        student = {
-            'id': new_id,
-            'name': data['name'],
-            'bio': data['bio'],
-            'current_school': data['current_school'],
-            'school_type': data['school_type'],
-            'grade_level': data['grade_level'],
-            'target_application_year': data['target_application_year'],
-            'preferred_colleges': data['preferred_colleges'],
-            'interests': data['interests'],
-            'pain_points': data['pain_points'],
-            'budget_range': data['budget_range'],
-            'credit_balance': data['credit_balance'],
-            'lifetime_credits_earned': data['lifetime_credits_earned'],
-            'onboarding_completed': 'true',
-            'onboarding_step': 0,
-            'metadata': '{}',
-            'created_at': created.isoformat() + 'Z',
-            'updated_at': created.isoformat() + 'Z'
-        }
-        students.append(student)
-    
     # Add remaining 40 students with basic profiles
     names = ['Lucas Thomas', 'Charlotte Jackson', 'Aiden White', 'Amelia Harris', 'Henry Martin',
              'Evelyn Thompson', 'Benjamin Clark', 'Harper Lewis', 'Jack Robinson', 'Luna Walker',
@@ -624,46 +965,75 @@ def update_students_csv():
              'Ezra Stewart', 'Ivy Sanchez', 'Kai Morris', 'Elena Rogers', 'Miles Reed',
              'Maya Cook', 'Felix Morgan', 'Claire Bell', 'Jackson White', 'Isabella Chen']
     
-    for i in range(10, 50):
-        old_id = f's{str(i//10)*7}-{str(i//10)*4}-{str(i//10)*4}-{str(i//10)*4}-{str(i//10)*12}{i%10}'
-        new_id = student_uuids[old_id]
-        created = datetime.now() - timedelta(days=50-i)
+    # Every block of 50 students repeats the hand-curated profiles
+    for block in range(block_count('students', 50)):
+        # First add detailed students
+        for template, data in enumerate(detailed_students):
+            i = block * 50 + template
+            if i >= row_counts['students']:
+                break
+            new_id = student_ids[i]
+            created = user_created_at('students', i)
         
-        student = {
-            'id': new_id,
-            'name': names[i-10] if i-10 < len(names) else f'Student {i}',
-            'bio': 'High school student preparing for college applications',
-            'current_school': 'Regional High School',
-            'school_type': 'high-school',
-            'grade_level': 'senior',
-            'target_application_year': 2025,
-            'preferred_colleges': '{"State Universities"}',
-            'interests': '{"General Studies"}',
-            'pain_points': '{}',
-            'budget_range': '[30,80]',
-            'credit_balance': round(random.uniform(0, 10), 2),
-            'lifetime_credits_earned': round(random.uniform(0, 50), 2),
-            'onboarding_completed': 'true',
-            'onboarding_step': 0,
-            'metadata': '{}',
-            'created_at': created.isoformat() + 'Z',
-            'updated_at': created.isoformat() + 'Z'
-        }
-        students.append(student)
+            student = {
+                'id': new_id,
+                'name': data['name'],
+                'bio': data['bio'],
+                'current_school': data['current_school'],
+                'school_type': data['school_type'],
+                'grade_level': data['grade_level'],
+                'target_application_year': data['target_application_year'],
+                'preferred_colleges': data['preferred_colleges'],
+                'interests': data['interests'],
+                'pain_points': data['pain_points'],
+                'budget_range': data['budget_range'],
+                'credit_balance': data['credit_balance'],
+                'lifetime_credits_earned': data['lifetime_credits_earned'],
+                'onboarding_completed': 'true',
+                'onboarding_step': 0,
+                'metadata': '{}',
+                'created_at': created.isoformat() + 'Z',
+                'updated_at': created.isoformat() + 'Z'
+            }
+            yield student
     
-    # Write CSV
-    with open('students.csv', 'w', newline='') as f:
-        fieldnames = ['id', 'name', 'bio', 'current_school', 'school_type', 'grade_level',
-                     'target_application_year', 'preferred_colleges', 'interests', 'pain_points',
-                     'budget_range', 'credit_balance', 'lifetime_credits_earned', 
-                     'onboarding_completed', 'onboarding_step', 'metadata', 'created_at', 'updated_at']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(students)
+        for template in range(10, 50):
+            i = block * 50 + template
+            if i >= row_counts['students']:
+                break
+            new_id = student_ids[i]
+            created = user_created_at('students', i)
+        
+            student = {
+                'id': new_id,
+                'name': names[template-10] if template-10 < len(names) else f'Student {template}',
+                'bio': 'High school student preparing for college applications',
+                'current_school': 'Regional High School',
+                'school_type': 'high-school',
+                'grade_level': 'senior',
+                'target_application_year': 2025,
+                'preferred_colleges': ['State Universities'],
+                'interests': ['General Studies'],
+                'pain_points': [],
+                'budget_range': '[30,80]',
+                'credit_balance': round(rng.uniform(0, 10), 2),
+                'lifetime_credits_earned': round(rng.uniform(0, 50), 2),
+                'onboarding_completed': 'true',
+                'onboarding_step': 0,
+                'metadata': '{}',
+                'created_at': created.isoformat() + 'Z',
+                'updated_at': created.isoformat() + 'Z'
+            }
+            yield student
 
-def update_services_csv():
-    services = []
-    
+def update_students_csv():
+    fieldnames = ['id', 'name', 'bio', 'current_school', 'school_type', 'grade_level',
+                  'target_application_year', 'preferred_colleges', 'interests', 'pain_points',
+                  'budget_range', 'credit_balance', 'lifetime_credits_earned', 
+                  'onboarding_completed', 'onboarding_step', 'metadata', 'created_at', 'updated_at']
+    write_table('students', fieldnames, generate_students_rows(shard_rng('students', 0)))
+
+def generate_services_rows():
     # Define services for each consultant
     services_data = [
         # Sarah Chen's services
@@ -674,8 +1044,8 @@ def update_services_csv():
                     'service_type': 'essay_review',
                     'title': 'Comprehensive Essay Review',
                     'description': 'In-depth review of your college essays with line-by-line feedback, structural suggestions, and content recommendations',
-                    'prices': '{45,75,120}',
-                    'price_descriptions': '{"Single Essay","2-3 Essays","Full Application"}',
+                    'prices': [45, 75, 120],
+                    'price_descriptions': ['Single Essay', '2-3 Essays', 'Full Application'],
                     'delivery_type': 'async',
                     'standard_turnaround_hours': 48,
                     'total_bookings': 68,
@@ -685,8 +1055,8 @@ def update_services_csv():
                     'service_type': 'mock_interview',
                     'title': 'Elite College Interview Prep',
                     'description': '1-hour mock interview with Harvard interviewer experience',
-                    'prices': '{85}',
-                    'price_descriptions': '{"60 Minutes"}',
+                    'prices': [85],
+                    'price_descriptions': ['60 Minutes'],
                     'delivery_type': 'scheduled',
                     'duration_minutes': 60,
                     'rush_available': False,
@@ -697,8 +1067,8 @@ def update_services_csv():
                     'service_type': 'application_strategy',
                     'title': 'Full Application Strategy Session',
                     'description': 'Comprehensive review of your entire application strategy',
-                    'prices': '{150}',
-                    'price_descriptions': '{"90 Minutes"}',
+                    'prices': [150],
+                    'price_descriptions': ['90 Minutes'],
                     'delivery_type': 'scheduled',
                     'duration_minutes': 90,
                     'rush_available': False,
@@ -709,8 +1079,8 @@ def update_services_csv():
                     'service_type': 'school_list_help',
                     'title': 'School Selection Consultation',
                     'description': 'Personalized school list based on your profile and goals',
-                    'prices': '{65}',
-                    'price_descriptions': '{"Standard"}',
+                    'prices': [65],
+                    'price_descriptions': ['Standard'],
                     'delivery_type': 'async',
                     'standard_turnaround_hours': 24,
                     'total_bookings': 10,
@@ -726,8 +1096,8 @@ def update_services_csv():
                     'service_type': 'resume_help',
                     'title': 'Tech Resume Optimization',
                     'description': 'ATS-optimized resume for FAANG and tech companies',
-                    'prices': '{40,65}',
-                    'price_descriptions': '{"Review Only","Full Rewrite"}',
+                    'prices': [40, 65],
+                    'price_descriptions': ['Review Only', 'Full Rewrite'],
                     'delivery_type': 'async',
                     'standard_turnaround_hours': 24,
                     'total_bookings': 45,
@@ -737,8 +1107,8 @@ def update_services_csv():
                     'service_type': 'mock_interview',
                     'title': 'Technical Interview Coaching',
                     'description': 'Leetcode-style interview with ex-Google intern',
-                    'prices': '{95,140}',
-                    'price_descriptions': '{"1 Hour","1.5 Hours"}',
+                    'prices': [95, 140],
+                    'price_descriptions': ['1 Hour', '1.5 Hours'],
                     'delivery_type': 'scheduled',
                     'duration_minutes': 60,
                     'rush_available': False,
@@ -751,8 +1121,8 @@ def update_services_csv():
                     'service_type': 'coding_help',
                     'title': 'CS Project Review',
                     'description': 'Portfolio and GitHub profile optimization',
-                    'prices': '{55}',
-                    'price_descriptions': '{"Standard"}',
+                    'prices': [55],
+                    'price_descriptions': ['Standard'],
                     'delivery_type': 'async',
                     'standard_turnaround_hours': 48,
                     'total_bookings': 15,
@@ -768,8 +1138,8 @@ def update_services_csv():
                     'service_type': 'sat_tutoring',
                     'title': 'SAT Math Intensive',
                     'description': 'Personalized SAT math prep from perfect scorer',
-                    'prices': '{65,95}',
-                    'price_descriptions': '{"1 Hour","1.5 Hours"}',
+                    'prices': [65, 95],
+                    'price_descriptions': ['1 Hour', '1.5 Hours'],
                     'delivery_type': 'scheduled',
                     'duration_minutes': 60,
                     'rush_available': False,
@@ -782,8 +1152,8 @@ def update_services_csv():
                     'service_type': 'sat_tutoring',
                     'title': 'SAT Full Test Strategy',
                     'description': 'Complete SAT strategy session with practice test review',
-                    'prices': '{120}',
-                    'price_descriptions': '{"2 Hours"}',
+                    'prices': [120],
+                    'price_descriptions': ['2 Hours'],
                     'delivery_type': 'scheduled',
                     'duration_minutes': 120,
                     'rush_available': False,
@@ -794,8 +1164,8 @@ def update_services_csv():
                     'service_type': 'application_help',
                     'title': 'STEM Application Review',
                     'description': 'MIT student reviews your STEM applications',
-                    'prices': '{50,80}',
-                    'price_descriptions': '{"Single School","Multiple Schools"}',
+                    'prices': [50, 80],
+                    'price_descriptions': ['Single School', 'Multiple Schools'],
                     'delivery_type': 'async',
                     'standard_turnaround_hours': 72,
                     'total_bookings': 28,
@@ -805,8 +1175,8 @@ def update_services_csv():
                     'service_type': 'essay_review',
                     'title': 'STEM Essay Excellence',
                     'description': 'Technical essay review for engineering applicants',
-                    'prices': '{40,65}',
-                    'price_descriptions': '{"Quick Review","Deep Dive"}',
+                    'prices': [40, 65],
+                    'price_descriptions': ['Quick Review', 'Deep Dive'],
                     'delivery_type': 'async',
                     'standard_turnaround_hours': 48,
                     'total_bookings': 18,
@@ -826,8 +1196,8 @@ def update_services_csv():
                     'service_type': 'essay_review',
                     'title': 'Literary Essay Analysis',
                     'description': 'Yale English major perfects your essays',
-                    'prices': '{55,85,120}',
-                    'price_descriptions': '{"Basic","Standard","Premium"}',
+                    'prices': [55, 85, 120],
+                    'price_descriptions': ['Basic', 'Standard', 'Premium'],
                     'delivery_type': 'async',
                     'standard_turnaround_hours': 48,
                     'total_bookings': 52,
@@ -838,8 +1208,8 @@ def update_services_csv():
                     'service_type': 'school_specific_advice',
                     'title': 'Ivy League Insider Tips',
                     'description': 'Former admissions reader shares secrets',
-                    'prices': '{75}',
-                    'price_descriptions': '{"60 Minutes"}',
+                    'prices': [75],
+                    'price_descriptions': ['60 Minutes'],
                     'delivery_type': 'scheduled',
                     'duration_minutes': 60,
                     'rush_available': False,
@@ -857,8 +1227,8 @@ def update_services_csv():
                     'service_type': 'test_prep',
                     'title': 'MCAT Comprehensive Prep',
                     'description': '524 scorer teaches MCAT strategy',
-                    'prices': '{85,125}',
-                    'price_descriptions': '{"2 Hours","3 Hours"}',
+                    'prices': [85, 125],
+                    'price_descriptions': ['2 Hours', '3 Hours'],
                     'delivery_type': 'scheduled',
                     'duration_minutes': 120,
                     'rush_available': False,
@@ -871,8 +1241,8 @@ def update_services_csv():
                     'service_type': 'application_help',
                     'title': 'Medical School Application Review',
                     'description': 'Complete med school application guidance',
-                    'prices': '{65,95}',
-                    'price_descriptions': '{"Primary App","Primary + Secondaries"}',
+                    'prices': [65, 95],
+                    'price_descriptions': ['Primary App', 'Primary + Secondaries'],
                     'delivery_type': 'async',
                     'standard_turnaround_hours': 72,
                     'total_bookings': 18,
@@ -882,8 +1252,8 @@ def update_services_csv():
                     'service_type': 'mock_interview',
                     'title': 'Medical School Interview Prep',
                     'description': 'MMI and traditional interview practice',
-                    'prices': '{90}',
-                    'price_descriptions': '{"90 Minutes"}',
+                    'prices': [90],
+                    'price_descriptions': ['90 Minutes'],
                     'delivery_type': 'scheduled',
                     'duration_minutes': 90,
                     'rush_available': False,
@@ -915,95 +1285,98 @@ def update_services_csv():
         ('c8888888-8888-8888-8888-888888888881', 'essay_review', 'Creative Writing Excellence', 50, 2, 4.90)
     ]
     
-    # Process all services
-    for data in all_services_data:
-        consultant_new_id = consultant_uuids[data['consultant_old_id']]
+    # Every block of consultants gets the hand-curated service catalog
+    consultant_services.clear()
+    for block in range(block_count('consultants', len(consultant_old_ids))):
+        # Process all services
+        for data in all_services_data:
+            if not in_consultant_block(data['consultant_old_id'], block):
+                continue
+            consultant = block * len(consultant_old_ids) + consultant_index[data['consultant_old_id']]
+            consultant_old_id = scaled_old_id(data['consultant_old_id'], block)
+            consultant_new_id = consultant_ids[consultant]
         
-        for i, service in enumerate(data['services']):
-            service_id = str(uuid.uuid4())
-            service_uuids[f"{data['consultant_old_id']}-{i}"] = service_id
-            
-            if data['consultant_old_id'] not in service_map:
-                service_map[data['consultant_old_id']] = []
-            service_map[data['consultant_old_id']].append(service_id)
-            
-            created = datetime.now() - timedelta(days=45-i)
+            for i, service in enumerate(data['services']):
+                created = reference_time - timedelta(days=45-i)
+                service_id = new_uuid('services', f'{consultant_old_id}-{i}', created)
+                consultant_services.append(consultant, service_id)
             
+                service_obj = {
+                    'id': service_id,
+                    'consultant_id': consultant_new_id,
+                    'service_type': service['service_type'],
+                    'title': service['title'],
+                    'description': service['description'],
+                    'prices': service['prices'],
+                    'price_descriptions': service['price_descriptions'],
+                    'delivery_type': service['delivery_type'],
+                    'standard_turnaround_hours': service.get('standard_turnaround_hours', ''),
+                    'duration_minutes': service.get('duration_minutes', ''),
+                    'rush_available': 'true' if service.get('rush_available', True) else 'false',
+                    'rush_turnarounds': '{"1.5x": 24, "2x": 12, "3x": 6}' if service.get('rush_available', True) else '{}',
+                    'max_active_orders': 5,
+                    'is_active': 'false' if service.get('is_active') == False else 'true',
+                    'allows_group_sessions': 'true' if service.get('allows_group_sessions') else 'false',
+                    'max_group_size': service.get('max_group_size', 1),
+                    'total_bookings': service['total_bookings'],
+                    'avg_rating': service['avg_rating'],
+                    'metadata': '{}',
+                    'created_at': created.isoformat() + 'Z',
+                    'updated_at': created.isoformat() + 'Z'
+                }
+                yield service_obj
+    
+        # Add remaining services
+        for i, (consultant_old_id, service_type, title, base_price, bookings, rating) in enumerate(remaining_consultants):
+            if not in_consultant_block(consultant_old_id, block):
+                continue
+            consultant = block * len(consultant_old_ids) + consultant_index[consultant_old_id]
+            consultant_old_id = scaled_old_id(consultant_old_id, block)
+            consultant_new_id = consultant_ids[consultant]
+            created = reference_time - timedelta(days=40-i)
+            service_id = new_uuid('services', f'{consultant_old_id}-r{i}', created)
+            consultant_services.append(consultant, service_id)
+        
             service_obj = {
                 'id': service_id,
                 'consultant_id': consultant_new_id,
-                'service_type': service['service_type'],
-                'title': service['title'],
-                'description': service['description'],
-                'prices': service['prices'],
-                'price_descriptions': service['price_descriptions'],
-                'delivery_type': service['delivery_type'],
-                'standard_turnaround_hours': service.get('standard_turnaround_hours', ''),
-                'duration_minutes': service.get('duration_minutes', ''),
-                'rush_available': 'true' if service.get('rush_available', True) else 'false',
-                'rush_turnarounds': '{"1.5x": 24, "2x": 12, "3x": 6}' if service.get('rush_available', True) else '{}',
+                'service_type': service_type,
+                'title': title,
+                'description': f'{title} service description',
+                'prices': [base_price],
+                'price_descriptions': ['Standard'],
+                'delivery_type': 'scheduled' if 'interview' in title.lower() or 'coaching' in title.lower() else 'async',
+                'standard_turnaround_hours': 48 if 'async' in service_obj.get('delivery_type', 'async') else '',
+                'duration_minutes': 60 if 'scheduled' in service_obj.get('delivery_type', 'async') else '',
+                'rush_available': 'true' if 'async' in service_obj.get('delivery_type', 'async') else 'false',
+                'rush_turnarounds': '{"1.5x": 24, "2x": 12, "3x": 6}' if 'async' in service_obj.get('delivery_type', 'async') else '{}',
                 'max_active_orders': 5,
-                'is_active': 'false' if service.get('is_active') == False else 'true',
-                'allows_group_sessions': 'true' if service.get('allows_group_sessions') else 'false',
-                'max_group_size': service.get('max_group_size', 1),
-                'total_bookings': service['total_bookings'],
-                'avg_rating': service['avg_rating'],
+                'is_active': 'true',
+                'allows_group_sessions': 'true' if 'workshop' in title.lower() or 'coaching' in title.lower() else 'false',
+                'max_group_size': 8 if 'workshop' in title.lower() else 4 if 'coaching' in title.lower() else 1,
+                'total_bookings': bookings,
+                'avg_rating': rating,
                 'metadata': '{}',
                 'created_at': created.isoformat() + 'Z',
                 'updated_at': created.isoformat() + 'Z'
             }
-            services.append(service_obj)
+            yield service_obj
     
-    # Add remaining services
-    for i, (consultant_old_id, service_type, title, base_price, bookings, rating) in enumerate(remaining_consultants):
-        service_id = str(uuid.uuid4())
-        consultant_new_id = consultant_uuids[consultant_old_id]
-        
-        if consultant_old_id not in service_map:
-            service_map[consultant_old_id] = []
-        service_map[consultant_old_id].append(service_id)
-        
-        created = datetime.now() - timedelta(days=40-i)
-        
-        service_obj = {
-            'id': service_id,
-            'consultant_id': consultant_new_id,
-            'service_type': service_type,
-            'title': title,
-            'description': f'{title} service description',
-            'prices': f'{{{base_price}}}',
-            'price_descriptions': '{"Standard"}',
-            'delivery_type': 'scheduled' if 'interview' in title.lower() or 'coaching' in title.lower() else 'async',
-            'standard_turnaround_hours': 48 if 'async' in service_obj.get('delivery_type', 'async') else '',
-            'duration_minutes': 60 if 'scheduled' in service_obj.get('delivery_type', 'async') else '',
-            'rush_available': 'true' if 'async' in service_obj.get('delivery_type', 'async') else 'false',
-            'rush_turnarounds': '{"1.5x": 24, "2x": 12, "3x": 6}' if 'async' in service_obj.get('delivery_type', 'async') else '{}',
-            'max_active_orders': 5,
-            'is_active': 'true',
-            'allows_group_sessions': 'true' if 'workshop' in title.lower() or 'coaching' in title.lower() else 'false',
-            'max_group_size': 8 if 'workshop' in title.lower() else 4 if 'coaching' in title.lower() else 1,
-            'total_bookings': bookings,
-            'avg_rating': rating,
-            'metadata': '{}',
-            'created_at': created.isoformat() + 'Z',
-            'updated_at': created.isoformat() + 'Z'
-        }
-        services.append(service_obj)
-    
-    # Write CSV
-    with open('services.csv', 'w', newline='') as f:
-        fieldnames = ['id', 'consultant_id', 'service_type', 'title', 'description', 'prices',
-                     'price_descriptions', 'delivery_type', 'standard_turnaround_hours',
-                     'duration_minutes', 'rush_available', 'rush_turnarounds', 'max_active_orders',
-                     'is_active', 'allows_group_sessions', 'max_group_size', 'total_bookings',
-                     'avg_rating', 'metadata', 'created_at', 'updated_at']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(services)
+    consultant_services.index(row_counts['consultants'])
 
-def update_bookings_csv():
-    bookings = []
-    
+def update_services_csv():
+    fieldnames = ['id', 'consultant_id', 'service_type', 'title', 'description', 'prices',
+                  'price_descriptions', 'delivery_type', 'standard_turnaround_hours',
+                  'duration_minutes', 'rush_available', 'rush_turnarounds', 'max_active_orders',
+                  'is_active', 'allows_group_sessions', 'max_group_size', 'total_bookings',
+                  'avg_rating', 'metadata', 'created_at', 'updated_at']
+    write_table('services', fieldnames, generate_services_rows())
+
+def consultants_without_services():
+    """Consultants the bookings generators skip, as they have nothing to book."""
+    return sum(1 for consultant in range(len(consultant_ids)) if not consultant_services.first(consultant))
+
+def generate_bookings_rows(start=0, stop=None, rng=random):
     # Sample bookings
     booking_templates = [
         {
@@ -1035,113 +1408,122 @@ def update_bookings_csv():
         }
     ]
     
+    consultant_count = len(consultant_ids)
+    consultant_sampler = popularity_sampler('consultants', bookable=True)
+    student_sampler = popularity_sampler('students')
+    
     # Generate more bookings
-    for i in range(50):
-        booking_id = str(uuid.uuid4())
-        booking_uuids[f'b{i}'] = booking_id
-        
-        # Randomly select student and consultant
-        student_idx = i % 10
-        student_old_id = f's{str(student_idx//10)*7}-{str(student_idx//10)*4}-{str(student_idx//10)*4}-{str(student_idx//10)*4}-{str(student_idx//10)*12}{student_idx%10}'
-        student_new_id = student_uuids[student_old_id]
+    stop = row_counts['bookings'] if stop is None else stop
+    for batch in batches(start, stop):
+        # Status follows the position on the timeline, and with it which of
+        # the delivery and review timestamps a booking has
+        positions = [base_ordinal(i, 'bookings') for i in batch]
+        created_us = [offset_us(days=position-40) for position in positions]
+        completed_us = [created + 2*DAY_US if position < 20 else None
+                        for created, position in zip(created_us, positions)]
+        created_at = format_timestamps(created_us)
+        promised_at = format_timestamps([created + 2*DAY_US if position < 25 else None
+                                         for created, position in zip(created_us, positions)])
+        delivered_at = format_timestamps([created + DAY_US if position < 20 else None
+                                          for created, position in zip(created_us, positions)])
+        completed_at = format_timestamps(completed_us)
+        reviewed_at = format_timestamps([completed + 12*HOUR_US if completed is not None else None
+                                         for completed in completed_us])
         
-        consultant_old_id = list(consultant_uuids.keys())[i % len(consultant_uuids)]
-        consultant_new_id = consultant_uuids[consultant_old_id]
-        
-        # Get a service for this consultant
-        if consultant_old_id in service_map and service_map[consultant_old_id]:
-            service_id = service_map[consultant_old_id][0]
-        else:
-            continue
-        
-        created = datetime.now() - timedelta(days=40-i)
-        
-        # Determine status
-        if i < 20:
-            status = 'completed'
-            completed_at = created + timedelta(days=2)
-            delivered_at = created + timedelta(days=1)
-            rating = random.choice([4, 5, 5, 5])
-            review_text = random.choice([
-                'Great experience working with this consultant!',
-                'Excellent feedback and very helpful.',
-                'Transformed my application completely!',
-                'Worth every penny. Highly recommend!'
-            ])
-            reviewed_at = completed_at + timedelta(hours=12)
-        elif i < 25:
-            status = 'in_progress'
-            completed_at = ''
-            delivered_at = ''
-            rating = ''
-            review_text = ''
-            reviewed_at = ''
-        elif i < 30:
-            status = 'confirmed'
-            completed_at = ''
-            delivered_at = ''
-            rating = ''
-            review_text = ''
-            reviewed_at = ''
-        else:
-            status = 'pending'
-            completed_at = ''
-            delivered_at = ''
-            rating = ''
-            review_text = ''
-            reviewed_at = ''
-        
-        base_price = random.choice([45, 60, 75, 85, 95, 120])
-        rush_multiplier = 1.5 if random.random() < 0.15 else 1
-        final_price = base_price * rush_multiplier
-        credits_earned = final_price * 0.02
-        
-        booking = {
-            'id': booking_id,
-            'student_id': student_new_id,
-            'consultant_id': consultant_new_id,
-            'service_id': service_id,
-            'base_price': base_price,
-            'price_tier': '',
-            'rush_multiplier': rush_multiplier,
-            'discount_code': '',
-            'discount_amount': '',
-            'final_price': final_price,
-            'prompt_text': 'Booking request for service',
-            'essay_text': '',
-            'requirements_text': '',
-            'google_doc_link': '',
-            'uploaded_files': '{}',
-            'is_rush': 'true' if rush_multiplier > 1 else 'false',
-            'promised_delivery_at': (created + timedelta(days=2)).isoformat() + 'Z' if status in ['completed', 'in_progress'] else '',
-            'delivered_at': delivered_at.isoformat() + 'Z' if delivered_at else '',
-            'deliverables': '{}',
-            'scheduled_at': '',
-            'calendly_event_url': '',
-            'meeting_link': '',
-            'status': status,
-            'completed_at': completed_at.isoformat() + 'Z' if completed_at else '',
-            'cancelled_at': '',
-            'cancelled_by': '',
-            'cancellation_reason': '',
-            'credits_earned': credits_earned if status == 'completed' else 0,
-            'rating': rating,
-            'review_text': review_text,
-            'reviewed_at': reviewed_at.isoformat() + 'Z' if reviewed_at else '',
-            'is_group_session': 'false',
-            'max_participants': 1,
-            'current_participants': 1,
-            'refund_requested': 'false',
-            'refund_reason': '',
-            'refund_status': '',
-            'refund_amount': '',
-            'refunded_at': '',
-            'metadata': '{}',
-            'created_at': created.isoformat() + 'Z',
-            'updated_at': created.isoformat() + 'Z'
-        }
-        bookings.append(booking)
+        for j, i in enumerate(batch):
+            # Select student and consultant, round robin unless they have a popularity model
+            if student_sampler:
+                student_idx = student_sampler.draw(rng)
+            else:
+                student_idx = (i % 10 + 50 * (i // 50)) % row_counts['students']
+            student_new_id = student_ids[student_idx]
+            
+            consultant = consultant_sampler.draw(rng) if consultant_sampler else i % consultant_count
+            consultant_new_id = consultant_ids[consultant]
+            
+            # Get a service for this consultant
+            service_id = consultant_services.first(consultant)
+            if not service_id:
+                continue
+            
+            position = positions[j]
+            booking_id = new_uuid('bookings', i, reference_unix_ms(created_us[j]))
+            
+            # Determine status
+            if position < 20:
+                status = 'completed'
+                rating = rng.choice([4, 5, 5, 5])
+                review_text = rng.choice([
+                    'Great experience working with this consultant!',
+                    'Excellent feedback and very helpful.',
+                    'Transformed my application completely!',
+                    'Worth every penny. Highly recommend!'
+                ])
+            elif position < 25:
+                status = 'in_progress'
+                rating = ''
+                review_text = ''
+            elif position < 30:
+                status = 'confirmed'
+                rating = ''
+                review_text = ''
+            else:
+                status = 'pending'
+                rating = ''
+                review_text = ''
+            
+            base_price = rng.choice([45, 60, 75, 85, 95, 120])
+            rush_multiplier = 1.5 if rng.random() < 0.15 else 1
+            final_price = base_price * rush_multiplier
+            credits_earned = final_price * 0.02
+            
+            booking = {
+                'id': booking_id,
+                'student_id': student_new_id,
+                'consultant_id': consultant_new_id,
+                'service_id': service_id,
+                'base_price': base_price,
+                'price_tier': '',
+                'rush_multiplier': rush_multiplier,
+                'discount_code': '',
+                'discount_amount': '',
+                'final_price': final_price,
+                'prompt_text': 'Booking request for service',
+                'essay_text': '',
+                'requirements_text': '',
+                'google_doc_link': '',
+                'uploaded_files': '{}',
+                'is_rush': 'true' if rush_multiplier > 1 else 'false',
+                'promised_delivery_at': promised_at[j],
+                'delivered_at': delivered_at[j],
+                'deliverables': '{}',
+                'scheduled_at': '',
+                'calendly_event_url': '',
+                'meeting_link': '',
+                'status': status,
+                'completed_at': completed_at[j],
+                'cancelled_at': '',
+                'cancelled_by': '',
+                'cancellation_reason': '',
+                'credits_earned': credits_earned if status == 'completed' else 0,
+                'rating': rating,
+                'review_text': review_text,
+                'reviewed_at': reviewed_at[j],
+                'is_group_session': 'false',
+                'max_participants': 1,
+                'current_participants': 1,
+                'refund_requested': 'false',
+                'refund_reason': '',
+                'refund_status': '',
+                'refund_amount': '',
+                'refunded_at': '',
+                'metadata': '{}',
+                'created_at': created_at[j],
+                'updated_at': created_at[j]
+            }
+            yield booking
     
+def generate_group_bookings_rows(rng=random):
     # Add group session bookings
     group_bookings = [
         {
@@ -1170,33 +1552,37 @@ def update_bookings_csv():
         }
     ]
     
-    for i, group in enumerate(group_bookings):
-        booking_id = str(uuid.uuid4())
-        booking_uuids[f'bg{i}'] = booking_id
+    group_booking_ids.clear()
+    for i in range(row_counts['group_sessions']):
+        block, template = divmod(i, len(group_bookings))
+        group = group_bookings[template]
         
-        student_old_id = f's{str(group["student_idx"]//10)*7}-{str(group["student_idx"]//10)*4}-{str(group["student_idx"]//10)*4}-{str(group["student_idx"]//10)*4}-{str(group["student_idx"]//10)*12}{group["student_idx"]%10}'
-        student_new_id = student_uuids[student_old_id]
-        consultant_new_id = consultant_uuids[group['consultant_old_id']]
+        student_new_id = student_ids[block_ordinal(len(student_ids), group['student_idx'], block, 50)]
+        consultant = block_ordinal(len(consultant_ids), consultant_index[group['consultant_old_id']],
+                                   block, len(consultant_old_ids))
+        consultant_new_id = consultant_ids[consultant]
         
-        if group['consultant_old_id'] in service_map:
-            service_id = service_map[group['consultant_old_id']][0]
-        else:
+        service_id = consultant_services.first(consultant)
+        if not service_id:
             continue
         
-        created = datetime.now() - timedelta(days=10-i)
-        scheduled = datetime.now() + timedelta(days=2+i)
+        position = base_ordinal(i, 'group_sessions')
+        created = reference_time - timedelta(days=10-position)
+        booking_id = new_uuid('bookings', f'bg{i}', created)
+        group_booking_ids.append(booking_id)
+        scheduled = reference_time + timedelta(days=2+position)
         
         booking = {
             'id': booking_id,
             'student_id': student_new_id,
             'consultant_id': consultant_new_id,
             'service_id': service_id,
-            'base_price': random.choice([40, 65, 95]),
+            'base_price': rng.choice([40, 65, 95]),
             'price_tier': '',
             'rush_multiplier': 1,
             'discount_code': '',
             'discount_amount': '',
-            'final_price': random.choice([40, 65, 95]),
+            'final_price': rng.choice([40, 65, 95]),
             'prompt_text': f'{group["service_type"]} group session',
             'essay_text': '',
             'requirements_text': '',
@@ -1230,85 +1616,347 @@ def update_bookings_csv():
             'created_at': created.isoformat() + 'Z',
             'updated_at': created.isoformat() + 'Z'
         }
-        bookings.append(booking)
-    
-    # Write CSV
-    with open('bookings.csv', 'w', newline='') as f:
-        fieldnames = ['id', 'student_id', 'consultant_id', 'service_id', 'base_price', 'price_tier',
-                     'rush_multiplier', 'discount_code', 'discount_amount', 'final_price',
-                     'prompt_text', 'essay_text', 'requirements_text', 'google_doc_link',
-                     'uploaded_files', 'is_rush', 'promised_delivery_at', 'delivered_at',
-                     'deliverables', 'scheduled_at', 'calendly_event_url', 'meeting_link',
-                     'status', 'completed_at', 'cancelled_at', 'cancelled_by', 
-                     'cancellation_reason', 'credits_earned', 'rating', 'review_text',
-                     'reviewed_at', 'is_group_session', 'max_participants', 
-                     'current_participants', 'refund_requested', 'refund_reason',
-                     'refund_status', 'refund_amount', 'refunded_at', 'metadata',
-                     'created_at', 'updated_at']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(bookings)
+        yield booking
 
-def update_user_interactions_csv():
-    interactions = []
+BOOKINGS_FIELDNAMES = ['id', 'student_id', 'consultant_id', 'service_id', 'base_price', 'price_tier',
+                       'rush_multiplier', 'discount_code', 'discount_amount', 'final_price',
+                       'prompt_text', 'essay_text', 'requirements_text', 'google_doc_link',
+                       'uploaded_files', 'is_rush', 'promised_delivery_at', 'delivered_at',
+                       'deliverables', 'scheduled_at', 'calendly_event_url', 'meeting_link',
+                       'status', 'completed_at', 'cancelled_at', 'cancelled_by', 
+                       'cancellation_reason', 'credits_earned', 'rating', 'review_text',
+                       'reviewed_at', 'is_group_session', 'max_participants', 
+                       'current_participants', 'refund_requested', 'refund_reason',
+                       'refund_status', 'refund_amount', 'refunded_at', 'metadata',
+                       'created_at', 'updated_at']
+
+# --engine: 'rows' builds regular bookings one dict at a time, 'numpy' draws
+# whole columns at once (generate_bookings_columns)
+engine = 'rows'
+COLUMN_BATCH = 100_000
+BOOKING_STATUSES = np.array(['completed', 'in_progress', 'confirmed', 'pending'], dtype=object) if np else None
+BOOKING_PRICES = [45, 60, 75, 85, 95, 120]
+REVIEW_TEXTS = [
+    'Great experience working with this consultant!',
+    'Excellent feedback and very helpful.',
+    'Transformed my application completely!',
+    'Worth every penny. Highly recommend!'
+]
+
+# Columns of regular bookings that are the same on every row
+BOOKING_CONSTANTS = {
+    'price_tier': '', 'discount_code': '', 'discount_amount': '', 'prompt_text': 'Booking request for service',
+    'essay_text': '', 'requirements_text': '', 'google_doc_link': '', 'uploaded_files': '{}', 'deliverables': '{}',
+    'scheduled_at': '', 'calendly_event_url': '', 'meeting_link': '', 'cancelled_at': '', 'cancelled_by': '',
+    'cancellation_reason': '', 'is_group_session': 'false', 'max_participants': 1, 'current_participants': 1,
+    'refund_requested': 'false', 'refund_reason': '', 'refund_status': '', 'refund_amount': '',
+    'refunded_at': '', 'metadata': '{}',
+}
+
+def csv_field(value):
+    """value quoted the way csv.writer would quote it."""
+    value = str(value)
+    if any(c in value for c in ',"\r\n'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+def text_field(value):
+    """value as a COPY text field, '' being NULL."""
+    return '\\N' if value == '' else str(value).translate(pg_copy.TEXT_ESCAPES)
+
+def format_lines(fieldnames, columns, constants):
+    """Rows held in columns (object arrays of text, '' for NULL) with
+    constants filled in, as CSV or COPY text lines in fieldnames order.
+
+    Runs of constant fields are joined into a single piece up front, so each
+    line is one str.join over the varying columns.
+    """
+    if output_format == 'csv':
+        separator, end, field = ',', '\r\n', csv_field
+    else:
+        separator, end, field = '\t', '\n', text_field
+    pieces = []
+    for name in fieldnames:
+        if name in columns:
+            column = columns[name] if output_format == 'csv' else np.where(columns[name] == '', '\\N', columns[name])
+            pieces.append(column.tolist())
+        elif pieces and isinstance(pieces[-1], str):
+            pieces[-1] += separator + field(constants[name])
+        else:
+            pieces.append(field(constants[name]))
+    rows = zip(*[itertools.repeat(piece) if isinstance(piece, str) else piece for piece in pieces])
+    return end.join(map(separator.join, rows)) + end
+
+def np_shard_rng(table, shard):
+    """NumPy counterpart of shard_rng."""
+    stream = hashlib.blake2b(f'{table}:{shard}'.encode(), digest_size=8).digest()
+    return np.random.default_rng([run_seed, int.from_bytes(stream, 'big')])
+
+def number_column(values):
+    """Format a float array like the rows engine prints its numbers.
+
+    Prices only take a handful of distinct values, so each one is formatted
+    once and the text is gathered back by index.
+    """
+    distinct, inverse = np.unique(values, return_inverse=True)
+    text = np.array([repr(float(value)).removesuffix('.0') for value in distinct], dtype=object)
+    return text[inverse]
+
+def masked_timestamps(offsets, mask):
+    """timestamp_column where mask is set, '' elsewhere."""
+    text = np.full(len(offsets), '', dtype=object)
+    text[mask] = timestamp_column(offsets[mask])
+    return text
+
+def generate_bookings_columns(start, stop, rng):
+    """Regular bookings [start, stop) as CSV or COPY text, one chunk per COLUMN_BATCH rows.
+
+    Same rows as generate_bookings_rows, but status, prices, rush, credits,
+    ratings and timestamps are drawn and computed as NumPy arrays and every
+    line is assembled from the finished columns. The random columns come from
+    rng's stream, so they differ from the rows engine for the same seed.
+    """
+    consultant_column = np.array(list(consultant_ids), dtype=object)
+    service_column = np.array([consultant_services.first(c) for c in range(len(consultant_ids))], dtype=object)
+    student_column = np.array(list(student_ids), dtype=object)
+    consultant_sampler = popularity_sampler('consultants', bookable=True)
+    student_sampler = popularity_sampler('students')
+    review_texts = np.array([csv_field(text) if output_format == 'csv' else text_field(text) for text in REVIEW_TEXTS],
+                            dtype=object)
+    fieldnames = output_columns('bookings', BOOKINGS_FIELDNAMES)
+    # Lines are assembled without RowValidator, so check the enum values up front
+    invalid = set(BOOKING_STATUSES) - set(constraints.enum_labels('booking_status'))
+    if invalid:
+        raise ValueError(f'booking_status has no {", ".join(sorted(invalid))}')
     
-    # Generate interactions based on bookings and browsing patterns
-    for i in range(100):
-        interaction_id = str(uuid.uuid4())
-        interaction_uuids[f'ui{i}'] = interaction_id
+    for batch in batches(start, stop, COLUMN_BATCH):
+        i = np.arange(batch.start, batch.stop, dtype=np.int64)
+        if consultant_sampler:
+            consultant = consultant_sampler.sample(rng, len(i))
+        else:
+            consultant = i % len(consultant_column)
+            # Consultants without a service get no bookings, like in the rows engine
+            i, consultant = i[service_column[consultant] != ''], consultant[service_column[consultant] != '']
+        count = len(i)
+        if not count:
+            continue
+        if student_sampler:
+            student = student_sampler.sample(rng, count)
+        else:
+            student = (i % 10 + 50 * (i // 50)) % row_counts['students']
         
-        student_idx = i % 20
-        student_old_id = f's{str(student_idx//10)*7}-{str(student_idx//10)*4}-{str(student_idx//10)*4}-{str(student_idx//10)*4}-{str(student_idx//10)*12}{student_idx%10}'
-        student_new_id = student_uuids[student_old_id]
+        position = i * BASE_ROW_COUNTS['bookings'] / row_counts['bookings']
+        status = np.select([position < 20, position < 25, position < 30], [0, 1, 2], 3)
+        completed = status == 0
         
-        created = datetime.now() - timedelta(days=45-i//2)
+        created_us = np.rint((position - 40) * DAY_US).astype(np.int64)
+        created_ms = ((reference_time - UNIX_EPOCH) // timedelta(microseconds=1) + created_us) // 1000
+        created_at = timestamp_column(created_us)
+        promised_at = masked_timestamps(created_us + 2*DAY_US, status <= 1)
+        delivered_at = masked_timestamps(created_us + DAY_US, completed)
+        # Completed bookings are completed when their delivery was promised
+        completed_at = np.where(completed, promised_at, '')
+        reviewed_at = masked_timestamps(created_us + 2*DAY_US + 12*HOUR_US, completed)
         
-        if i % 5 == 0:
-            # Search interaction
-            interaction = {
-                'id': interaction_id,
-                'student_id': student_new_id,
-                'consultant_id': '',
-                'interaction_type': 'search',
-                'service_type': random.choice(['essay_review', 'mock_interview', 'test_prep', 'application_help']),
-                'rating': '',
-                'session_id': f'sess_{i:03d}',
-                'created_at': created.isoformat() + 'Z'
-            }
-        else:
-            # View or booking interaction
-            consultant_old_id = list(consultant_uuids.keys())[i % len(consultant_uuids)]
-            consultant_new_id = consultant_uuids[consultant_old_id]
-            
-            interaction_type = random.choice(['view_profile', 'view_service', 'booking_created', 'booking_completed'])
-            
-            interaction = {
-                'id': interaction_id,
-                'student_id': student_new_id,
-                'consultant_id': consultant_new_id,
-                'interaction_type': interaction_type,
-                'service_type': random.choice(['', 'essay_review', 'mock_interview']) if 'view' in interaction_type else '',
-                'rating': random.choice([4, 5]) if interaction_type == 'booking_completed' else '',
-                'session_id': f'sess_{i//10:03d}',
-                'created_at': created.isoformat() + 'Z'
-            }
+        base_price = rng.choice(BOOKING_PRICES, size=count).astype(np.float64)
+        is_rush = rng.random(count) < 0.15
+        rush_multiplier = np.where(is_rush, 1.5, 1.0)
+        final_price = base_price * rush_multiplier
+        credits_earned = np.where(completed, final_price * 0.02, 0.0)
+        rating = np.where(completed, rng.choice(np.array(['4', '5', '5', '5'], dtype=object), size=count), '')
+        review_text = np.where(completed, review_texts[rng.integers(len(REVIEW_TEXTS), size=count)], '')
         
-        interactions.append(interaction)
-    
-    # Write CSV
-    with open('user_interactions.csv', 'w', newline='') as f:
-        fieldnames = ['id', 'student_id', 'consultant_id', 'interaction_type', 
-                     'service_type', 'rating', 'session_id', 'created_at']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(interactions)
+        columns = {
+            'id': uuid_column('bookings', i.tolist(), created_ms),
+            'student_id': student_column[student],
+            'consultant_id': consultant_column[consultant],
+            'service_id': service_column[consultant],
+            'base_price': number_column(base_price),
+            'rush_multiplier': number_column(rush_multiplier),
+            'final_price': number_column(final_price),
+            'is_rush': np.where(is_rush, 'true', 'false').astype(object),
+            'promised_delivery_at': promised_at,
+            'delivered_at': delivered_at,
+            'status': BOOKING_STATUSES[status],
+            'completed_at': completed_at,
+            'credits_earned': number_column(credits_earned),
+            'rating': rating,
+            'review_text': review_text,
+            'reviewed_at': reviewed_at,
+            'created_at': created_at,
+            'updated_at': created_at,
+        }
+        yield count, format_lines(fieldnames, columns, BOOKING_CONSTANTS)
 
-def update_waitlist_csv():
-    waitlists = []
+def write_bookings(path, start, stop, shard, extra_rows=()):
+    """Write regular bookings [start, stop) with the selected engine, then
+    extra_rows (group bookings). Returns the number of rows written."""
+    if engine == 'rows':
+        rows = itertools.chain(generate_bookings_rows(start, stop, shard_rng('bookings', shard)), extra_rows)
+        return write_rows('bookings', path, BOOKINGS_FIELDNAMES, rows)
+    columns = output_columns('bookings', BOOKINGS_FIELDNAMES)
+    extra_rows = constraints.validator('bookings', BOOKINGS_FIELDNAMES).checked(extra_rows)
+    def write(tmp_path):
+        with open(tmp_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            if output_format == 'csv':
+                writer.writerow(columns)
+            count = 0
+            for rows, text in generate_bookings_columns(start, stop, np_shard_rng('bookings', shard)):
+                f.write(text)
+                count += rows
+            for row in extra_rows:
+                if output_format == 'csv':
+                    writer.writerow([row[column] for column in columns])
+                else:
+                    f.write(pg_copy.encode_text_row([row[column] for column in columns]))
+                count += 1
+        return count
+    return write_output(path, write)
+
+def update_bookings_csv():
+    clear_table_outputs('bookings', keep=[table_path('bookings')])
+    count = write_bookings(table_path('bookings'), 0, row_counts['bookings'], 0,
+                           generate_group_bookings_rows(shard_rng('bookings', 'group')))
+    if output_format != 'csv':
+        write_manifest('bookings', BOOKINGS_FIELDNAMES, [{'path': table_path('bookings'), 'rows': count}])
+
+def generate_user_interactions_rows(start=0, stop=None, rng=random):
+    if interaction_model == 'sessions':
+        # One time-ordered stream, so it is never split into shards
+        yield from generate_session_interactions_rows(rng)
+        return
+    # Generate interactions based on bookings and browsing patterns
+    consultant_count = len(consultant_ids)
+    consultant_sampler = popularity_sampler('consultants')
+    student_sampler = popularity_sampler('students')
     
+    stop = row_counts['user_interactions'] if stop is None else stop
+    for batch in batches(start, stop):
+        created_us = [offset_us(days=base_ordinal(i, 'user_interactions')//2 - 45) for i in batch]
+        created_at = format_timestamps(created_us)
+        
+        for j, i in enumerate(batch):
+            if student_sampler:
+                student_idx = student_sampler.draw(rng)
+            else:
+                student_idx = (i % 20 + 50 * (i // 100)) % row_counts['students']
+            student_new_id = student_ids[student_idx]
+            
+            interaction_id = new_uuid('user_interactions', i, reference_unix_ms(created_us[j]))
+            
+            if i % 5 == 0:
+                # Search, a view that is not of one consultant
+                interaction = {
+                    'id': interaction_id,
+                    'student_id': student_new_id,
+                    'consultant_id': '',
+                    'interaction_type': 'viewed',
+                    'service_type': rng.choice(['essay_review', 'mock_interview', 'test_prep', 'application_help']),
+                    'rating': '',
+                    'session_id': f'sess_{i:03d}',
+                    'created_at': created_at[j]
+                }
+            else:
+                # View or booking interaction, only rated ones carry a rating
+                consultant = consultant_sampler.draw(rng) if consultant_sampler else i % consultant_count
+                consultant_new_id = consultant_ids[consultant]
+            
+                interaction_type = rng.choice(['viewed', 'viewed', 'booked', 'completed', 'rated'])
+            
+                interaction = {
+                    'id': interaction_id,
+                    'student_id': student_new_id,
+                    'consultant_id': consultant_new_id,
+                    'interaction_type': interaction_type,
+                    'service_type': rng.choice(['', 'essay_review', 'mock_interview']) if interaction_type == 'viewed' else '',
+                    'rating': rng.choice([4, 5]) if interaction_type == 'rated' else '',
+                    'session_id': f'sess_{i//10:03d}',
+                    'created_at': created_at[j]
+                }
+            
+            yield interaction
+
+USER_INTERACTIONS_FIELDNAMES = ['id', 'student_id', 'consultant_id', 'interaction_type', 
+                                'service_type', 'rating', 'session_id', 'created_at']
+
+# --interactions: the 'fixed' pattern of the hand-curated data, or 'sessions'
+# of every student simulated by interaction_sessions.py over SESSION_DAYS
+# and written in created_at order, with consultant_views from the same views
+interaction_model = 'fixed'
+SESSION_DAYS = 50
+SESSION_INTERACTION_TYPES = {
+    interaction_sessions.SEARCH: 'viewed',
+    interaction_sessions.VIEW: 'viewed',
+    interaction_sessions.VIEW_SERVICE: 'viewed',
+    interaction_sessions.BOOKED: 'booked',
+    interaction_sessions.COMPLETED: 'completed',
+    interaction_sessions.RATED: 'rated',
+}
+CONSULTANT_VIEWS_FIELDNAMES = ['id', 'student_id', 'consultant_id', 'referrer', 'search_query', 'viewed_at']
+
+def session_events(rng):
+    """interaction_sessions.simulate over every student until reference_time,
+    at rates that give about row_counts['user_interactions'] events. Whale
+    students of a students popularity model start proportionally more sessions."""
+    weights = popularity_weights('students') or [1.0] * len(student_ids)
+    per_day = row_counts['user_interactions'] / (SESSION_DAYS * interaction_sessions.events_per_session())
+    total = sum(weights)
+    rates = [per_day * weight / total for weight in weights]
+    sampler = popularity_sampler('consultants')
+    consultant_count = len(consultant_ids)
+    pick = sampler.draw if sampler else lambda rng: rng.randrange(consultant_count)
+    return interaction_sessions.simulate(rates, offset_us(days=-SESSION_DAYS), 0, rng, pick)
+
+def timed_batches(events):
+    """(event, created_at text) of time-ordered events, formatted in batches."""
+    while True:
+        batch = list(itertools.islice(events, TIMESTAMP_BATCH))
+        if not batch:
+            return
+        yield from zip(batch, format_timestamps([event[0] for event in batch]))
+
+def generate_session_interactions_rows(rng):
+    for i, (event, created_at) in enumerate(timed_batches(session_events(rng))):
+        time, student, session, kind, consultant, detail = event
+        yield {
+            'id': new_uuid('user_interactions', i, reference_unix_ms(time)),
+            'student_id': student_ids[student],
+            'consultant_id': consultant_ids[consultant] if consultant is not None else '',
+            'interaction_type': SESSION_INTERACTION_TYPES[kind],
+            'service_type': detail if kind in (interaction_sessions.SEARCH, interaction_sessions.VIEW_SERVICE) else '',
+            'rating': detail if kind == interaction_sessions.RATED else '',
+            'session_id': f'sess_{session:06d}',
+            'created_at': created_at,
+        }
+
+def generate_consultant_views_rows(rng):
+    """The consultant views of generate_session_interactions_rows, when
+    given the same stream."""
+    views = (event for event in session_events(rng) if event[3] == interaction_sessions.VIEW)
+    for i, (event, viewed_at) in enumerate(timed_batches(views)):
+        time, student, session, kind, consultant, (referrer, search_query) = event
+        yield {
+            'id': new_uuid('consultant_views', i, reference_unix_ms(time)),
+            'student_id': student_ids[student],
+            'consultant_id': consultant_ids[consultant],
+            'referrer': referrer,
+            'search_query': search_query or '',
+            'viewed_at': viewed_at,
+        }
+
+def update_user_interactions_csv():
+    write_table('user_interactions', USER_INTERACTIONS_FIELDNAMES,
+                generate_user_interactions_rows(rng=shard_rng('user_interactions', 0)))
+
+def update_consultant_views_csv():
+    # Replays the user_interactions stream, so both tables show the same views
+    write_table('consultant_views', CONSULTANT_VIEWS_FIELDNAMES,
+                generate_consultant_views_rows(shard_rng('user_interactions', 0)))
+
+def generate_waitlist_rows(rng=random):
     # David Kim is on vacation, so he has a waitlist
     david_old_id = 'c4444444-4444-4444-4444-444444444441'
-    david_new_id = consultant_uuids[david_old_id]
     
     waitlist_students = [
         ('s5555555-5555-5555-5555-555555555551', 1),
@@ -1316,31 +1964,6 @@ def update_waitlist_csv():
         ('s5555555-5555-5555-5555-555555555553', 3)
     ]
     
-    for i, (student_old_id, position) in enumerate(waitlist_students):
-        waitlist_id = str(uuid.uuid4())
-        student_new_id = student_uuids[student_old_id]
-        
-        if david_old_id in service_map:
-            service_id = service_map[david_old_id][0]
-        else:
-            service_id = ''
-        
-        created = datetime.now() - timedelta(days=3-i)
-        expires = created + timedelta(days=7)
-        
-        waitlist = {
-            'id': waitlist_id,
-            'consultant_id': david_new_id,
-            'student_id': student_new_id,
-            'service_id': service_id,
-            'position': position,
-            'notified': 'false',
-            'notified_at': '',
-            'expires_at': expires.isoformat() + 'Z',
-            'created_at': created.isoformat() + 'Z'
-        }
-        waitlists.append(waitlist)
-    
     # Add waitlists for popular consultants
     popular_consultants = [
         ('c1111111-1111-1111-1111-111111111111', 's6666666-6666-6666-6666-666666666661'),
@@ -1349,46 +1972,78 @@ def update_waitlist_csv():
         ('c3333333-3333-3333-3333-333333333331', 's6666666-6666-6666-6666-666666666664')
     ]
     
-    for i, (consultant_old_id, student_old_id) in enumerate(popular_consultants):
-        waitlist_id = str(uuid.uuid4())
-        consultant_new_id = consultant_uuids[consultant_old_id]
-        student_new_id = student_uuids[student_old_id]
-        
-        if consultant_old_id in service_map:
-            service_id = service_map[consultant_old_id][0]
-        else:
-            service_id = ''
+    per_block = len(waitlist_students) + len(popular_consultants)
+    emitted = 0
+    
+    # Timestamps only depend on the template, so every block shares them
+    david_created_us = [offset_us(days=i-3) for i in range(len(waitlist_students))]
+    david_created_at = format_timestamps(david_created_us)
+    david_expires_at = format_timestamps([created + 7*DAY_US for created in david_created_us])
+    popular_created_us = [offset_us(days=i//2-4) for i in range(len(popular_consultants))]
+    popular_created_at = format_timestamps(popular_created_us)
+    popular_notified_at = format_timestamps([created + 12*HOUR_US if i % 2 == 0 else None
+                                             for i, created in enumerate(popular_created_us)])
+    popular_expires_at = format_timestamps([created + 7*DAY_US for created in popular_created_us])
+    
+    # Every block repeats the hand-curated waitlists with that block's entities
+    for block in range(block_count('waitlists', per_block)):
+        david = block_ordinal(len(consultant_ids), consultant_index[david_old_id], block, len(consultant_old_ids))
+        david_new_id = consultant_ids[david]
         
-        created = datetime.now() - timedelta(days=4-i//2)
-        expires = created + timedelta(days=7)
+        for i, (student_old_id, position) in enumerate(waitlist_students):
+            if emitted >= row_counts['waitlists']:
+                break
+            student_new_id = student_ids[block_ordinal(len(student_ids), student_index[student_old_id], block, 50)]
+            service_id = consultant_services.first(david)
+            
+            waitlist_id = new_uuid('consultant_waitlist', f'{block}-{i}', reference_unix_ms(david_created_us[i]))
+            
+            waitlist = {
+                'id': waitlist_id,
+                'consultant_id': david_new_id,
+                'student_id': student_new_id,
+                'service_id': service_id,
+                'position': position,
+                'notified': 'false',
+                'notified_at': '',
+                'expires_at': david_expires_at[i],
+                'created_at': david_created_at[i]
+            }
+            yield waitlist
+            emitted += 1
         
-        waitlist = {
-            'id': waitlist_id,
-            'consultant_id': consultant_new_id,
-            'student_id': student_new_id,
-            'service_id': service_id,
-            'position': (i % 2) + 1,
-            'notified': 'true' if i % 2 == 0 else 'false',
-            'notified_at': (created + timedelta(hours=12)).isoformat() + 'Z' if i % 2 == 0 else '',
-            'expires_at': expires.isoformat() + 'Z',
-            'created_at': created.isoformat() + 'Z'
-        }
-        waitlists.append(waitlist)
-    
-    # Write CSV
-    with open('consultant_waitlist.csv', 'w', newline='') as f:
-        fieldnames = ['id', 'consultant_id', 'student_id', 'service_id', 'position',
-                     'notified', 'notified_at', 'expires_at', 'created_at']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(waitlists)
+        for i, (consultant_old_id, student_old_id) in enumerate(popular_consultants):
+            if emitted >= row_counts['waitlists']:
+                break
+            consultant = block_ordinal(len(consultant_ids), consultant_index[consultant_old_id], block,
+                                       len(consultant_old_ids))
+            consultant_new_id = consultant_ids[consultant]
+            student_new_id = student_ids[block_ordinal(len(student_ids), student_index[student_old_id], block, 50)]
+            service_id = consultant_services.first(consultant)
+            
+            waitlist_id = new_uuid('consultant_waitlist', f'{block}-p{i}', reference_unix_ms(popular_created_us[i]))
+            
+            waitlist = {
+                'id': waitlist_id,
+                'consultant_id': consultant_new_id,
+                'student_id': student_new_id,
+                'service_id': service_id,
+                'position': (i % 2) + 1,
+                'notified': 'true' if i % 2 == 0 else 'false',
+                'notified_at': popular_notified_at[i],
+                'expires_at': popular_expires_at[i],
+                'created_at': popular_created_at[i]
+            }
+            yield waitlist
+            emitted += 1
 
-def update_group_participants_csv():
-    participants = []
-    
-    # Get group booking IDs
-    group_booking_ids = [booking_uuids[f'bg{i}'] for i in range(3)]
-    
+def update_waitlist_csv():
+    fieldnames = ['id', 'consultant_id', 'student_id', 'service_id', 'position',
+                  'notified', 'notified_at', 'expires_at', 'created_at']
+    write_table('consultant_waitlist', fieldnames, generate_waitlist_rows(shard_rng('consultant_waitlist', 0)))
+
+def generate_group_participants_rows(start=0, stop=None, rng=random):
+    # rng is unused, it only keeps the signature in line with the other sharded tables
     # Participants for each group
     participant_students = [
         # Technical interview group (3 participants)
@@ -1399,74 +2054,833 @@ def update_group_participants_csv():
         [42, 49, 30, 31, 32, 33]
     ]
     
-    for booking_idx, student_indices in enumerate(participant_students):
+    # Join times only depend on the template, so every block shares them
+    joined_us = [[offset_us(days=template-5, hours=-(student_idx%24)) for student_idx in students]
+                 for template, students in enumerate(participant_students)]
+    joined_at = [format_timestamps(offsets) for offsets in joined_us]
+    
+    for booking_idx in range(start, row_counts['group_sessions'] if stop is None else stop):
+        block, template = divmod(booking_idx, len(participant_students))
         booking_id = group_booking_ids[booking_idx]
         
-        for student_idx in student_indices:
-            participant_id = str(uuid.uuid4())
-            student_old_id = f's{str(student_idx//10)*7}-{str(student_idx//10)*4}-{str(student_idx//10)*4}-{str(student_idx//10)*4}-{str(student_idx//10)*12}{student_idx%10}'
-            student_new_id = student_uuids[student_old_id]
+        for k, student_idx in enumerate(participant_students[template]):
+            student_new_id = student_ids[block_ordinal(len(student_ids), student_idx, block, 50)]
             
-            joined = datetime.now() - timedelta(days=5-booking_idx, hours=student_idx%24)
+            participant_id = new_uuid('group_session_participants', f'{booking_idx}-{student_idx}',
+                                      reference_unix_ms(joined_us[template][k]))
             
             participant = {
                 'id': participant_id,
                 'booking_id': booking_id,
                 'student_id': student_new_id,
-                'joined_at': joined.isoformat() + 'Z'
+                'joined_at': joined_at[template][k]
             }
-            participants.append(participant)
+            yield participant
+
+GROUP_PARTICIPANTS_FIELDNAMES = ['id', 'booking_id', 'student_id', 'joined_at']
+
+def update_group_participants_csv():
+    write_table('group_session_participants', GROUP_PARTICIPANTS_FIELDNAMES, generate_group_participants_rows())
+
+# Conversations (migration 006) between students and consultants, each with
+# its thread of messages. About CONVERSATION_BOOKED_SHARE of them are between
+# the student and consultant of a generated booking and happen around their
+# latest booking, the rest are enquiries that never led to one. Message
+# counts are log-normal, so most threads are short and a few run long.
+CONVERSATION_BOOKED_SHARE = 0.6
+MESSAGES_PER_CONVERSATION = 12
+MESSAGE_COUNT_SIGMA = 1.0
+MEAN_REPLY_HOURS = 3
+MEAN_READ_HOURS = 1
+CONVERSATIONS_FIELDNAMES = ['id', 'student_id', 'consultant_id', 'has_booking', 'last_booking_id', 'started_by',
+                            'last_message_at', 'last_message_preview', 'student_unread_count',
+                            'consultant_unread_count', 'is_archived', 'archived_by', 'created_at', 'updated_at']
+MESSAGES_FIELDNAMES = ['id', 'conversation_id', 'sender_id', 'content', 'attachments', 'read_at', 'edited_at',
+                       'edit_history', 'created_at']
+STUDENT_MESSAGES = [
+    "Hi! I'm applying early decision this fall and would love your help with my personal statement.",
+    'Do you have availability this week?',
+    'Thanks so much, that makes a lot of sense.',
+    'I just shared the latest draft with you.',
+    'Could you look at the second paragraph again? I rewrote the opening.',
+    'How long does a review usually take?',
+    'That feedback was really helpful, thank you!',
+    'Is it okay if I send my supplemental essays too?',
+]
+CONSULTANT_MESSAGES = [
+    "Hi! Happy to help. Send over what you have and we'll go from there.",
+    'I have a couple of openings on Thursday and Friday.',
+    'I left comments in the doc. The structure is strong, the ending needs work.',
+    'Usually 48 hours, or 24 with rush delivery.',
+    'Great progress since the last draft!',
+    'Make sure the story shows who you are, not just what you did.',
+    'Yes, send them over and I can take a look.',
+    "Good luck, let me know how it goes!",
+]
+ATTACHMENT = {'name': 'essay_draft.docx', 'url': 'https://storage.proofr.com/attachments/essay_draft.docx',
+              'type': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'}
+
+def file_timestamp_us(value):
+    """Offset from reference_time of a timestamp read back from a file."""
+    if isinstance(value, bytes):
+        # COPY binary: microseconds since 2000-01-01 UTC
+        moment = pg_copy.PG_EPOCH + timedelta(microseconds=struct.unpack('>q', value)[0])
+    else:
+        moment = pg_copy.parse_timestamp(value)
+    return (moment.replace(tzinfo=None) - reference_time) // timedelta(microseconds=1)
+
+def booked_pairs(table, wanted):
+    """{student key + consultant key: (booking key, service key, created_at
+    offset)} of the latest booking of up to wanted student-consultant pairs,
+    read back from the bookings files in this directory in whatever format
+    they were written.
+
+    Pairs are picked by a hash of the pair salted with table, so every booking
+    of a picked pair is seen wherever it is in the files, only the picked
+    pairs are kept, and each table gets its own sample.
+    """
+    files = load_mock_data.table_files('.', 'bookings')
+    if files is None:
+        return {}
+    threshold = min(1, wanted / max(1, row_counts['bookings'])) * 2**64
+    hash_key, salt = run_seed.to_bytes(8, 'big'), table.encode()[:16]
+    pairs = {}
+    for booking, student, consultant, service, created_at in check_foreign_keys.read_rows(
+            'bookings', files, ['id', 'student_id', 'consultant_id', 'service_id', 'created_at']):
+        pair = check_foreign_keys.uuid_key(student) + check_foreign_keys.uuid_key(consultant)
+        digest = hashlib.blake2b(pair, digest_size=8, key=hash_key, person=salt).digest()
+        if int.from_bytes(digest, 'big') >= threshold:
+            continue
+        if pair not in pairs and len(pairs) >= wanted:
+            continue
+        created = file_timestamp_us(created_at)
+        if pair not in pairs or created >= pairs[pair][2]:
+            pairs[pair] = (check_foreign_keys.uuid_key(booking), check_foreign_keys.uuid_key(service), created)
+    return pairs
+
+def conversation_pairs(booked):
+    """(student key, consultant key, booking key or None, booked offset) of
+    every conversation: the booked pairs, then enquiries of student s with
+    consultants s, s+1, ... round robin, skipping pairs that have a booking."""
+    for pair, (booking, _, booked_us) in booked.items():
+        yield pair[:UUID_BYTES], pair[UUID_BYTES:], booking, booked_us
+    count, students, consultants = len(booked), len(student_ids), len(consultant_ids)
+    for step in range(consultants):
+        for student in range(students):
+            if count >= row_counts['conversations']:
+                return
+            consultant = (student + step) % consultants
+            student_key = bytes(student_ids.data[student * UUID_BYTES:(student + 1) * UUID_BYTES])
+            consultant_key = bytes(consultant_ids.data[consultant * UUID_BYTES:(consultant + 1) * UUID_BYTES])
+            if student_key + consultant_key in booked:
+                continue
+            yield student_key, consultant_key, None, None
+            count += 1
+
+def conversation_thread(c, student, consultant, booking, booked_us, rng, conversation_ids, with_messages=True):
+    """(conversation row, message rows) of the c-th conversation. Messages
+    after reference_time are dropped, and the ones their recipient has not
+    read by then are its unread counts. Without with_messages only the
+    conversation row is built, from the same random draws.
+
+    The conversation's ID is appended to conversation_ids the first time
+    round and read back from it when the thread is replayed, as unseeded
+    runs draw a new uuid4 every call."""
+    if booking is None:
+        start = -round(rng.uniform(1, SESSION_DAYS * 24) * HOUR_US)
+    else:
+        # Booked conversations start up to three days before the booking
+        start = min(booked_us, -HOUR_US) - round(rng.uniform(0, 72) * HOUR_US)
+    mu = math.log(MESSAGES_PER_CONVERSATION) - MESSAGE_COUNT_SIGMA ** 2 / 2
+    count = max(1, round(rng.lognormvariate(mu, MESSAGE_COUNT_SIGMA)))
     
-    # Write CSV
-    with open('group_session_participants.csv', 'w', newline='') as f:
-        fieldnames = ['id', 'booking_id', 'student_id', 'joined_at']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(participants)
+    # Students open most conversations, then the sender switches most of the time
+    senders, created_us, read_us, edited_us, contents, attachments = [], [], [], [], [], []
+    sender, time = 'student' if rng.random() < 0.9 else 'consultant', start
+    for n in range(count):
+        if time >= 0:
+            break
+        texts = STUDENT_MESSAGES if sender == 'student' else CONSULTANT_MESSAGES
+        senders.append(sender)
+        created_us.append(time)
+        contents.append(texts[0] if n == 0 else rng.choice(texts))
+        attachments.append(rng.randint(20_000, 400_000) if sender == 'student' and rng.random() < 0.05 else None)
+        read = time + round(rng.expovariate(1 / MEAN_READ_HOURS) * HOUR_US)
+        read_us.append(read if read < 0 else None)
+        edited = time + round(rng.uniform(1, 10) * 60_000_000) if rng.random() < 0.03 else None
+        edited_us.append(edited if edited is not None and edited < 0 else None)
+        time += round(rng.expovariate(1 / MEAN_REPLY_HOURS) * HOUR_US)
+        if rng.random() < 0.8:
+            sender = 'consultant' if sender == 'student' else 'student'
+    # Threads that went quiet a month ago are archived by the student
+    archived = created_us[-1] < -30 * DAY_US and rng.random() < 0.5
+    
+    student_id, consultant_id = format_uuid(student), format_uuid(consultant)
+    if c == len(conversation_ids):
+        conversation_ids.append(new_uuid('conversations', c, reference_unix_ms(start)))
+    conversation_id = conversation_ids[c]
+    first_at, last_at = format_timestamps([created_us[0], created_us[-1]])
+    conversation = {
+        'id': conversation_id,
+        'student_id': student_id,
+        'consultant_id': consultant_id,
+        'has_booking': 'true' if booking else 'false',
+        'last_booking_id': format_uuid(booking) if booking else '',
+        'started_by': student_id if senders[0] == 'student' else consultant_id,
+        'last_message_at': last_at,
+        'last_message_preview': contents[-1][:100],
+        'student_unread_count': sum(1 for sender, read in zip(senders, read_us) if sender == 'consultant' and read is None),
+        'consultant_unread_count': sum(1 for sender, read in zip(senders, read_us) if sender == 'student' and read is None),
+        'is_archived': 'true' if archived else 'false',
+        'archived_by': student_id if archived else '',
+        'created_at': first_at,
+        'updated_at': last_at,
+    }
+    if not with_messages:
+        return conversation, None
+    
+    created_at = format_timestamps(created_us)
+    read_at = format_timestamps(read_us)
+    edited_at = format_timestamps(edited_us)
+    messages = []
+    for n, sender in enumerate(senders):
+        messages.append({
+            'id': new_uuid('messages', f'{c}-{n}', reference_unix_ms(created_us[n])),
+            'conversation_id': conversation_id,
+            'sender_id': student_id if sender == 'student' else consultant_id,
+            'content': contents[n],
+            'attachments': json.dumps([dict(ATTACHMENT, size=attachments[n])]) if attachments[n] else '[]',
+            'read_at': read_at[n],
+            'edited_at': edited_at[n],
+            'edit_history': json.dumps([{'content': contents[n].rstrip('.!?'), 'edited_at': edited_at[n]}])
+                            if edited_at[n] else '[]',
+            'created_at': created_at[n],
+        })
+    return conversation, messages
+
+def conversation_threads(booked, conversation_ids, with_messages=True):
+    """conversation_thread of every conversation. The same booked pairs give
+    the same threads, so the conversations and messages writers each replay it."""
+    rng = shard_rng('conversations', 0)
+    for c, (student, consultant, booking, booked_us) in enumerate(conversation_pairs(booked)):
+        yield conversation_thread(c, student, consultant, booking, booked_us, rng, conversation_ids, with_messages)
+
+def update_conversations_csv():
+    """Write conversations and messages. Reads the bookings written before."""
+    booked = booked_pairs('conversations', int(row_counts['conversations'] * CONVERSATION_BOOKED_SHARE))
+    conversation_ids = EntityIds()
+    write_table('conversations', CONVERSATIONS_FIELDNAMES,
+                (conversation for conversation, _ in conversation_threads(booked, conversation_ids, with_messages=False)))
+    write_table('messages', MESSAGES_FIELDNAMES,
+                (message for conversation, messages in conversation_threads(booked, conversation_ids)
+                 for message in messages))
+
+# Booking requests (migration 010): the pre-payment workflow where a student
+# drafts a request for one of a consultant's services, the consultant reviews
+# it and accepts or declines it, and the student pays within 72 hours. About
+# BOOKING_REQUEST_PAID_SHARE of them were paid and became the latest booking
+# of their student-consultant pair, their timeline worked back from the
+# booking's created_at. The rest run forward from a random start and stop
+# wherever reference_time cuts them off, which leaves drafts still being
+# autosaved, requests waiting in consultants' inboxes and accepted ones that
+# expired unpaid. Each request has its pasted texts, doc links, uploads and
+# chat, plus the system messages create_status_message_trigger inserts.
+BOOKING_REQUEST_PAID_SHARE = 0.35
+REQUEST_EXPIRY_US = 72 * HOUR_US
+UPLOAD_RETENTION_DAYS = 30
+MEAN_AUTOSAVES = 6
+MEAN_AUTOSAVE_MINUTES = 3
+# Chance of a draft being submitted, of a submitted request being reviewed
+# rather than left in the inbox, and of a reviewed one being accepted or
+# declined (else the student withdraws it)
+P_SUBMIT = 0.8
+P_REVIEW = 0.85
+P_ACCEPT = 0.6
+P_REJECT = 0.25
+BOOKING_REQUESTS_FIELDNAMES = ['id', 'student_id', 'consultant_id', 'service_id', 'purpose_of_service',
+                               'additional_requirements', 'deadline_date', 'urgency_level', 'status', 'submitted_at',
+                               'reviewed_at', 'accepted_at', 'rejected_at', 'paid_at', 'expires_at',
+                               'consultant_notes', 'rejection_reason', 'estimated_delivery_time', 'quoted_price',
+                               'selected_tier', 'booking_id', 'last_saved_at', 'metadata', 'created_at', 'updated_at']
+BOOKING_TEXT_INPUTS_FIELDNAMES = ['id', 'request_id', 'input_type', 'title', 'content', 'word_count',
+                                  'display_order', 'created_at', 'updated_at']
+BOOKING_DOC_LINKS_FIELDNAMES = ['id', 'request_id', 'doc_url', 'doc_title', 'doc_type', 'is_accessible',
+                                'last_verified_at', 'description', 'display_order', 'created_at', 'updated_at']
+BOOKING_FILE_UPLOADS_FIELDNAMES = ['id', 'request_id', 'file_name', 'file_type', 'file_size', 'storage_path',
+                                   'upload_status', 'upload_progress', 'uploaded_at', 'scheduled_deletion_date',
+                                   'deletion_notified', 'deleted_at', 'description', 'display_order', 'created_at',
+                                   'updated_at']
+BOOKING_REQUEST_MESSAGES_FIELDNAMES = ['id', 'request_id', 'sender_id', 'message', 'is_read', 'read_at',
+                                       'is_system_message', 'metadata', 'created_at']
+BOOKING_REQUEST_TABLES = {
+    'booking_requests': BOOKING_REQUESTS_FIELDNAMES,
+    'booking_text_inputs': BOOKING_TEXT_INPUTS_FIELDNAMES,
+    'booking_doc_links': BOOKING_DOC_LINKS_FIELDNAMES,
+    'booking_file_uploads': BOOKING_FILE_UPLOADS_FIELDNAMES,
+    'booking_request_messages': BOOKING_REQUEST_MESSAGES_FIELDNAMES,
+}
+# The text create_status_change_message() gives each status change, None
+# where it inserts no message
+STATUS_MESSAGES = {
+    'pending_review': 'Request submitted for review',
+    'in_discussion': 'Consultant has started reviewing your request',
+    'accepted': 'Request accepted! Please proceed with payment within 72 hours.',
+    'rejected': 'Request declined. Reason: ',
+    'paid': 'Payment received! Your consultant will begin working on your request.',
+    'expired': None,
+    'cancelled': None,
+}
+REQUEST_PURPOSES = [
+    'Review my Common App personal statement before the early decision deadline',
+    'Feedback on my Why Us supplemental essay',
+    'Mock interview practice for my alumni interview',
+    'Help planning my SAT math prep',
+    'Polish my activities list and additional information section',
+]
+REQUEST_REQUIREMENTS = ['', 'Please focus on structure and flow.', 'I am over the word limit and need help cutting.',
+                        'This is for Stanford, so the prompt is very open ended.']
+TEXT_INPUTS = [
+    ('prompt', 'Essay prompt', 'Share an essay on any topic of your choice. It can be one you have already written, '
+                               'one that responds to a different prompt, or one of your own design.'),
+    ('essay', 'Personal statement draft', 'When I was fifteen I took apart the family radio to see how it worked. '
+                                          'Putting it back together took three weeks and taught me patience.'),
+    ('notes', 'Notes for the consultant', 'My counselor thinks the ending is weak. I would like a second opinion.'),
+    ('other', 'Activities list', 'Robotics team captain, varsity debate, volunteer tutor at the public library.'),
+]
+DOC_TYPES = [('google_doc', 'document', 'Essay draft'), ('google_sheet', 'spreadsheets', 'College list'),
+             ('google_slide', 'presentation', 'Portfolio')]
+UPLOADS = [('essay_draft.docx', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'),
+           ('resume.pdf', 'application/pdf'), ('transcript.pdf', 'application/pdf'),
+           ('portfolio.zip', 'application/zip')]
+CONSULTANT_NOTES = ['Happy to take this on!', 'I can turn this around quickly.', 'Looks like a strong start.']
+REJECTION_REASONS = ['Fully booked until after the deadline', 'Outside my area of expertise',
+                     'The deadline is too close for a thorough review']
+DELIVERY_TIMES = ['24 hours', '48 hours', '3-5 days', '1 week']
+PRICE_TIERS = ['1 Essay', '2-3 Essays', '1 Hour', '1.5 Hours']
+REQUEST_CHAT = [
+    ('consultant', 'Thanks for the details! Is the word limit 650?'),
+    ('student', 'Yes, 650 words.'),
+    ('consultant', 'Could you also share the supplemental prompt?'),
+    ('student', 'Just added it as a doc link.'),
+]
+
+def offset_date(offset):
+    """UTC date of reference_time + offset."""
+    return (reference_time + timedelta(microseconds=offset)).date()
+
+def date_offset_us(day):
+    """Offset from reference_time of midnight UTC at the start of day."""
+    return (datetime.combine(day, datetime.min.time()) - reference_time) // timedelta(microseconds=1)
+
+def request_timeline(booked_us, rng):
+    """(autosave offsets, [(status, offset)] transitions) of one request,
+    before reference_time cuts it off. Paid requests end at booked_us."""
+    saves = [0]
+    for _ in range(int(rng.expovariate(1 / MEAN_AUTOSAVES))):
+        saves.append(saves[-1] + round(rng.expovariate(1 / MEAN_AUTOSAVE_MINUTES) * 60_000_000))
+    if booked_us is not None:
+        accepted = booked_us - round(rng.uniform(0.5, 70) * HOUR_US)
+        reviewed = accepted - round(rng.uniform(1, 24) * HOUR_US)
+        submitted = reviewed - round(rng.uniform(1, 24) * HOUR_US)
+        start = submitted - saves[-1] - round(rng.uniform(1, 10) * 60_000_000)
+        transitions = [('pending_review', submitted), ('in_discussion', reviewed), ('accepted', accepted),
+                       ('paid', booked_us)]
+        return [start + save for save in saves], transitions
+    start = -round(rng.uniform(0.1, SESSION_DAYS * 24) * HOUR_US)
+    saves = [start + save for save in saves]
+    transitions = []
+    # Draw every step so the stream stays aligned however the request ends
+    submitted = saves[-1] + round(rng.uniform(1, 10) * 60_000_000)
+    reviewed = submitted + round(rng.expovariate(1 / 12) * HOUR_US)
+    decided = reviewed + round(rng.expovariate(1 / 24) * HOUR_US)
+    outcome, review, submit = rng.random(), rng.random(), rng.random()
+    if submit < P_SUBMIT:
+        transitions.append(('pending_review', submitted))
+        if review < P_REVIEW:
+            transitions.append(('in_discussion', reviewed))
+            if outcome < P_ACCEPT:
+                transitions += [('accepted', decided), ('expired', decided + REQUEST_EXPIRY_US)]
+            else:
+                transitions.append(('rejected' if outcome < P_ACCEPT + P_REJECT else 'cancelled', decided))
+        elif outcome < 0.5:
+            transitions.append(('cancelled', decided + 3 * DAY_US))
+    return saves, transitions
+
+def booking_request(r, student, consultant, service, booking, booked_us, rng):
+    """{table: rows} of the r-th booking request, for booking_requests and
+    its four child tables."""
+    saves, transitions = request_timeline(booked_us, rng)
+    purpose, requirements = rng.choice(REQUEST_PURPOSES), rng.choice(REQUEST_REQUIREMENTS)
+    deadline_days = rng.randint(7, 90)
+    urgency = rng.choices(['low', 'medium', 'high', 'urgent'], [3, 4, 2, 1])[0]
+    notes, reason = rng.choice(CONSULTANT_NOTES), rng.choice(REJECTION_REASONS)
+    delivery, tier, price = rng.choice(DELIVERY_TIMES), rng.choice(PRICE_TIERS), rng.choice([45, 60, 75, 85, 95, 120])
+    # Attachments are added during the draft, at one autosave and edited at a later one
+    inputs = [(rng.choice(TEXT_INPUTS), rng.randrange(len(saves)), rng.random()) for _ in range(rng.randint(1, 3))]
+    links = [(rng.choice(DOC_TYPES), rng.getrandbits(176), rng.randrange(len(saves)), rng.random() < 0.95)
+             for _ in range(rng.choices([0, 1, 2], [6, 3, 1])[0])]
+    uploads = [(rng.choice(UPLOADS), min(262_144_000, round(rng.lognormvariate(math.log(400_000), 1.2))),
+                rng.randrange(len(saves)), rng.choices(['completed', 'failed', 'uploading'], [18, 1, 1])[0],
+                rng.uniform(1, 60), rng.uniform(0, 6))
+               for _ in range(rng.choices([0, 1, 2], [5, 4, 1])[0])]
+    chat = [(rng.uniform(0, 1), rng.expovariate(1 / MEAN_READ_HOURS)) for _ in range(rng.randint(0, len(REQUEST_CHAT)))]
+    status_reads = [rng.expovariate(1 / MEAN_READ_HOURS) for _ in transitions]
+
+    # Cut off at reference_time: a draft keeps the saves made so far
+    saves = [save for save in saves if save < 0]
+    transitions = [(status, at) for status, at in transitions if at < 0]
+    status = transitions[-1][0] if transitions else 'draft'
+    reached = dict(transitions)
+    request_id = new_uuid('booking_requests', r, reference_unix_ms(saves[0]))
+    student_id, consultant_id = format_uuid(student), format_uuid(consultant)
+
+    accepted = reached.get('accepted')
+    stamps = format_timestamps([reached.get('pending_review'), reached.get('in_discussion'), accepted,
+                                reached.get('rejected'), reached.get('paid'),
+                                accepted + REQUEST_EXPIRY_US if accepted is not None else None,
+                                saves[-1], saves[0], max([saves[-1]] + [at for _, at in transitions])])
+    quoted = accepted is not None
+    rows = {table: [] for table in BOOKING_REQUEST_TABLES}
+    rows['booking_requests'].append({
+        'id': request_id,
+        'student_id': student_id,
+        'consultant_id': consultant_id,
+        'service_id': format_uuid(service),
+        'purpose_of_service': purpose,
+        'additional_requirements': requirements,
+        'deadline_date': (offset_date(saves[0]) + timedelta(days=deadline_days)).isoformat(),
+        'urgency_level': urgency,
+        'status': status,
+        'submitted_at': stamps[0],
+        'reviewed_at': stamps[1],
+        'accepted_at': stamps[2],
+        'rejected_at': stamps[3],
+        'paid_at': stamps[4],
+        'expires_at': stamps[5],
+        'consultant_notes': notes if 'in_discussion' in reached else '',
+        'rejection_reason': reason if status == 'rejected' else '',
+        'estimated_delivery_time': delivery if quoted else '',
+        'quoted_price': price if quoted else '',
+        'selected_tier': tier if quoted else '',
+        'booking_id': format_uuid(booking) if status == 'paid' else '',
+        'last_saved_at': stamps[6],
+        'metadata': json.dumps({'autosave_count': len(saves)}),
+        'created_at': stamps[7],
+        'updated_at': stamps[8],
+    })
+
+    for n, ((input_type, title, content), k, edit) in enumerate(inputs):
+        if k >= len(saves):
+            continue
+        created_at, updated_at = format_timestamps([saves[k], saves[k + int(edit * (len(saves) - k))]])
+        rows['booking_text_inputs'].append({
+            'id': new_uuid('booking_text_inputs', f'{r}-{n}', reference_unix_ms(saves[k])),
+            'request_id': request_id,
+            'input_type': input_type,
+            'title': title,
+            'content': content,
+            # As calculate_word_count() counts them
+            'word_count': len(content.split(' ')),
+            'display_order': n,
+            'created_at': created_at,
+            'updated_at': updated_at,
+        })
+
+    for n, ((doc_type, path, title), token, k, accessible) in enumerate(links):
+        if k >= len(saves):
+            continue
+        created_at, verified_at = format_timestamps([saves[k], saves[-1]])
+        rows['booking_doc_links'].append({
+            'id': new_uuid('booking_doc_links', f'{r}-{n}', reference_unix_ms(saves[k])),
+            'request_id': request_id,
+            'doc_url': f'https://docs.google.com/{path}/d/{token:044x}/edit',
+            'doc_title': title,
+            'doc_type': doc_type,
+            'is_accessible': 'true' if accessible else 'false',
+            'last_verified_at': verified_at,
+            'description': '',
+            'display_order': n,
+            'created_at': created_at,
+            'updated_at': created_at,
+        })
+
+    for n, ((file_name, file_type), size, k, upload_status, upload_seconds, cleanup_hours) in enumerate(uploads):
+        if k >= len(saves):
+            continue
+        created = saves[k]
+        # calculate_deletion_date(), then a cleanup job deletes the file that day
+        deletion_date = offset_date(created) + timedelta(days=UPLOAD_RETENTION_DAYS)
+        deletion_us = date_offset_us(deletion_date)
+        deleted = deletion_us + round(cleanup_hours * HOUR_US)
+        uploaded = created + round(upload_seconds * 1_000_000) if upload_status == 'completed' else None
+        created_at, uploaded_at, deleted_at = format_timestamps(
+            [created, uploaded if uploaded is not None and uploaded < 0 else None, deleted if deleted < 0 else None])
+        rows['booking_file_uploads'].append({
+            'id': new_uuid('booking_file_uploads', f'{r}-{n}', reference_unix_ms(created)),
+            'request_id': request_id,
+            'file_name': file_name,
+            'file_type': file_type,
+            'file_size': size,
+            'storage_path': f'booking-requests/{request_id}/{file_name}',
+            'upload_status': upload_status if uploaded_at or upload_status != 'completed' else 'uploading',
+            'upload_progress': 100 if uploaded_at else 0,
+            'uploaded_at': uploaded_at,
+            'scheduled_deletion_date': deletion_date.isoformat(),
+            'deletion_notified': 'true' if deletion_us - 3 * DAY_US < 0 else 'false',
+            'deleted_at': deleted_at,
+            'description': '',
+            'display_order': n,
+            'created_at': created_at,
+            'updated_at': deleted_at or uploaded_at or created_at,
+        })
+
+    # Status messages come from the consultant, like the trigger's, and the
+    # chat fills the review until the request is decided
+    messages = [(at, consultant_id, STATUS_MESSAGES[state] + (reason if state == 'rejected' else ''), read, True)
+                for (state, at), read in zip(transitions, status_reads) if STATUS_MESSAGES[state]]
+    if 'in_discussion' in reached:
+        start = reached['in_discussion']
+        end = min([at for state, at in transitions if at > start] + [0])
+        for (sender, text), (position, read) in zip(REQUEST_CHAT, sorted(chat)):
+            messages.append((start + round(position * (end - start)),
+                             consultant_id if sender == 'consultant' else student_id, text, read, False))
+    messages.sort(key=lambda message: message[0])
+    created_us = [message[0] for message in messages]
+    read_us = [at + round(read * HOUR_US) for at, _, _, read, _ in messages]
+    created_at = format_timestamps(created_us)
+    read_at = format_timestamps([read if read < 0 else None for read in read_us])
+    for n, (at, sender_id, text, _, system) in enumerate(messages):
+        rows['booking_request_messages'].append({
+            'id': new_uuid('booking_request_messages', f'{r}-{n}', reference_unix_ms(at)),
+            'request_id': request_id,
+            'sender_id': sender_id,
+            'message': text,
+            'is_read': 'true' if read_at[n] else 'false',
+            'read_at': read_at[n],
+            'is_system_message': 'true' if system else 'false',
+            'metadata': '{}',
+            'created_at': created_at[n],
+        })
+    return rows
+
+def request_parties(booked):
+    """(student key, consultant key, service key, booking key or None, booked
+    offset) of every booking request: the paid ones from booked, then the
+    rest from the popularity samplers or round robin over the consultants
+    with a service to request."""
+    paid = [(pair, value) for pair, value in booked.items() if value[2] < 0]
+    for pair, (booking, service, booked_us) in paid:
+        yield pair[:UUID_BYTES], pair[UUID_BYTES:], service, booking, booked_us
+    bookable = [consultant for consultant in range(len(consultant_ids)) if consultant_services.first(consultant)]
+    if not bookable:
+        return
+    consultant_sampler = popularity_sampler('consultants', bookable=True)
+    student_sampler = popularity_sampler('students')
+    rng = shard_rng('booking_requests', 1)
+    for r in range(len(paid), row_counts['booking_requests']):
+        student = student_sampler.draw(rng) if student_sampler else r % len(student_ids)
+        consultant = consultant_sampler.draw(rng) if consultant_sampler else bookable[r % len(bookable)]
+        service = rng.choice(consultant_services.children(consultant))
+        yield (bytes(student_ids.data[student * UUID_BYTES:(student + 1) * UUID_BYTES]),
+               bytes(consultant_ids.data[consultant * UUID_BYTES:(consultant + 1) * UUID_BYTES]),
+               bytes.fromhex(service.replace('-', '')), None, None)
+
+def booking_request_rows(booked):
+    """{table: rows} of each booking request, see booking_request."""
+    rng = shard_rng('booking_requests', 0)
+    for r, (student, consultant, service, booking, booked_us) in enumerate(request_parties(booked)):
+        yield booking_request(r, student, consultant, service, booking, booked_us, rng)
+
+def update_booking_requests_csv():
+    """Write booking_requests and its child tables. Reads the bookings written before."""
+    booked = booked_pairs('booking_requests', int(row_counts['booking_requests'] * BOOKING_REQUEST_PAID_SHARE))
+    return write_tables(BOOKING_REQUEST_TABLES, booking_request_rows(booked))
+
+# Tables that --workers splits into part files: table -> (row count that
+# drives it, fieldnames, generator(start, stop, rng) for a slice of it)
+SHARDED_TABLES = {
+    'bookings': ('bookings', BOOKINGS_FIELDNAMES, generate_bookings_rows),
+    'user_interactions': ('user_interactions', USER_INTERACTIONS_FIELDNAMES, generate_user_interactions_rows),
+    'group_session_participants': ('group_sessions', GROUP_PARTICIPANTS_FIELDNAMES, generate_group_participants_rows),
+}
+
+def part_path(table, shard):
+    return f'{table}.part-{shard:05d}.{OUTPUT_EXTENSIONS[output_format]}'
+
+def manifest_path(table):
+    return f'{table}.manifest.json'
+
+def clear_table_outputs(table, keep=()):
+    """Remove the single-file and part-file outputs of a previous run, in any
+    format, but the paths in keep that this run writes again (see write_output)."""
+    paths = [f'{table}.{extension}' for extension in OUTPUT_EXTENSIONS.values()] + [manifest_path(table)]
+    for path in paths + glob.glob(f'{table}.part-*.*'):
+        if os.path.exists(path) and path not in keep:
+            os.remove(path)
+
+def write_manifest(table, fieldnames, parts, **extra):
+    """Record the files of table in order, with the columns of COPY streams."""
+    manifest = {
+        'table': table,
+        'format': output_format,
+        'columns': output_columns(table, fieldnames),
+        **extra,
+        'rows': sum(part['rows'] for part in parts),
+        'parts': parts,
+    }
+    with open(manifest_path(table), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+def write_table(table, fieldnames, rows):
+    """Write table as a single file. Every format but CSV also gets a
+    manifest naming its columns, as COPY streams carry no header."""
+    path = table_path(table)
+    clear_table_outputs(table, keep=[path])
+    count = write_rows(table, path, fieldnames, rows)
+    if output_format != 'csv':
+        write_manifest(table, fieldnames, [{'path': path, 'rows': count}])
+    return count
+
+# write_tables hands rows to the table writers in batches of this many, with
+# at most this many batches waiting per table
+WRITER_BATCH_ROWS = 1_000
+WRITER_QUEUE_BATCHES = 16
+
+def write_tables(tables, rows):
+    """Write several tables, each as a single file, from one stream of
+    {table: rows} dicts, so rows built together are built once.
+
+    Every table is written by write_table on a thread of its own, fed
+    WRITER_BATCH_ROWS rows at a time through a bounded queue. A writer that
+    fails keeps draining its queue, so the others finish and its error is
+    raised. Returns {table: rows written}.
+    """
+    queues = {table: queue.Queue(maxsize=WRITER_QUEUE_BATCHES) for table in tables}
+
+    def table_rows(table):
+        for batch in iter(queues[table].get, None):
+            yield from batch
+
+    def write(table):
+        rows = table_rows(table)
+        try:
+            return write_table(table, tables[table], rows)
+        finally:
+            for _ in rows:
+                pass
+
+    with ThreadPoolExecutor(max_workers=len(tables)) as executor:
+        futures = {table: executor.submit(write, table) for table in tables}
+        batches = {table: [] for table in tables}
+        try:
+            for produced in rows:
+                for table, table_batch in produced.items():
+                    batch = batches[table]
+                    batch += table_batch
+                    if len(batch) >= WRITER_BATCH_ROWS:
+                        queues[table].put(batch)
+                        batches[table] = []
+            for table, batch in batches.items():
+                if batch:
+                    queues[table].put(batch)
+        finally:
+            for q in queues.values():
+                q.put(None)
+        return {table: future.result() for table, future in futures.items()}
+
+def shard_rng(table, shard):
+    """Independent, reproducible random stream for one shard of a table."""
+    return random.Random(f'{run_seed}:{table}:{shard}')
+
+def init_worker(state):
+    row_counts.update(state['row_counts'])
+    global consultant_ids, student_ids, consultant_services, group_booking_ids
+    consultant_ids = state['consultant_ids']
+    student_ids = state['student_ids']
+    consultant_services = state['consultant_services']
+    group_booking_ids = state['group_booking_ids']
+    popularity_models.update(state['popularity_models'])
+    college_boosts.update(state['college_boosts'])
+    global run_seed, seeded, reference_time, id_scheme, engine, output_format, interaction_model
+    interaction_model = state['interaction_model']
+    run_seed = state['run_seed']
+    engine = state['engine']
+    output_format = state['output_format']
+    seeded = state['seeded']
+    id_scheme = state['id_scheme']
+    reference_time = state['reference_time']
+
+def generate_shard(table, shard, start, stop):
+    count_table, fieldnames, generator = SHARDED_TABLES[table]
+    path = part_path(table, shard)
+    if table == 'bookings':
+        rows = write_bookings(path, start, stop, shard)
+    else:
+        rows = write_rows(table, path, fieldnames, generator(start, stop, shard_rng(table, shard)))
+    return {'path': path, 'rows': rows, 'start': start, 'stop': stop}
+
+def write_sharded_tables(workers, shard_rows):
+    """Generate SHARDED_TABLES in parallel, one part file per shard.
+
+    Each table gets a manifest listing its parts in order. Shards only depend
+    on the entities generated beforehand and their own RNG stream, so a part
+    comes out the same whichever worker writes it.
+    """
+    shards = {}
+    for table, (count_table, fieldnames, generator) in SHARDED_TABLES.items():
+        total = row_counts[count_table]
+        shards[table] = [(start, min(start + shard_rows, total)) for start in range(0, total, shard_rows)]
+    if interaction_model == 'sessions':
+        shards['user_interactions'] = [(0, row_counts['user_interactions'])]
+    for table, table_shards in shards.items():
+        # Bookings have one more part for the group bookings
+        parts = len(table_shards) + (table == 'bookings')
+        clear_table_outputs(table, keep=[part_path(table, shard) for shard in range(parts)])
+    
+    # Group bookings go in the last bookings part. Writing them up front
+    # registers the booking IDs that the participant shards reference.
+    group_part = part_path('bookings', len(shards['bookings']))
+    group_rows = write_rows('bookings', group_part, BOOKINGS_FIELDNAMES,
+                            generate_group_bookings_rows(shard_rng('bookings', 'group')))
+    
+    state = {
+        'row_counts': row_counts,
+        'consultant_ids': consultant_ids,
+        'student_ids': student_ids,
+        'consultant_services': consultant_services,
+        'group_booking_ids': group_booking_ids,
+        'popularity_models': popularity_models,
+        'college_boosts': college_boosts,
+        'interaction_model': interaction_model,
+        'run_seed': run_seed,
+        'seeded': seeded,
+        'id_scheme': id_scheme,
+        'reference_time': reference_time,
+        'engine': engine,
+        'output_format': output_format,
+    }
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(state,)) as pool:
+        futures = {
+            table: [pool.submit(generate_shard, table, shard, start, stop)
+                    for shard, (start, stop) in enumerate(table_shards)]
+            for table, table_shards in shards.items()
+        }
+        parts = {table: [future.result() for future in table_futures] for table, table_futures in futures.items()}
+    parts['bookings'].append({'path': group_part, 'rows': group_rows})
+    
+    for table, table_parts in parts.items():
+        write_manifest(table, SHARDED_TABLES[table][1], table_parts, seed=run_seed, shard_rows=shard_rows)
 
 def create_empty_csvs():
     # Discount codes
-    with open('discount_codes.csv', 'w', newline='') as f:
-        fieldnames = ['id', 'code', 'description', 'discount_type', 'discount_value',
-                     'minimum_purchase', 'maximum_discount', 'valid_from', 'valid_until',
-                     'max_uses', 'used_count', 'max_uses_per_user', 'consultant_id',
-                     'specific_services', 'created_by', 'is_active', 'created_at', 'updated_at']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
+    fieldnames = ['id', 'code', 'description', 'discount_type', 'discount_value',
+                  'minimum_purchase', 'maximum_discount', 'valid_from', 'valid_until',
+                  'max_uses', 'used_count', 'max_uses_per_user', 'consultant_id',
+                  'specific_services', 'created_by', 'is_active', 'created_at', 'updated_at']
+    write_table('discount_codes', fieldnames, [])
     
     # Discount usage
-    with open('discount_usage.csv', 'w', newline='') as f:
-        fieldnames = ['id', 'discount_code_id', 'booking_id', 'user_id', 
-                     'discount_applied', 'created_at']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
+    fieldnames = ['id', 'discount_code_id', 'booking_id', 'user_id', 
+                  'discount_applied', 'created_at']
+    write_table('discount_usage', fieldnames, [])
     
     # Verification queue
-    with open('verification_queue.csv', 'w', newline='') as f:
-        fieldnames = ['id', 'consultant_id', 'edu_email', 'university_name',
-                     'document_type', 'document_url', 'auto_verify_eligible',
-                     'status', 'reviewed_by', 'reviewed_at', 'admin_notes', 'created_at']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
+    fieldnames = ['id', 'consultant_id', 'edu_email', 'university_name',
+                  'document_type', 'document_url', 'auto_verify_eligible',
+                  'status', 'reviewed_by', 'reviewed_at', 'admin_notes', 'created_at']
+    write_table('verification_queue', fieldnames, [])
 
-# Save UUID mappings for reference
+# Save UUID mappings for reference, look them up with uuid_map.MappingReader
 def save_uuid_mappings():
-    mappings = {
-        'consultants': consultant_uuids,
-        'students': student_uuids,
-        'services': service_uuids,
-        'bookings': booking_uuids,
-        'interactions': interaction_uuids,
-        'waitlists': waitlist_uuids,
-        'group_sessions': group_session_uuids
-    }
-    
-    with open('uuid_mappings.json', 'w') as f:
-        json.dump(mappings, f, indent=2)
+    with MappingWriter('uuid_mappings.bin') as mappings:
+        for i, new_id in enumerate(consultant_ids):
+            mappings.add('consultants', consultant_old_id(i), new_id)
+        for i, new_id in enumerate(student_ids):
+            mappings.add('students', student_old_id(i), new_id)
+        for c in range(len(consultant_ids)):
+            for k, new_id in enumerate(consultant_services.children(c)):
+                mappings.add('services', f'{consultant_old_id(c)}-{k}', new_id)
+        for i, new_id in enumerate(group_booking_ids):
+            mappings.add('bookings', f'bg{i}', new_id)
+
+def parse_row_count(value):
+    table, _, count = value.partition('=')
+    if not count.isdigit():
+        raise argparse.ArgumentTypeError(f'expected TABLE=N, got {value!r}')
+    return table, int(count)
+
+def parse_assignment(value):
+    name, _, setting = value.partition('=')
+    if not name or not setting:
+        raise argparse.ArgumentTypeError(f'expected NAME=VALUE, got {value!r}')
+    return name, setting
+
+def parse_college_boost(value):
+    college, boost = parse_assignment(value)
+    try:
+        return college, float(boost)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'expected COLLEGE=MULTIPLIER, got {value!r}') from None
 
 # Execute all updates
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate the Proofr mock data CSV files.')
+    parser.add_argument('--scale', type=int, default=1,
+                        help='multiply every table of the base dataset by this factor')
+    parser.add_argument('--rows', type=parse_row_count, action='append', default=[], metavar='TABLE=N',
+                        help=f'override the row count of one table ({", ".join(BASE_ROW_COUNTS)})')
+    parser.add_argument('--popularity', type=parse_assignment, action='append', default=[], metavar='TABLE=MODEL',
+                        help='how bookings and interactions pick consultants or students: uniform (round robin), '
+                             'zipf:S or pareto:A (see popularity.py)')
+    parser.add_argument('--college-boost', type=parse_college_boost, action='append', default=[],
+                        metavar='COLLEGE=N', help='multiply the popularity of the consultants of one college')
+    parser.add_argument('--interactions', choices=['fixed', 'sessions'], default='fixed',
+                        help='sessions simulates browsing sessions and writes user_interactions and '
+                             'consultant_views in created_at order')
+    parser.add_argument('--seed', type=int,
+                        help='reproducible run: seeded RNG streams, hash-derived IDs and a fixed reference time')
+    parser.add_argument('--reference-time', metavar='ISO8601',
+                        help='instant all dates are relative to (default: now, or 2025-07-15T12:00 with --seed)')
+    parser.add_argument('--id-scheme', choices=['uuid4', 'uuid7'], default='uuid4',
+                        help='uuid7 derives time-ordered primary keys from each row\'s created_at')
+    parser.add_argument('--engine', choices=['rows', 'numpy'], default='rows',
+                        help='numpy generates regular bookings as whole columns (needs NumPy)')
+    parser.add_argument('--format', choices=list(OUTPUT_EXTENSIONS), default='csv',
+                        help='csv files, Postgres COPY streams in text (.copy) or binary (.bin) format, '
+                             'or typed .parquet or .arrow files (needs pyarrow)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help=f'generate {", ".join(SHARDED_TABLES)} as part files in this many processes')
+    parser.add_argument('--shard-rows', type=int, default=1_000_000,
+                        help='rows per part file in --workers mode (group sessions for participants)')
+    args = parser.parse_args()
+    
+    try:
+        configure_row_counts(args.scale, dict(args.rows))
+        configure_popularity(dict(args.popularity), dict(args.college_boost))
+        if args.seed is not None:
+            configure_seed(args.seed)
+        if args.reference_time is not None:
+            configure_reference_time(args.reference_time)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.engine == 'numpy' and np is None:
+        parser.error('--engine numpy needs NumPy: pip install numpy')
+    if args.format in pg_arrow.EXTENSIONS and pg_arrow.pa is None:
+        parser.error(f'--format {args.format} needs pyarrow: pip install pyarrow')
+    if args.engine == 'numpy' and args.format not in ('csv', 'text'):
+        parser.error('--engine numpy writes csv or text output')
+    id_scheme = args.id_scheme
+    engine = args.engine
+    output_format = args.format
+    interaction_model = args.interactions
+    build_entity_uuids()
+    
     print("Generating proper UUIDs and updating all CSV files...")
+    print("Row counts: " + ", ".join(f"{table}={count}" for table, count in row_counts.items()))
+    print(f"Reference time: {reference_time.isoformat()}Z")
+    if args.popularity or args.college_boost:
+        print("Popularity: " + ", ".join([f"{table}={model}" for table, model in args.popularity]
+                                         + [f"{college} x{boost:g}" for college, boost in args.college_boost]))
     
     update_users_csv()
     print("✓ Users CSV updated")
@@ -1479,19 +2893,39 @@ if __name__ == '__main__':
     
     update_services_csv()
     print("✓ Services CSV updated")
+    skipped = consultants_without_services()
+    if skipped:
+        print(f"! {skipped} consultants have no services, their bookings are skipped")
     
-    update_bookings_csv()
-    print("✓ Bookings CSV updated")
+    if args.workers > 1:
+        write_sharded_tables(args.workers, args.shard_rows)
+        print(f"✓ Bookings, user interactions and group participants parts written by {args.workers} workers")
+    else:
+        update_bookings_csv()
+        print("✓ Bookings CSV updated")
+        
+        update_user_interactions_csv()
+        print("✓ User interactions CSV updated")
+        
+        update_group_participants_csv()
+        print("✓ Group participants CSV updated")
+    
+    update_conversations_csv()
+    print("✓ Conversations and messages CSV updated")
     
-    update_user_interactions_csv()
-    print("✓ User interactions CSV updated")
+    update_booking_requests_csv()
+    print("✓ Booking requests CSV updated")
+    
+    if interaction_model == 'sessions':
+        update_consultant_views_csv()
+        print("✓ Consultant views CSV updated")
+    else:
+        # Left by an earlier sessions run, its IDs would not match
+        clear_table_outputs('consultant_views')
     
     update_waitlist_csv()
     print("✓ Waitlist CSV updated")
     
-    update_group_participants_csv()
-    print("✓ Group participants CSV updated")
-    
     create_empty_csvs()
     print("✓ Empty CSV files created")
     
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# Browsing sessions of students as one stream of events in time order, for
+# generate_uuids.py --interactions sessions.
+#
+# Every student starts sessions as a Poisson process at its own rate. A
+# session may open with a search, then views a geometric number of
+# consultants, some of their services, and may book one. A booking is
+# completed two days later and may then be rated. The students' streams are
+# merged on one heap keyed by event time: it holds each student's next
+# session start plus the events already scheduled, so the output comes out
+# in created_at order while memory grows with the number of students, not
+# with the number of events.
+#
+#   python interaction_sessions.py 50 5   # students, sessions per student per day
+import heapq
+import itertools
+import random
+import sys
+
+SEARCH, VIEW, VIEW_SERVICE, BOOKED, COMPLETED, RATED = 'search', 'view', 'view_service', 'booked', 'completed', 'rated'
+# Funnel: chance of a search opening the session, of each further consultant
+# view, of viewing a service of a viewed consultant, of booking a viewed
+# service, and of a booking being completed and then rated
+P_SEARCH = 0.6
+P_ANOTHER_VIEW = 0.5
+P_VIEW_SERVICE = 0.4
+P_BOOK = 0.15
+P_COMPLETE = 0.8
+P_RATE = 0.6
+MEAN_STEP_SECONDS = 90
+SECOND_US = 1_000_000
+DAY_US = 86_400 * SECOND_US
+COMPLETION_DELAY_US = 2 * DAY_US
+RATING_DELAY_US = DAY_US // 2
+SERVICE_TYPES = ['essay_review', 'mock_interview', 'test_prep', 'application_help']
+REFERRERS = ['recommendation', 'direct']
+
+def events_per_session():
+    """Expected number of events of one session, to size the arrival rates."""
+    views = 1 / (1 - P_ANOTHER_VIEW)
+    bookings = views * P_VIEW_SERVICE * P_BOOK
+    return P_SEARCH + views * (1 + P_VIEW_SERVICE) + bookings * (1 + P_COMPLETE * (1 + P_RATE))
+
+def session_events(start, rng, pick_consultant):
+    """(time, kind, consultant, detail) of one session starting at start.
+
+    detail is the service type of searches and service views, (referrer,
+    search query) of consultant views and the rating of ratings.
+    """
+    events = []
+    query = None
+    if rng.random() < P_SEARCH:
+        query = rng.choice(SERVICE_TYPES)
+        events.append((start, SEARCH, None, query))
+    time = start
+    while True:
+        time += round(rng.expovariate(1 / MEAN_STEP_SECONDS) * SECOND_US)
+        consultant = pick_consultant(rng)
+        # The first view after a search comes from its results
+        referrer = ('search', query.replace('_', ' ')) if query else (rng.choice(REFERRERS), None)
+        query = None
+        events.append((time, VIEW, consultant, referrer))
+        if rng.random() < P_VIEW_SERVICE:
+            time += round(rng.expovariate(1 / MEAN_STEP_SECONDS) * SECOND_US)
+            service_type = rng.choice(SERVICE_TYPES)
+            events.append((time, VIEW_SERVICE, consultant, service_type))
+            if rng.random() < P_BOOK:
+                time += round(rng.expovariate(1 / MEAN_STEP_SECONDS) * SECOND_US)
+                events.append((time, BOOKED, consultant, service_type))
+                if rng.random() < P_COMPLETE:
+                    events.append((time + COMPLETION_DELAY_US, COMPLETED, consultant, service_type))
+                    if rng.random() < P_RATE:
+                        events.append((time + COMPLETION_DELAY_US + RATING_DELAY_US, RATED, consultant,
+                                       rng.choice([4, 5])))
+        if rng.random() >= P_ANOTHER_VIEW:
+            return events
+
+def simulate(rates, start, stop, rng, pick_consultant):
+    """Events of every student's sessions in [start, stop), in time order.
+
+    rates[i] is student i's sessions per day, times are integer microseconds
+    and pick_consultant(rng) returns the ordinal of a viewed consultant.
+    Yields (time, student, session, kind, consultant, detail), sessions
+    numbered in order of their start. Events after stop are dropped.
+    """
+    order = itertools.count()
+    # (time, tie breaker, student, session, event), event None for a session start
+    heap = [(start + round(rng.expovariate(rate) * DAY_US), next(order), student, None, None)
+            for student, rate in enumerate(rates) if rate > 0]
+    heapq.heapify(heap)
+    sessions = itertools.count()
+    while heap:
+        time, _, student, session, event = heapq.heappop(heap)
+        if time >= stop:
+            continue
+        if event is None:
+            session = next(sessions)
+            for scheduled in session_events(time, rng, pick_consultant):
+                heapq.heappush(heap, (scheduled[0], next(order), student, session, scheduled))
+            heapq.heappush(heap, (time + round(rng.expovariate(rates[student]) * DAY_US), next(order),
+                                  student, None, None))
+            continue
+        yield (time, student, session) + event[1:]
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit('usage: interaction_sessions.py STUDENTS SESSIONS_PER_DAY')
+    students, per_day = int(sys.argv[1]), float(sys.argv[2])
+    events = list(simulate([per_day] * students, 0, DAY_US, random.Random(0), lambda rng: rng.randrange(15)))
+    kinds = {}
+    for event in events:
+        kinds[event[3]] = kinds.get(event[3], 0) + 1
+    print(f'{len(events)} events in a day, {events_per_session():.2f} expected per session')
+    for kind, count in kinds.items():
+        print(f'  {kind:<14} {count}')
+    print(f'in time order: {all(a[0] <= b[0] for a, b in zip(events, events[1:]))}')
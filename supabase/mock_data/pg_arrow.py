@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# Write generated rows as typed Parquet or Arrow IPC files, and read them back,
+# for the notebooks and test fixtures that would otherwise re-parse CSV text.
+#
+# Column types follow schema.parse_migrations() like pg_copy.py: uuid is a
+# 16-byte fixed-size binary, timestamptz a UTC microsecond timestamp,
+# numeric(p,s) a decimal, arrays are lists and enum columns are dictionary
+# encoded with the enum's labels as the dictionary. jsonb, json and int4range
+# keep their text form. Needs pyarrow (pip install pyarrow).
+#
+# Arrow IPC files are written uncompressed, so read_table memory-maps them and
+# the columns it returns point straight into the file: nothing is copied or
+# decoded until it is used. Parquet files are compressed and have to be
+# decoded, but only the requested columns are read.
+#
+#   python pg_arrow.py . bookings status final_price
+import json
+import os
+import sys
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+
+import pg_copy
+import schema
+
+BATCH_ROWS = 65_536
+# Numeric text is parsed at this scale, then rounded to the column's scale
+# like Postgres rounds it
+PARSE_SCALE = 18
+# numeric without a precision
+DEFAULT_DECIMAL = (38, 10)
+EXTENSIONS = {'parquet': 'parquet', 'arrow': 'arrow'}
+
+def require_pyarrow():
+    if pa is None:
+        raise RuntimeError('Parquet and Arrow output need pyarrow: pip install pyarrow')
+
+def decimal_type(pg_type):
+    modifiers = pg_type.removesuffix('[]').partition('(')[2].rstrip(')')
+    precision, _, scale = modifiers.partition(',')
+    if not precision.strip():
+        return pa.decimal128(*DEFAULT_DECIMAL)
+    return pa.decimal128(int(precision), int(scale or 0))
+
+def scalar_type(name, pg_type):
+    enums = schema.migrations_schema()['enums']
+    if name in enums:
+        return pa.dictionary(pa.int8() if len(enums[name]) < 128 else pa.int16(), pa.string())
+    if name == 'numeric':
+        return decimal_type(pg_type)
+    return {
+        'uuid': pa.binary(16),
+        'timestamptz': pa.timestamp('us', tz='UTC'),
+        'date': pa.date32(),
+        'integer': pa.int32(),
+        'bigint': pa.int64(),
+        'smallint': pa.int16(),
+        'boolean': pa.bool_(),
+    }.get(name, pa.string())
+
+def arrow_type(pg_type):
+    name, is_array = pg_copy.base_type(pg_type)
+    element = scalar_type(name, pg_type)
+    if is_array:
+        # Lists hold plain values, dictionaries are only used for whole columns
+        return pa.list_(pa.string() if pa.types.is_dictionary(element) else element)
+    return element
+
+def arrow_schema(table, fieldnames):
+    """Arrow schema of the fieldnames of table. The Postgres types are kept
+    in the schema metadata and enum labels in their field's metadata."""
+    types = pg_copy.column_types(table)
+    columns = schema.migrations_schema()['tables'][table]
+    enums = schema.migrations_schema()['enums']
+    fields = []
+    for name in fieldnames:
+        field = pa.field(name, arrow_type(types[name]), nullable=not columns[name]['not_null'])
+        if pa.types.is_dictionary(field.type):
+            field = field.with_metadata({'labels': json.dumps(enums[pg_copy.base_type(types[name])[0]])})
+        fields.append(field)
+    metadata = {'table': table, 'pg_types': json.dumps({name: types[name] for name in fieldnames})}
+    return pa.schema(fields, metadata=metadata)
+
+def text(value):
+    """A generated value as the text Arrow casts from, None for NULL."""
+    if pg_copy.is_null(value):
+        return None
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+def array_items(value):
+    if pg_copy.is_null(value):
+        return None
+    if isinstance(value, str):
+        value = json.loads(value) if value.startswith('[') else pg_copy.parse_array(value)
+    return [None if item is None else str(item) for item in value]
+
+def build_column(values, field):
+    """Arrow array of one column's generated values."""
+    kind = field.type
+    if pa.types.is_list(kind):
+        strings = pa.array([array_items(value) for value in values], pa.list_(pa.string()))
+        if pa.types.is_decimal(kind.value_type):
+            parsed = strings.cast(pa.list_(pa.decimal128(38, PARSE_SCALE)))
+            rounded = pc.round(pc.list_flatten(parsed), kind.value_type.scale)
+            return pa.ListArray.from_arrays(parsed.offsets, rounded.cast(kind.value_type), mask=parsed.is_null())
+        return strings.cast(kind)
+    if pa.types.is_fixed_size_binary(kind):
+        return pa.array([None if pg_copy.is_null(value) else bytes.fromhex(str(value).replace('-', ''))
+                         for value in values], kind)
+    # Most values already are strings, so only the others go through text()
+    strings = pa.array([(value or None) if value.__class__ is str else text(value) for value in values], pa.string())
+    if pa.types.is_dictionary(kind):
+        return dictionary_column(strings, field)
+    if pa.types.is_decimal(kind):
+        return pc.round(strings.cast(pa.decimal128(38, PARSE_SCALE)), kind.scale).cast(kind)
+    return strings.cast(kind)
+
+def dictionary_column(strings, field):
+    """Dictionary array whose dictionary is the whole enum, so every batch
+    and file of a table shares it."""
+    labels = pa.array(json.loads(field.metadata[b'labels']), pa.string())
+    indices = pc.index_in(strings, value_set=labels)
+    missing = pc.and_(pc.is_null(indices), pc.is_valid(strings))
+    if pc.any(missing).as_py():
+        bad = strings.filter(missing)[0].as_py()
+        raise ValueError(f'{field.name} {bad!r} is not one of {labels.to_pylist()}')
+    return pa.DictionaryArray.from_arrays(indices.cast(field.type.index_type), labels)
+
+def record_batches(arrow, rows):
+    """Record batches of BATCH_ROWS rows, built column by column."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_ROWS:
+            yield to_batch(batch, arrow)
+            batch = []
+    if batch:
+        yield to_batch(batch, arrow)
+
+def to_batch(rows, arrow):
+    return pa.RecordBatch.from_arrays([build_column([row[field.name] for row in rows], field) for field in arrow],
+                                      schema=arrow)
+
+def write_arrow(path, table, fieldnames, rows, file_format='parquet'):
+    """Write dict rows of table to path as Parquet or an Arrow IPC file,
+    one row group or record batch per BATCH_ROWS rows. Returns the number
+    of rows written."""
+    require_pyarrow()
+    arrow = arrow_schema(table, fieldnames)
+    count = 0
+    if file_format == 'parquet':
+        writer = pq.ParquetWriter(path, arrow, compression='zstd')
+    else:
+        writer = pa.ipc.new_file(path, arrow)
+    with writer:
+        for batch in record_batches(arrow, rows):
+            writer.write_batch(batch)
+            count += batch.num_rows
+    return count
+
+def table_paths(directory, table):
+    """(format, paths) of table's Parquet or Arrow files, from its manifest."""
+    with open(os.path.join(directory, f'{table}.manifest.json')) as f:
+        manifest = json.load(f)
+    if manifest['format'] not in EXTENSIONS:
+        raise ValueError(f"{table} was written as {manifest['format']}, not Parquet or Arrow")
+    return manifest['format'], [os.path.join(directory, part['path']) for part in manifest['parts']]
+
+def read_file(path, file_format, columns=None):
+    if file_format == 'parquet':
+        return pq.read_table(path, columns=columns, memory_map=True)
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    return table.select(columns) if columns else table
+
+def read_table(directory, table, columns=None):
+    """Table as one pyarrow.Table of only the given columns.
+
+    Arrow files are memory-mapped and not copied: the columns reference the
+    mapped pages. Each part becomes a chunk of the result, which copies
+    nothing either.
+    """
+    require_pyarrow()
+    file_format, paths = table_paths(directory, table)
+    return pa.concat_tables([read_file(path, file_format, columns) for path in paths])
+
+def iter_rows(path, file_format, columns=None):
+    """Rows of one file as lists of Python values, a record batch at a time."""
+    for batch in read_file(path, file_format, columns).to_batches():
+        yield from zip(*(column.to_pylist() for column in batch.columns))
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        sys.exit('usage: pg_arrow.py DIRECTORY TABLE [COLUMN...]')
+    result = read_table(sys.argv[1], sys.argv[2], sys.argv[3:] or None)
+    print(result.schema)
+    print(f'{result.num_rows} rows')
+    print(result.slice(0, 5))
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# Encode generated rows as PostgreSQL COPY streams, in the text format or the
+# binary format, typed after the columns of schema.parse_migrations().
+#
+# Values arrive the way the generators build them: strings, numbers, bools,
+# lists for array columns and JSON already serialized to text. An empty
+# string or None is NULL, like an unquoted empty field in the CSV files.
+import json
+import re
+import struct
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import schema
+
+BINARY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00'
+PG_EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+PG_EPOCH_DATE = date(2000, 1, 1)
+TIMESTAMP_UNIT = timedelta(microseconds=1)
+
+# Element type OIDs that binary arrays must carry
+ELEMENT_OIDS = {'text': 25, 'varchar': 1043, 'numeric': 1700, 'uuid': 2950, 'integer': 23,
+                'bigint': 20, 'smallint': 21, 'boolean': 16, 'timestamptz': 1184, 'date': 1082, 'jsonb': 3802}
+TYPE_ALIASES = {'int': 'integer', 'int4': 'integer', 'int8': 'bigint', 'int2': 'smallint', 'bool': 'boolean',
+                'decimal': 'numeric', 'character varying': 'varchar', 'timestamp with time zone': 'timestamptz'}
+
+def column_types(table):
+    return {column: info['type'] for column, info in schema.migrations_schema()['tables'][table].items()}
+
+def copy_columns(table, fieldnames):
+    """The fieldnames COPY can write: generated columns are computed by Postgres."""
+    columns = schema.migrations_schema()['tables'][table]
+    missing = [name for name in fieldnames if name not in columns]
+    if missing:
+        raise ValueError(f'{table} has no column {", ".join(missing)} in the migrations')
+    return [name for name in fieldnames if not columns[name]['generated']]
+
+def base_type(pg_type):
+    """(element type without modifiers, is_array) of a column type."""
+    is_array = pg_type.endswith('[]')
+    name = re.sub(r'\(.*\)', '', pg_type.removesuffix('[]')).strip()
+    name = TYPE_ALIASES.get(name, name)
+    if name not in ELEMENT_OIDS and name not in ('json', 'int4range') and name not in schema.migrations_schema()['enums']:
+        raise ValueError(f'no COPY encoding for type {pg_type}')
+    return name, is_array
+
+def is_null(value):
+    return value is None or value == ''
+
+def array_literal(values):
+    """Postgres array literal of a (possibly nested) list, e.g. {MIT,"UC Berkeley"}."""
+    return '{' + ','.join(array_element(value) for value in values) + '}'
+
+def array_element(value):
+    if isinstance(value, list):
+        return array_literal(value)
+    if value is None:
+        return 'NULL'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    text = str(value)
+    if text == '' or text.upper() == 'NULL' or re.search(r'[{},"\\\s]', text):
+        return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+    return text
+
+# One token of an array literal: a quoted element, a brace or comma, or an
+# unquoted element (which may contain backslash escapes and inner spaces)
+ARRAY_TOKEN = re.compile(r'\s*(?:"((?:[^"\\]|\\.)*)"|([{},])|((?:[^{},"\\]|\\.)+))', re.DOTALL)
+ARRAY_ESCAPE = re.compile(r'\\(.)', re.DOTALL)
+# One-dimensional literals without backslashes, by far the most common kind,
+# are validated and split by two regex calls instead of a token loop
+FLAT_ITEM = r'(?:"[^"\\]*"|[^{},"\\\s](?:[^{},"\\]*[^{},"\\\s])?)'
+FLAT_ARRAY = re.compile(r'\{\s*(?:' + FLAT_ITEM + r'\s*(?:,\s*' + FLAT_ITEM + r'\s*)*)?\}')
+FLAT_ELEMENT = re.compile(r'"([^"]*)"|([^,\s](?:[^,]*[^,\s])?)')
+
+def parse_array(literal):
+    """Nested list of a Postgres array literal, the inverse of array_literal.
+
+    Elements come back as strings, unquoted NULL as None:
+    '{MIT,"UC Berkeley",NULL,{1,2}}' -> ['MIT', 'UC Berkeley', None, ['1', '2']].
+    Raises ValueError for anything that is not a single array literal.
+    """
+    if FLAT_ARRAY.fullmatch(literal):
+        return [quoted if not bare else None if bare.upper() == 'NULL' else bare
+                for quoted, bare in FLAT_ELEMENT.findall(literal, 1, len(literal) - 1)]
+    stack, result, pos = [], None, 0
+    # '{', ',' or None after an element, which a comma or '}' must follow:
+    # an element is never empty, so {,} and {a,} are malformed like in Postgres
+    previous = None
+    while result is None:
+        match = ARRAY_TOKEN.match(literal, pos)
+        if not match or (not stack and match.group(2) != '{'):
+            raise ValueError(f'malformed array literal {literal!r}')
+        pos = match.end()
+        quoted, punctuation, bare = match.groups()
+        if (previous is None and stack and punctuation != ',' and punctuation != '}'
+                or previous == ',' and punctuation in (',', '}') or previous == '{' and punctuation == ','):
+            raise ValueError(f'malformed array literal {literal!r}')
+        previous = punctuation if punctuation in ('{', ',') else None
+        if punctuation == '{':
+            stack.append([])
+        elif punctuation == '}':
+            done = stack.pop()
+            if stack:
+                stack[-1].append(done)
+            else:
+                result = done
+        elif quoted is not None:
+            stack[-1].append(ARRAY_ESCAPE.sub(r'\1', quoted))
+        elif bare is not None:
+            bare = bare.strip()
+            stack[-1].append(None if bare.upper() == 'NULL' else ARRAY_ESCAPE.sub(r'\1', bare))
+    if literal[pos:].strip():
+        raise ValueError(f'malformed array literal {literal!r}')
+    return result
+
+def text_value(value):
+    """A non-NULL value as Postgres input text."""
+    if isinstance(value, list):
+        return array_literal(value)
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+TEXT_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+def encode_text_row(values):
+    """One line of COPY text format."""
+    return '\t'.join('\\N' if is_null(value) else text_value(value).translate(TEXT_ESCAPES)
+                     for value in values) + '\n'
+
+def parse_timestamp(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+def encode_numeric(value):
+    """Binary numeric: base 10000 digits with a weight, sign and display scale."""
+    sign, digits, exponent = Decimal(str(value)).as_tuple()
+    digits = ''.join(map(str, digits))
+    if exponent > 0:
+        digits += '0' * exponent
+        exponent = 0
+    scale = -exponent
+    digits = digits.rjust(scale + 1, '0')
+    integer, fraction = digits[:len(digits) - scale], digits[len(digits) - scale:]
+    integer = integer.rjust(-(-len(integer) // 4) * 4, '0')
+    fraction = fraction.ljust(-(-len(fraction) // 4) * 4, '0')
+    groups = [int(part[i:i+4]) for part in (integer, fraction) for i in range(0, len(part), 4)]
+    weight = len(integer) // 4 - 1
+    while groups and groups[0] == 0:
+        groups.pop(0)
+        weight -= 1
+    while groups and groups[-1] == 0:
+        groups.pop()
+    if not groups:
+        weight = 0
+    return struct.pack(f'>hhHH{len(groups)}H', len(groups), weight, 0x4000 if sign else 0, scale, *groups)
+
+def encode_int4range(value):
+    """Binary int4range from its text form, e.g. [50,150]."""
+    if value.strip().lower() == 'empty':
+        return b'\x01'
+    lower, upper = value.strip()[1:-1].split(',')
+    flags = (0x02 if value.strip()[0] == '[' else 0) | (0x04 if value.strip()[-1] == ']' else 0)
+    data = b''
+    if lower.strip():
+        data += struct.pack('>ii', 4, int(lower))
+    else:
+        flags |= 0x08
+    if upper.strip():
+        data += struct.pack('>ii', 4, int(upper))
+    else:
+        flags |= 0x10
+    return bytes([flags]) + data
+
+def encode_binary_scalar(name, value):
+    if name == 'uuid':
+        return uuid.UUID(str(value)).bytes
+    if name == 'integer':
+        return struct.pack('>i', int(value))
+    if name == 'bigint':
+        return struct.pack('>q', int(value))
+    if name == 'smallint':
+        return struct.pack('>h', int(value))
+    if name == 'boolean':
+        return b'\x01' if value is True or str(value).lower() in ('true', 't') else b'\x00'
+    if name == 'numeric':
+        return encode_numeric(value)
+    if name == 'timestamptz':
+        return struct.pack('>q', (parse_timestamp(value) - PG_EPOCH) // TIMESTAMP_UNIT)
+    if name == 'date':
+        return struct.pack('>i', (date.fromisoformat(str(value)) - PG_EPOCH_DATE).days)
+    if name == 'jsonb':
+        text = value if isinstance(value, str) else json.dumps(value)
+        return b'\x01' + text.encode()
+    if name == 'int4range':
+        return encode_int4range(value)
+    # text, varchar, json and enum labels are sent as their UTF-8 text
+    return (value if isinstance(value, str) else json.dumps(value) if name == 'json' else str(value)).encode()
+
+def encode_binary_array(name, values):
+    """Binary array of a (possibly nested, rectangular) list. Only None
+    elements are NULL, an empty string is an empty element."""
+    if name not in ELEMENT_OIDS:
+        raise ValueError(f'no binary COPY encoding for {name}[]')
+    if not isinstance(values, list):
+        raise TypeError(f'{name}[] value must be a list, got {values!r}')
+    dims, level = [], values
+    while isinstance(level, list):
+        dims.append(len(level))
+        level = level[0] if level else None
+    if not dims or dims[0] == 0:
+        return struct.pack('>iiI', 0, 0, ELEMENT_OIDS[name])
+    flat = values
+    for _ in range(len(dims) - 1):
+        flat = [item for sub in flat for item in sub]
+    has_null = any(item is None for item in flat)
+    data = struct.pack('>iiI', len(dims), has_null, ELEMENT_OIDS[name])
+    data += b''.join(struct.pack('>ii', size, 1) for size in dims)
+    for item in flat:
+        if item is None:
+            data += struct.pack('>i', -1)
+        else:
+            encoded = encode_binary_scalar(name, item)
+            data += struct.pack('>i', len(encoded)) + encoded
+    return data
+
+def binary_encoders(types):
+    """One function per column turning a non-NULL value into its binary form."""
+    encoders = []
+    for pg_type in types:
+        name, is_array = base_type(pg_type)
+        if is_array:
+            encoders.append(lambda value, name=name: encode_binary_array(name, value))
+        else:
+            encoders.append(lambda value, name=name: encode_binary_scalar(name, value))
+    return encoders
+
+def encode_binary_row(values, encoders):
+    data = [struct.pack('>h', len(values))]
+    for value, encode in zip(values, encoders):
+        if is_null(value):
+            data.append(b'\xff\xff\xff\xff')
+        else:
+            encoded = encode(value)
+            data.append(struct.pack('>i', len(encoded)))
+            data.append(encoded)
+    return b''.join(data)
+
+def write_copy(path, table, fieldnames, rows, binary=False):
+    """Write dict rows as a COPY stream of table's fieldnames to path.
+
+    Load it with COPY table (columns) FROM STDIN, adding (FORMAT binary) for
+    binary files, where columns is copy_columns(table, fieldnames). Returns
+    the number of rows written.
+    """
+    columns = copy_columns(table, fieldnames)
+    types = column_types(table)
+    count = 0
+    if binary:
+        encoders = binary_encoders([types[column] for column in columns])
+        with open(path, 'wb') as f:
+            f.write(BINARY_SIGNATURE + struct.pack('>ii', 0, 0))
+            for row in rows:
+                f.write(encode_binary_row([row[column] for column in columns], encoders))
+                count += 1
+            f.write(struct.pack('>h', -1))
+    else:
+        with open(path, 'w', newline='') as f:
+            for row in rows:
+                f.write(encode_text_row([row[column] for column in columns]))
+                count += 1
+    return count
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# Heavy-tailed popularity of consultants and students, so generated bookings
+# and interactions have hot consultants and whale students instead of the
+# perfectly even round robin of the hand-curated data.
+#
+# A model is 'uniform', 'zipf:S' (the k-th most popular entity has weight
+# 1/k^S, k in a seeded random order) or 'pareto:A' (every entity draws a
+# Pareto(A) weight, so the heavy users are spread at random and their share
+# varies). Entities are then drawn with Vose's alias method: building the
+# table is O(n), and every draw is one uniform number, one lookup and one
+# comparison, done for a whole column at once with NumPy.
+#
+#   python popularity.py zipf:1.1 1500 100000
+import random
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MODELS = ('uniform', 'zipf', 'pareto')
+
+def parse_model(text):
+    """(kind, parameter) of a model string such as 'zipf:1.2'."""
+    kind, _, parameter = text.partition(':')
+    if kind not in MODELS:
+        raise ValueError(f'unknown popularity model {text!r}, expected one of {", ".join(MODELS)}')
+    if kind == 'uniform':
+        if parameter:
+            raise ValueError('the uniform popularity model takes no parameter')
+        return kind, None
+    try:
+        value = float(parameter)
+    except ValueError:
+        raise ValueError(f'{kind} needs a numeric parameter, e.g. {kind}:1.2') from None
+    if value <= 0:
+        raise ValueError(f'{kind} needs a positive parameter, got {parameter}')
+    return kind, value
+
+def model_weights(model, count, rng):
+    """Unnormalised weights of count entities under model, drawn from rng."""
+    kind, parameter = model
+    if kind == 'uniform':
+        return [1.0] * count
+    if kind == 'pareto':
+        return [rng.paretovariate(parameter) for _ in range(count)]
+    ranks = list(range(count))
+    rng.shuffle(ranks)
+    return [1 / (rank + 1) ** parameter for rank in ranks]
+
+class AliasSampler:
+    """Draws indexes in proportion to weights in O(1) per draw (Vose)."""
+
+    def __init__(self, weights):
+        count = len(weights)
+        total = sum(weights)
+        if not count or total <= 0:
+            raise ValueError('popularity weights are all zero')
+        scaled = [weight * count / total for weight in weights]
+        self.prob = [0.0] * count
+        self.alias = list(range(count))
+        small = [i for i, value in enumerate(scaled) if value < 1]
+        large = [i for i, value in enumerate(scaled) if value >= 1]
+        while small and large:
+            less, more = small.pop(), large[-1]
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] += scaled[less] - 1
+            if scaled[more] < 1:
+                small.append(large.pop())
+        # What is left is 1 up to rounding, unless it never had any weight
+        heaviest = max(range(count), key=weights.__getitem__)
+        for i in small + large:
+            self.prob[i] = 1.0 if weights[i] > 0 else 0.0
+            self.alias[i] = i if weights[i] > 0 else heaviest
+        self.count = count
+        if np is not None:
+            self.prob_array = np.array(self.prob)
+            self.alias_array = np.array(self.alias, dtype=np.int64)
+
+    def draw(self, rng):
+        """One index, from a random.Random."""
+        u = rng.random() * self.count
+        i = int(u)
+        return i if u - i < self.prob[i] else self.alias[i]
+
+    def sample(self, rng, size):
+        """size indexes as a NumPy array, from a numpy.random.Generator."""
+        u = rng.random(size) * self.count
+        i = u.astype(np.int64)
+        return np.where(u - i < self.prob_array[i], i, self.alias_array[i])
+
+def top_share(counts, fraction):
+    """Share of all draws that went to the most drawn fraction of entities."""
+    ordered = sorted(counts, reverse=True)
+    return sum(ordered[:max(1, int(len(ordered) * fraction))]) / max(1, sum(ordered))
+
+if __name__ == '__main__':
+    if len(sys.argv) != 4:
+        sys.exit('usage: popularity.py MODEL ENTITIES DRAWS')
+    model, entities, draws = parse_model(sys.argv[1]), int(sys.argv[2]), int(sys.argv[3])
+    sampler = AliasSampler(model_weights(model, entities, random.Random(0)))
+    counts = [0] * entities
+    rng = random.Random(1)
+    for _ in range(draws):
+        counts[sampler.draw(rng)] += 1
+    for fraction in (0.01, 0.1, 0.2):
+        print(f'top {fraction:.0%} of {entities} entities: {top_share(counts, fraction):.1%} of {draws} draws')
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# Table definitions parsed from supabase/migrations/*.sql, so the mock data
+# tools follow the schema instead of keeping their own copy of it.
+#
+# Only the statements the tools need are understood: CREATE TYPE ... AS ENUM
+# and the columns, NOT NULL, CHECK constraints and foreign keys of CREATE
+# TABLE (constraints.py turns the constraints into row validators). A
+# *_fixed.sql migration replaces the file it fixes, and otherwise the first
+# definition of a table wins, like running the files in order (later CREATE
+# TABLE IF NOT EXISTS are no-ops).
+import glob
+import os
+import re
+import sys
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'migrations')
+
+CREATE_TYPE = re.compile(r'CREATE\s+TYPE\s+(?:public\.)?(\w+)\s+AS\s+ENUM\s*\(([^)]*)\)', re.IGNORECASE)
+CREATE_TABLE = re.compile(r'CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?(?:public\.)?(\w+)\s*\(', re.IGNORECASE)
+REFERENCES = re.compile(r'REFERENCES\s+(?:(\w+)\.)?(\w+)\s*(?:\(\s*(\w+)\s*\))?', re.IGNORECASE)
+FOREIGN_KEY = re.compile(r'(?:CONSTRAINT\s+\w+\s+)?FOREIGN\s+KEY\s*\(\s*(\w+)\s*\)\s*(REFERENCES.*)', re.IGNORECASE | re.DOTALL)
+CHECK = re.compile(r'\bCHECK\s*\(', re.IGNORECASE)
+CONSTRAINT_NAME = re.compile(r'CONSTRAINT\s+(\w+)', re.IGNORECASE)
+PRIMARY_KEY = re.compile(r'(?:CONSTRAINT\s+\w+\s+)?PRIMARY\s+KEY\s*\(([^)]*)\)', re.IGNORECASE)
+TABLE_CONSTRAINT = re.compile(r'(CONSTRAINT|PRIMARY\s+KEY|UNIQUE|CHECK|FOREIGN\s+KEY|EXCLUDE)\b', re.IGNORECASE)
+# Words that end the data type of a column definition
+COLUMN_OPTION = re.compile(r'\s+(PRIMARY|REFERENCES|NOT|NULL|DEFAULT|CHECK|UNIQUE|GENERATED|CONSTRAINT|COLLATE)\b',
+                           re.IGNORECASE)
+
+def migration_files(directory=MIGRATIONS_DIR):
+    paths = sorted(glob.glob(os.path.join(directory, '*.sql')))
+    if not paths:
+        raise FileNotFoundError(f'no migrations found in {directory}')
+    fixed = {path[:-len('_fixed.sql')] + '.sql' for path in paths if path.endswith('_fixed.sql')}
+    return [path for path in paths if path not in fixed]
+
+def strip_comments(sql):
+    """sql without -- comments, leaving string literals alone."""
+    return re.sub(r"('(?:[^']|'')*')|--[^\n]*", lambda m: m.group(1) or '', sql)
+
+def split_top_level(body):
+    """Split a parenthesised list on the commas that are not nested or quoted."""
+    items, depth, current, quoted = [], 0, [], False
+    for char in body:
+        if char == "'":
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        elif not quoted and char == ',' and depth == 0:
+            items.append(''.join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    items.append(''.join(current).strip())
+    return [item for item in items if item]
+
+def table_body(sql, start):
+    """Text between the parenthesis opened just before start and its match."""
+    depth, quoted = 1, False
+    for end in range(start, len(sql)):
+        char = sql[end]
+        if char == "'":
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+            if depth == 0:
+                return sql[start:end]
+    raise ValueError('unbalanced parentheses in CREATE TABLE')
+
+def parse_reference(text):
+    """{'table', 'column'} a REFERENCES clause points at, or None. Tables
+    outside the public schema keep their schema, e.g. auth.users."""
+    match = REFERENCES.search(text)
+    if not match:
+        return None
+    schema_name, table, column = match.groups()
+    if schema_name and schema_name.lower() != 'public':
+        table = f'{schema_name}.{table}'
+    return {'table': table.lower(), 'column': (column or 'id').lower()}
+
+def check_expression(text):
+    """The expression of the first CHECK (...) in text, or None."""
+    match = CHECK.search(text)
+    return ' '.join(table_body(text, match.end()).split()) if match else None
+
+def parse_column(item):
+    name, _, rest = item.partition(' ')
+    option = COLUMN_OPTION.search(' ' + rest)
+    data_type = (rest[:option.start()] if option else rest).strip()
+    return name.strip('"'), {
+        'type': ' '.join(data_type.lower().split()),
+        'generated': bool(re.search(r'\bGENERATED\s+ALWAYS\s+AS\s*\(', item, re.IGNORECASE)),
+        'not_null': bool(re.search(r'\bNOT\s+NULL\b|\bPRIMARY\s+KEY\b', rest, re.IGNORECASE)),
+        'references': parse_reference(rest),
+        'check': check_expression(rest),
+    }
+
+def parse_migrations(paths=None):
+    """Enum types and tables defined by the migrations.
+
+    Returns {'enums': {type: [labels]}, 'tables': {table: {column: info}},
+    'checks': {table: [{'name', 'expression'}]}}, where info holds the
+    column's lower-cased data type, whether it is a generated column (which
+    COPY cannot write), whether it is NOT NULL and the {'table', 'column'}
+    its foreign key references, if any. Checks hold the SQL of the column and
+    table CHECK constraints, named the way Postgres names them.
+    """
+    enums, tables, checks = {}, {}, {}
+    for path in migration_files() if paths is None else paths:
+        with open(path) as f:
+            sql = strip_comments(f.read())
+        for match in CREATE_TYPE.finditer(sql):
+            enums.setdefault(match.group(1).lower(), re.findall(r"'((?:[^']|'')*)'", match.group(2)))
+        for match in CREATE_TABLE.finditer(sql):
+            table = match.group(2).lower()
+            if table in tables:
+                continue
+            columns, foreign_keys, primary_key, table_checks = {}, [], [], []
+            for item in split_top_level(table_body(sql, match.end())):
+                foreign_key = FOREIGN_KEY.match(item)
+                if foreign_key:
+                    foreign_keys.append((foreign_key.group(1), parse_reference(foreign_key.group(2))))
+                elif PRIMARY_KEY.match(item):
+                    primary_key += [name.strip().strip('"') for name in PRIMARY_KEY.match(item).group(1).split(',')]
+                elif TABLE_CONSTRAINT.match(item):
+                    expression = check_expression(item)
+                    if expression:
+                        name = CONSTRAINT_NAME.match(item)
+                        table_checks.append({'name': name.group(1) if name else f'{table}_check',
+                                             'expression': expression})
+                elif not item.upper().startswith('LIKE '):
+                    name, info = parse_column(item)
+                    columns[name] = info
+            for name, reference in foreign_keys:
+                if name in columns:
+                    columns[name]['references'] = reference
+            for name in primary_key:
+                if name in columns:
+                    columns[name]['not_null'] = True
+            column_checks = [{'name': f'{table}_{name}_check', 'expression': info.pop('check')}
+                             for name, info in columns.items()]
+            tables[table] = columns
+            checks[table] = [check for check in column_checks if check['expression']] + table_checks
+    return {'enums': enums, 'tables': tables, 'checks': checks}
+
+_parsed = None
+
+def migrations_schema():
+    """parse_migrations() of supabase/migrations, parsed once per process."""
+    global _parsed
+    if _parsed is None:
+        _parsed = parse_migrations()
+    return _parsed
+
+def table_dependencies(parsed, tables):
+    """{table: set of the given tables it references}, ignoring self references
+    and tables outside the given set (such as auth.users)."""
+    return {
+        table: {info['references']['table'] for info in parsed['tables'][table].values()
+                if info['references'] and info['references']['table'] in tables
+                and info['references']['table'] != table}
+        for table in tables
+    }
+
+if __name__ == '__main__':
+    schema = parse_migrations()
+    for table in sys.argv[1:] or sorted(schema['tables']):
+        print(table)
+        for column, info in schema['tables'][table].items():
+            reference = f" -> {info['references']['table']}.{info['references']['column']}" if info['references'] else ''
+            flags = (' (generated)' if info['generated'] else '') + (' not null' if info['not_null'] else '')
+            print(f"  {column:<28} {info['type']}{flags}{reference}")
+        for check in schema['checks'][table]:
+            print(f"  CHECK {check['name']}: {check['expression']}")
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# Binary store of the legacy ID -> UUID mappings of a run (uuid_mappings.bin).
+#
+# The file is a header followed by fixed-width entries sorted by key: a
+# 16-byte BLAKE2 digest of "table:legacy_id" and the 16-byte UUID. Lookups
+# mmap the file and binary search it, so a tool resolving a few IDs reads a
+# few pages instead of parsing every mapping. MappingWriter streams entries
+# into sorted runs on disk and merges them, so memory stays bounded too.
+#
+#   python uuid_map.py uuid_mappings.bin consultants c1111111-1111-1111-1111-111111111111
+import bisect
+import hashlib
+import heapq
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b'UUIDMAP1'
+HEADER = struct.Struct('>8sQ')
+KEY_BYTES = 16
+ENTRY_BYTES = KEY_BYTES + 16
+RUN_ENTRIES = 1_000_000
+READ_ENTRIES = 65_536
+
+def mapping_key(table, legacy_id):
+    return hashlib.blake2b(f'{table}:{legacy_id}'.encode(), digest_size=KEY_BYTES).digest()
+
+def format_uuid(data):
+    h = data.hex()
+    return f'{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}'
+
+def read_entries(f):
+    """Entries of a sorted run, read in blocks."""
+    while data := f.read(READ_ENTRIES * ENTRY_BYTES):
+        for start in range(0, len(data), ENTRY_BYTES):
+            yield data[start:start + ENTRY_BYTES]
+
+class MappingWriter:
+    """Write mappings to path in any order; the file appears sorted on close().
+
+    Every RUN_ENTRIES entries are sorted and spilled to a run file next to
+    path, and close() merges the runs into path.
+    """
+
+    def __init__(self, path, run_entries=RUN_ENTRIES):
+        self.path = path
+        self.run_entries = run_entries
+        self.entries = []
+        self.runs = []
+        self.count = 0
+
+    def add(self, table, legacy_id, new_id):
+        self.entries.append(mapping_key(table, legacy_id) + bytes.fromhex(new_id.replace('-', '')))
+        self.count += 1
+        if len(self.entries) >= self.run_entries:
+            self.spill()
+
+    def spill(self):
+        run = f'{self.path}.run-{len(self.runs):05d}'
+        self.entries.sort()
+        with open(run, 'wb') as f:
+            f.write(b''.join(self.entries))
+        self.runs.append(run)
+        self.entries = []
+
+    def close(self):
+        self.entries.sort()
+        files = [open(run, 'rb') for run in self.runs]
+        tmp_path = f'{self.path}.tmp'
+        try:
+            with open(tmp_path, 'wb') as out:
+                out.write(HEADER.pack(MAGIC, self.count))
+                merged = heapq.merge(self.entries, *(read_entries(f) for f in files))
+                block = []
+                for entry in merged:
+                    block.append(entry)
+                    if len(block) == READ_ENTRIES:
+                        out.write(b''.join(block))
+                        block = []
+                out.write(b''.join(block))
+            os.replace(tmp_path, self.path)
+        finally:
+            for f in files:
+                f.close()
+            for run in self.runs:
+                os.remove(run)
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            for run in self.runs:
+                os.remove(run)
+
+class SortedKeys:
+    """The keys of a mapped file as a sequence, for bisect."""
+
+    def __init__(self, data, count):
+        self.data = data
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        start = HEADER.size + i * ENTRY_BYTES
+        return self.data[start:start + KEY_BYTES]
+
+class MappingReader:
+    """Look up UUIDs in a file written by MappingWriter without loading it."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(self.data)
+        if magic != MAGIC or len(self.data) != HEADER.size + count * ENTRY_BYTES:
+            self.data.close()
+            raise ValueError(f'{path} is not a UUID mapping file')
+        self.keys = SortedKeys(self.data, count)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def get(self, table, legacy_id, default=None):
+        key = mapping_key(table, legacy_id)
+        i = bisect.bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return default
+        start = HEADER.size + i * ENTRY_BYTES + KEY_BYTES
+        return format_uuid(self.data[start:start + 16])
+
+    def close(self):
+        self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+if __name__ == '__main__':
+    if len(sys.argv) < 4:
+        sys.exit('usage: uuid_map.py MAPPINGS TABLE LEGACY_ID...')
+    with MappingReader(sys.argv[1]) as mappings:
+        for legacy_id in sys.argv[3:]:
+            print(f"{legacy_id} {mappings.get(sys.argv[2], legacy_id, '-')}")